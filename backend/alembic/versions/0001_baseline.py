@@ -0,0 +1,179 @@
+"""baseline schema
+
+Creates the tables on an empty database. On a database that was managed
+by the old migrate_db.py script it only adds/drops the columns that script
+used to patch, so existing deployments can be stamped onto this history
+by simply running `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0001"
+down_revision = None
+branch_labels = None
+depends_on = None
+
+UUID = postgresql.UUID(as_uuid=True)
+
+
+def _tables():
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def _columns(table_name):
+    return {c["name"] for c in sa.inspect(op.get_bind()).get_columns(table_name)}
+
+
+def _add_missing_columns(table_name, columns):
+    existing = _columns(table_name)
+    for column in columns:
+        if column.name not in existing:
+            op.add_column(table_name, column)
+
+
+def _create_tables(existing):
+    if "auth_users" not in existing:
+        op.create_table(
+            "auth_users",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("password_hash", sa.String(), nullable=True),
+            sa.Column("auth_provider", sa.String(), nullable=False),
+            sa.Column("is_email_verified", sa.Boolean(), nullable=True),
+            sa.Column("email_verification_code", sa.String(), nullable=True),
+            sa.Column("email_verification_expires_at", sa.DateTime(timezone=True), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index("ix_auth_users_email", "auth_users", ["email"], unique=True)
+
+    if "user_profiles" not in existing:
+        op.create_table(
+            "user_profiles",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False, unique=True),
+            sa.Column("name", sa.Text(), nullable=False),
+            sa.Column("date_of_birth", sa.Date(), nullable=True),
+            sa.Column("phone_country_code", sa.String(), nullable=True),
+            sa.Column("phone_number", sa.Numeric(), nullable=True),
+            sa.Column("gender", sa.String(), nullable=True),
+            sa.Column("blood_group", sa.String(), nullable=True),
+            sa.Column("height", sa.Numeric(), nullable=True),
+            sa.Column("weight", sa.Numeric(), nullable=True),
+            sa.Column("country", sa.String(), nullable=True),
+            sa.Column("allergies", sa.ARRAY(sa.String()), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    if "emergency_contacts" not in existing:
+        op.create_table(
+            "emergency_contacts",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("name", sa.Text(), nullable=False),
+            sa.Column("relation", sa.String(), nullable=True),
+            sa.Column("phone_country_code", sa.String(), nullable=True),
+            sa.Column("phone_number", sa.Numeric(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    if "medical_records" not in existing:
+        op.create_table(
+            "medical_records",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("record_type", sa.String(), nullable=False),
+            sa.Column("file_path", sa.Text(), nullable=False),
+            sa.Column("ai_insight", sa.Text(), nullable=True),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+    if "family_access_requests" not in existing:
+        op.create_table(
+            "family_access_requests",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("requester_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("owner_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("status", sa.String(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("responded_at", sa.DateTime(timezone=True), nullable=True),
+            sa.UniqueConstraint("requester_user_id", "owner_user_id", "status", name="unique_pending_request"),
+        )
+
+    if "family_medical_access" not in existing:
+        op.create_table(
+            "family_medical_access",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("owner_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("viewer_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("can_view_medical_records", sa.Boolean(), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.UniqueConstraint("owner_user_id", "viewer_user_id", name="unique_family_access"),
+        )
+
+    if "family_invite_tokens" not in existing:
+        op.create_table(
+            "family_invite_tokens",
+            sa.Column("id", UUID, primary_key=True),
+            sa.Column("owner_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=False),
+            sa.Column("invite_token", sa.String(64), nullable=False),
+            sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+            sa.Column("is_used", sa.Boolean(), nullable=False),
+            sa.Column("used_by_user_id", UUID, sa.ForeignKey("auth_users.id"), nullable=True),
+            sa.Column("used_at", sa.DateTime(timezone=True), nullable=True),
+        )
+        op.create_index("ix_family_invite_tokens_invite_token", "family_invite_tokens", ["invite_token"], unique=True)
+
+
+def upgrade():
+    existing = _tables()
+    _create_tables(existing)
+
+    # Columns the old migrate_db.py script added to pre-existing tables
+    _add_missing_columns("auth_users", [
+        sa.Column("auth_provider", sa.String(), server_default="email", nullable=False),
+        sa.Column("is_email_verified", sa.Boolean(), server_default=sa.false()),
+        sa.Column("email_verification_code", sa.String()),
+        sa.Column("email_verification_expires_at", sa.DateTime(timezone=True)),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ])
+    _add_missing_columns("user_profiles", [
+        sa.Column("height", sa.Numeric()),
+        sa.Column("weight", sa.Numeric()),
+        sa.Column("country", sa.String()),
+    ])
+    _add_missing_columns("medical_records", [
+        sa.Column("title", sa.String()),
+        sa.Column("record_type", sa.String()),
+        sa.Column("ai_insight", sa.Text()),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    ])
+
+    # ...and the legacy medical_records columns it dropped
+    legacy = _columns("medical_records")
+    for name in ("file_type", "record_category", "original_filename", "uploaded_at"):
+        if name in legacy:
+            op.drop_column("medical_records", name)
+
+
+def downgrade():
+    for table_name in (
+        "family_invite_tokens",
+        "family_medical_access",
+        "family_access_requests",
+        "medical_records",
+        "emergency_contacts",
+        "user_profiles",
+        "auth_users",
+    ):
+        op.drop_table(table_name)
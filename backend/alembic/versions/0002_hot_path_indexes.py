@@ -0,0 +1,65 @@
+"""indexes for hot-path lookups
+
+Built with CREATE INDEX CONCURRENTLY so large tables stay writable while
+the index is built. CONCURRENTLY cannot run inside a transaction, hence
+the autocommit block. A concurrent build that failed part-way leaves an
+INVALID index behind; it is dropped and rebuilt instead of being skipped
+by IF NOT EXISTS.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0002"
+down_revision = "0001"
+branch_labels = None
+depends_on = None
+
+INDEXES = [
+    # GET /records, emergency bundle, account deletion
+    ("ix_medical_records_user_id_created_at", "medical_records", ["user_id", "created_at"]),
+    # "shared with me" and the viewer side of access checks
+    ("ix_family_medical_access_viewer_user_id", "family_medical_access", ["viewer_user_id"]),
+    # pending requests for an owner
+    ("ix_family_access_requests_owner_status", "family_access_requests", ["owner_user_id", "status"]),
+    ("ix_emergency_contacts_user_id", "emergency_contacts", ["user_id"]),
+    # reuse of a still-valid invite link
+    ("ix_family_invite_tokens_owner_active", "family_invite_tokens", ["owner_user_id", "is_used", "expires_at"]),
+]
+
+
+def _drop_if_invalid(name):
+    bind = op.get_bind()
+    if bind.dialect.name != "postgresql":
+        return
+    invalid = bind.execute(
+        sa.text(
+            "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+            "WHERE c.relname = :name AND NOT i.indisvalid"
+        ),
+        {"name": name},
+    ).first()
+    if invalid:
+        op.drop_index(name, postgresql_concurrently=True)
+
+
+def upgrade():
+    with op.get_context().autocommit_block():
+        for name, table_name, columns in INDEXES:
+            _drop_if_invalid(name)
+            op.create_index(
+                name,
+                table_name,
+                columns,
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        for name, table_name, _ in reversed(INDEXES):
+            op.drop_index(name, table_name=table_name, postgresql_concurrently=True, if_exists=True)
@@ -0,0 +1,53 @@
+"""analysis runs and per-parameter trends
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0004"
+down_revision = "0003"
+branch_labels = None
+depends_on = None
+
+UUID = postgresql.UUID(as_uuid=True)
+
+
+def upgrade():
+    op.create_table(
+        "analysis_runs",
+        sa.Column("id", UUID, primary_key=True),
+        sa.Column("user_id", UUID, sa.ForeignKey("auth_users.id", ondelete="CASCADE"), nullable=False),
+        sa.Column("inputs", postgresql.JSONB(), nullable=False),
+        sa.Column("overall_health_risk", sa.String(), nullable=True),
+        sa.Column("ml_risk_score", sa.Integer(), nullable=True),
+        sa.Column("result", postgresql.JSONB(), nullable=False),
+        sa.Column("created_at", sa.DateTime(timezone=True), server_default=sa.func.now(), nullable=False),
+    )
+    op.create_index("ix_analysis_runs_user_id_created_at", "analysis_runs", ["user_id", "created_at"])
+
+    op.create_table(
+        "parameter_trends",
+        sa.Column("user_id", UUID, sa.ForeignKey("auth_users.id", ondelete="CASCADE"), primary_key=True),
+        sa.Column("parameter", sa.String(), primary_key=True),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("first_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_at", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_value", sa.Float(), nullable=True),
+        sa.Column("min_value", sa.Float(), nullable=True),
+        sa.Column("max_value", sa.Float(), nullable=True),
+        sa.Column("rolling_mean", sa.Float(), nullable=True),
+        sa.Column("sum_t", sa.Float(), nullable=False),
+        sa.Column("sum_y", sa.Float(), nullable=False),
+        sa.Column("sum_tt", sa.Float(), nullable=False),
+        sa.Column("sum_ty", sa.Float(), nullable=False),
+    )
+
+
+def downgrade():
+    op.drop_table("parameter_trends")
+    op.drop_index("ix_analysis_runs_user_id_created_at", table_name="analysis_runs")
+    op.drop_table("analysis_runs")
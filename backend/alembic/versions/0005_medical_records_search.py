@@ -0,0 +1,53 @@
+"""full-text search over medical records
+
+Adds a stored generated tsvector column (title, record type, ai_insight)
+and a GIN index on it. Adding a stored column rewrites medical_records
+under an exclusive lock; the index is then built concurrently.
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+from sqlalchemy.dialects import postgresql
+
+revision = "0005"
+down_revision = "0004"
+branch_labels = None
+depends_on = None
+
+# Same expression as app.models.medical_record.SEARCH_VECTOR_EXPRESSION at
+# the time of this revision; migrations must not follow later model edits.
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', replace(record_type, '_', ' ')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(ai_insight, '')), 'C')"
+)
+
+
+def upgrade():
+    op.add_column(
+        "medical_records",
+        sa.Column("search_vector", postgresql.TSVECTOR(), sa.Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)),
+    )
+    with op.get_context().autocommit_block():
+        op.create_index(
+            "ix_medical_records_search_vector",
+            "medical_records",
+            ["search_vector"],
+            postgresql_using="gin",
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade():
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_medical_records_search_vector",
+            table_name="medical_records",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+    op.drop_column("medical_records", "search_vector")
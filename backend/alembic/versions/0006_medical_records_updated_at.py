@@ -0,0 +1,29 @@
+"""medical_records.updated_at
+
+Lets the /records ETag notice edits of existing rows (the background lab
+report extraction fills ai_insight after upload). now() is a constant
+default for ALTER TABLE, so the column is added without rewriting the
+table; existing rows get the migration time.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+"""
+from alembic import op
+import sqlalchemy as sa
+
+revision = "0006"
+down_revision = "0005"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    op.add_column(
+        "medical_records",
+        sa.Column("updated_at", sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade():
+    op.drop_column("medical_records", "updated_at")
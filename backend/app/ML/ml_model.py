@@ -1,9 +1,14 @@
-import joblib
 import os
-import pandas as pd
+import threading
+from typing import Optional
+
+# joblib/sklearn and pandas are imported on first use: together they take
+# about a second to import, which every worker would otherwise pay at boot.
 
 class MLHealthRiskModel:
     def __init__(self):
+        import joblib
+
         model_path = os.path.join(
             os.path.dirname(__file__),
             "chikitsacloud_risk_model.pkl"
@@ -14,6 +19,8 @@ class MLHealthRiskModel:
         self.model = joblib.load(model_path)
 
     def predict(self, patient, values):
+        import pandas as pd
+
         gender_val = 1 if patient.gender.lower() in ["male", "m"] else 0
 
         features_df = pd.DataFrame([[
@@ -38,4 +45,28 @@ class MLHealthRiskModel:
             raise ValueError(f"Prediction failed: {str(e)}")
 
 
-ml_model_instance = MLHealthRiskModel()
+_model: Optional[MLHealthRiskModel] = None
+_model_lock = threading.Lock()
+
+
+def get_ml_model() -> MLHealthRiskModel:
+    """
+    The shared model, loaded on first call (normally by the app lifespan
+    at startup, so requests do not pay for it).
+    """
+    global _model
+    if _model is None:
+        with _model_lock:
+            if _model is None:
+                _model = MLHealthRiskModel()
+    return _model
+
+
+def is_ml_model_loaded() -> bool:
+    return _model is not None
+
+
+def unload_ml_model():
+    global _model
+    with _model_lock:
+        _model = None
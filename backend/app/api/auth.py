@@ -3,14 +3,15 @@ from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.orm import Session
 from app.database import get_db
 from app.schemas.auth import UserSignup, VerifyEmail, UserLogin, ResendVerification
-from app.services import auth_service
+from app.services import auth_service, emergency_service
 from app.api.deps import get_current_user
+from app.core import rate_limit
 from app.models.user import AuthUser
 from typing import Optional
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-@router.post("/signup")
+@router.post("/signup", dependencies=[Depends(rate_limit.SIGNUP_PER_IP)])
 def signup(user: UserSignup, db: Session = Depends(get_db)):
     """
     Register a new user with email and password.
@@ -25,21 +26,23 @@ def signup(user: UserSignup, db: Session = Depends(get_db)):
 #     """
 #     return auth_service.verify_email(db, data)
 
-@router.post("/token")
+@router.post("/token", dependencies=[Depends(rate_limit.LOGIN_PER_IP)])
 def login_for_swagger(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     """
     Dedicated endpoint for Swagger UI Authorize button.
     Uses Form Data as required by OAuth2 standard.
     """
     login_data = UserLogin(email=form_data.username, password=form_data.password)
+    rate_limit.LOGIN_PER_ACCOUNT.check(login_data.email.lower())
     return auth_service.authenticate_user(db, login_data)
 
-@router.post("/login")
+@router.post("/login", dependencies=[Depends(rate_limit.LOGIN_PER_IP)])
 def login(data: UserLogin, db: Session = Depends(get_db)):
     """
     Login endpoint for the Mobile App.
     Uses JSON body.
     """
+    rate_limit.LOGIN_PER_ACCOUNT.check(data.email.lower())
     return auth_service.authenticate_user(db, data)
 
 # @router.post("/resend-verification")
@@ -57,4 +60,6 @@ def delete_account(
     """
     Deletes the current user's account and all associated data.
     """
-    return auth_service.delete_user_account(db, current_user.id)
+    result = auth_service.delete_user_account(db, current_user.id)
+    emergency_service.invalidate_bundle(current_user.id)
+    return result
@@ -1,28 +1,64 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.database import get_db
+from app.database import get_db, get_async_db
 from app.core import security
 from app.models.user import AuthUser
+from typing import Optional
 from uuid import UUID
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token")
+optional_oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/token", auto_error=False)
 
-def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> AuthUser:
-    credentials_exception = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+def _user_id_from_token(token: str) -> str:
     payload = security.verify_token(token)
     if payload is None:
-        raise credentials_exception
+        raise _credentials_exception()
     
     user_id: str = payload.get("sub")
     if user_id is None:
-        raise credentials_exception
-        
+        raise _credentials_exception()
+    return user_id
+
+def get_current_user(db: Session = Depends(get_db), token: str = Depends(oauth2_scheme)) -> AuthUser:
+    user_id = _user_id_from_token(token)
     user = db.query(AuthUser).filter(AuthUser.id == user_id).first()
     if user is None:
-        raise credentials_exception
+        raise _credentials_exception()
+    return user
+
+def get_optional_current_user(
+    db: Session = Depends(get_db), token: Optional[str] = Depends(optional_oauth2_scheme)
+) -> Optional[AuthUser]:
+    """
+    The authenticated user, or None for anonymous callers. A token that is
+    sent but invalid is still rejected.
+    """
+    if token is None:
+        return None
+    return get_current_user(db, token)
+
+async def get_current_user_async(
+    db: AsyncSession = Depends(get_async_db), token: str = Depends(oauth2_scheme)
+) -> AuthUser:
+    """
+    Same as get_current_user, for async routes running on the async engine.
+    """
+    try:
+        user_id = UUID(_user_id_from_token(token))
+    except ValueError:
+        raise _credentials_exception()
+    result = await db.execute(select(AuthUser).where(AuthUser.id == user_id))
+    user = result.scalars().first()
+    if user is None:
+        raise _credentials_exception()
     return user
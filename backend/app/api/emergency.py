@@ -0,0 +1,37 @@
+from fastapi import APIRouter, Depends, HTTPException, Query
+from typing import Optional
+
+from app.api.deps import get_current_user
+from app.models.user import AuthUser
+from app.services import emergency_service
+from app.schemas.emergency import EmergencyBundleOut
+
+router = APIRouter(prefix="/emergency", tags=["Emergency"])
+
+@router.get("/bundle", response_model=EmergencyBundleOut)
+async def get_emergency_bundle(
+    lat: Optional[float] = Query(None),
+    lng: Optional[float] = Query(None),
+    location: Optional[str] = Query(None),
+    refresh: bool = Query(False),
+    current_user: AuthUser = Depends(get_current_user)
+):
+    """
+    Everything the app needs in an emergency, in ONE round trip:
+    blood group, allergies, emergency contacts and the nearest hospitals.
+    - Location is optional; without it the last known hospitals are returned
+    - The last bundle is cached per user (`cached: true`); pass `refresh=true` to rebuild
+    """
+    if (lat is None) != (lng is None):
+        raise HTTPException(status_code=400, detail="Both lat and lng are required")
+    if lat is not None and (not (-90 <= lat <= 90) or not (-180 <= lng <= 180)):
+        raise HTTPException(status_code=400, detail="Invalid coordinates")
+
+    return await emergency_service.get_emergency_bundle(
+        current_user.id,
+        current_user.email.split('@')[0],
+        lat=lat,
+        lng=lng,
+        location=location,
+        refresh=refresh
+    )
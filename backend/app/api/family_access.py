@@ -1,14 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
-from app.services import family_access_service
+from app.database import get_db, get_async_db
+from app.services import family_access_service, idempotency_service
 from app.schemas import family_access as schemas
 from app.schemas.family_access import AccessRequestOut, FamilyAccessOut
 
-from app.api.deps import get_current_user
+from app.api.deps import get_current_user, get_current_user_async
+from app.core import etag, serialization
 from app.models.user import AuthUser
 
 router = APIRouter(prefix="/family-access", tags=["Family Access"])
@@ -29,17 +31,21 @@ def request_access(
 
 
 @router.post("/respond/{request_id}", response_model=AccessRequestOut)
-def respond_to_request(
+async def respond_to_request(
+    request: Request,
     request_id: UUID,
     response: schemas.AccessRequestResponse,
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    current_user: AuthUser = Depends(get_current_user_async)
 ):
-    return family_access_service.respond_to_access_request(
-        db,
-        request_id,
-        current_user.id,
-        response.accept
+    return await idempotency_service.run(
+        request, current_user.id, idempotency_key, serialization.ACCESS_REQUEST,
+        lambda db: family_access_service.respond_to_access_request(
+            db,
+            request_id,
+            current_user.id,
+            response.accept
+        ),
     )
 
 
@@ -48,24 +54,37 @@ def get_pending_requests(
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return family_access_service.get_pending_requests_for_owner(db, current_user.id)
+    requests = family_access_service.get_pending_requests_for_owner(db, current_user.id)
+    return serialization.ACCESS_REQUESTS.response(requests)
 
 
 # --- Active Access Management ---
 
 @router.get("/active-access", response_model=List[FamilyAccessOut])
 def get_active_access(
+    request: Request,
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return family_access_service.get_active_access_for_owner(db, current_user.id)
+    fingerprint = family_access_service.get_active_access_fingerprint_for_owner(db, current_user.id)
+    tag = etag.weak_etag("active-access", current_user.id, *fingerprint)
+    if etag.is_fresh(request, tag):
+        return etag.not_modified(tag)
+    grants = family_access_service.get_active_access_for_owner(db, current_user.id)
+    return serialization.FAMILY_ACCESS.response(grants, headers=etag.headers(tag))
 
 @router.get("/shared-with-me", response_model=List[FamilyAccessOut])
 def get_shared_access(
+    request: Request,
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return family_access_service.get_active_access_for_viewer(db, current_user.id)
+    fingerprint = family_access_service.get_active_access_fingerprint_for_viewer(db, current_user.id)
+    tag = etag.weak_etag("shared-with-me", current_user.id, *fingerprint)
+    if etag.is_fresh(request, tag):
+        return etag.not_modified(tag)
+    grants = family_access_service.get_active_access_for_viewer(db, current_user.id)
+    return serialization.FAMILY_ACCESS.response(grants, headers=etag.headers(tag))
 
 
 @router.delete("/revoke/{viewer_id}")
@@ -80,12 +99,12 @@ def revoke_access(
 # --- Permission Check Endpoint (for frontend validation) ---
 
 @router.get("/can-view/{owner_id}")
-def check_access_permission(
+async def check_access_permission(
     owner_id: UUID,
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    has_access = family_access_service.check_medical_record_access(
+    has_access = await family_access_service.check_medical_record_access_async(
         db, 
         current_user.id, 
         owner_id
@@ -120,14 +139,18 @@ def generate_qr_invite(
 
 
 @router.post("/redeem-invite", response_model=AccessRequestOut)
-def redeem_invite_token(
+async def redeem_invite_token(
+    request: Request,
     invite_data: schemas.InviteTokenRedeem,
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    current_user: AuthUser = Depends(get_current_user_async)
 ):
-    return family_access_service.validate_and_redeem_invite_token(
-        db,
-        invite_data.invite_token,
-        current_user.id
+    return await idempotency_service.run(
+        request, current_user.id, idempotency_key, serialization.ACCESS_REQUEST,
+        lambda db: family_access_service.validate_and_redeem_invite_token(
+            db,
+            invite_data.invite_token,
+            current_user.id
+        ),
     )
 
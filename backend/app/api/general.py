@@ -1,4 +1,8 @@
 from fastapi import APIRouter
+from fastapi.responses import JSONResponse, Response
+from app.core import metrics
+from app.core.db_pool import pool_stats
+from app.services import health_service
 
 router = APIRouter()
 
@@ -9,3 +13,34 @@ def read_root():
 @router.get("/health")
 def health_check():
     return {"status": "ok", "service": "chikitsa-api"}
+
+@router.get("/livez")
+def liveness():
+    """
+    The process is up and serving requests. Touches no dependency, so a
+    database or storage outage never gets the instance restarted.
+    """
+    return {"status": "ok"}
+
+@router.get("/readyz")
+async def readiness():
+    """
+    503 unless the database, the ML model and storage all pass; the load
+    balancer should stop routing here until it is 200 again.
+    """
+    report = await health_service.readiness()
+    return JSONResponse(status_code=200 if report["ready"] else 503, content=report)
+
+@router.get("/health/db-pool")
+def db_pool_status():
+    """
+    Connection pool utilization and checkout wait times (sync and async engines).
+    """
+    return pool_stats()
+
+@router.get("/metrics", include_in_schema=False)
+def prometheus_metrics():
+    """
+    Prometheus text exposition of the in-process metrics.
+    """
+    return Response(content=metrics.REGISTRY.render(), media_type=metrics.CONTENT_TYPE)
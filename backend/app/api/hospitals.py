@@ -1,21 +1,28 @@
-from fastapi import APIRouter, Query, HTTPException, status
+from fastapi import APIRouter, Depends, Query, HTTPException, Response, status
 from typing import Optional, List
+from app.core import rate_limit
 from app.services import hospital_service
 from app.schemas import hospital as schemas
 
 router = APIRouter(prefix="/hospitals", tags=["Hospitals"])
 
-@router.get("/nearby", response_model=List[schemas.HospitalDetail])
+@router.get("/nearby", response_model=List[schemas.HospitalDetail], dependencies=[Depends(rate_limit.HOSPITALS_PER_IP)])
 async def get_nearby_hospitals(
+    response: Response,
     lat: Optional[float] = Query(None),
     lng: Optional[float] = Query(None),
-    location: Optional[str] = Query(None)
+    location: Optional[str] = Query(None),
+    limit: int = Query(10, ge=1, le=50),
+    cursor: Optional[str] = Query(None)
 ):
     """
     Hospital Discovery API
     - GPS Priority (lat/lng)
     - Fallback to manual location text
-    - Returns flat list of hospitals
+    - Returns flat list of hospitals, nearest first
+    - Radius grows automatically until `limit` hospitals are found
+    - Pass the `X-Next-Cursor` response header back as `cursor` for the next page
+    - `X-Stale: true` marks cached results served while the upstream is down
     """
     target_lat, target_lng = None, None
 
@@ -28,5 +35,13 @@ async def get_nearby_hospitals(
     else:
         raise HTTPException(status_code=400, detail="Missing location data")
 
-    hospitals = await hospital_service.search_nearby_hospitals(target_lat, target_lng, radius_km=10)
-    return hospitals
+    result = await hospital_service.search_hospitals_adaptive(
+        target_lat, target_lng, limit=limit, cursor=cursor
+    )
+    if result["next_cursor"]:
+        response.headers["X-Next-Cursor"] = result["next_cursor"]
+    response.headers["X-Search-Radius-Km"] = str(result["radius_km"])
+    if result["stale"]:
+        response.headers["X-Stale"] = "true"
+        response.headers["Warning"] = '110 - "Response is Stale"'
+    return result["hospitals"]
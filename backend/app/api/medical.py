@@ -1,63 +1,45 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
-from app.services import user_service
+from app.api.deps import get_current_user_async, get_optional_current_user
+from app.database import get_async_db, get_db
+from app.models.user import AuthUser
+from app.services import analysis_service, user_service
 from app.services.chikitsa.engine import run_chikitsa_engine
-from app.utils.age import calculate_age
-from app.schemas.medical import MedicalInput
+from app.schemas.medical import AnalysisResultOut, MedicalInput, ParameterTrendOut
 
 router = APIRouter(prefix="/medical", tags=["Medical"])
 
 
-@router.post("/analyze")
+@router.post("/analyze", response_model=AnalysisResultOut)
 def analyze_medical_data(
     data: MedicalInput,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_db),
+    current_user: Optional[AuthUser] = Depends(get_optional_current_user)
 ):
     # 1️⃣ Fetch user profile from DB (Optional fallback)
     user = user_service.get_user_profile(db, data.user_id)
 
-    # 2️⃣ Determine Age, Gender, Height, Weight with fallbacks
-    age = data.age
-    gender = data.gender
-    height = data.height
-    weight = data.weight
-    name = "Guest"
-
-    if user:
-        name = user.name
-        if age is None and user.date_of_birth:
-            age = calculate_age(user.date_of_birth)
-        if gender is None:
-            gender = user.gender
-        if height is None and user.height:
-            height = float(user.height)
-        if weight is None and user.weight:
-            weight = float(user.weight)
-
-    # 3️⃣ Determine Age, Gender, Height, Weight with fallbacks
-    # We use defaults (30, Male, 170, 70) if nothing is found to ensure the endpoint always works
-    age = age or 30
-    gender = gender or "Male"
-    height = height or 170
-    weight = weight or 70
-
-    patient_data = {
-        "name": name,
-        "age": age,
-        "gender": gender,
-        "height": height,
-        "weight": weight,
-        "bp_systolic": data.bp_systolic,
-        "bp_diastolic": data.bp_diastolic,
-        "spo2": data.spo2,
-        "hemoglobin": data.hemoglobin,
-        "creatinine": data.creatinine,
-        "blood_sugar": data.blood_sugar,
-        "cholesterol": data.cholesterol
-    }
-
-    # 4️⃣ Run CHIKITSACLOUD engine
-    return run_chikitsa_engine(patient_data)
+    # 2️⃣ Body values first, then the profile, then defaults
+    patient_data = analysis_service.build_patient_data(user, **data.model_dump(exclude={"user_id"}))
+
+    # 3️⃣ Run CHIKITSACLOUD engine
+    result = run_chikitsa_engine(patient_data)
+
+    # 4️⃣ Keep the run (and update trends) only for the signed-in user's own data
+    if current_user is not None and current_user.id == data.user_id:
+        analysis_service.record_analysis_run(db, current_user.id, patient_data, result)
+
+    return result
+
+
+@router.get("/trends", response_model=List[ParameterTrendOut])
+async def get_trends(
+    owner_id: Optional[UUID] = Query(None),
+    db: AsyncSession = Depends(get_async_db),
+    current_user: AuthUser = Depends(get_current_user_async)
+):
+    return await analysis_service.get_trends_async(db, current_user.id, owner_id)
@@ -1,36 +1,82 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Form, Query
-from fastapi.responses import FileResponse, RedirectResponse
+from fastapi import APIRouter, Depends, Header, HTTPException, UploadFile, File, Form, Query, Request
+from fastapi.responses import FileResponse, RedirectResponse, StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from datetime import date, datetime, timezone
 from typing import List, Optional
 from uuid import UUID
 
-from app.database import get_db
-from app.api.deps import get_current_user
+from app.database import get_db, get_async_db
+from app.api.deps import get_current_user, get_current_user_async
+from app.core import etag, serialization
 from app.models.user import AuthUser
-from app.services import medical_record_service
+from app.services import export_service, idempotency_service, medical_record_service
 from app.schemas import medical_record as schemas
 
 router = APIRouter(prefix="/records", tags=["Medical Records"])
 
 @router.post("", response_model=schemas.MedicalRecordOut)
 async def create_record(
+    request: Request,
     title: str = Form(...),
     record_type: str = Form(...),
     file: UploadFile = File(...),
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    idempotency_key: Optional[str] = Header(None),
+    current_user: AuthUser = Depends(get_current_user_async)
 ):
-    return medical_record_service.create_medical_record(
-        db, current_user.id, title, record_type, file
+    # A retried upload with the same Idempotency-Key gets the first record
+    # back instead of storing the file twice
+    return await idempotency_service.run(
+        request, current_user.id, idempotency_key, serialization.MEDICAL_RECORD,
+        lambda db: medical_record_service.create_medical_record(
+            db, current_user.id, title, record_type, file
+        ),
     )
 
 @router.get("", response_model=List[schemas.MedicalRecordOut])
 async def list_records(
+    request: Request,
     owner_id: Optional[UUID] = Query(None),
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+    current_user: AuthUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    return medical_record_service.list_user_records(db, current_user.id, owner_id)
+    # Taken before the rows: a change in between only costs the client a refetch
+    fingerprint = await medical_record_service.get_records_fingerprint_async(db, current_user.id, owner_id)
+    tag = etag.weak_etag("records", current_user.id, *fingerprint)
+    if etag.is_fresh(request, tag):
+        return etag.not_modified(tag)
+    records = await medical_record_service.list_user_records_async(db, current_user.id, owner_id)
+    return serialization.MEDICAL_RECORDS.response(records, headers=etag.headers(tag))
+
+@router.get("/search", response_model=schemas.RecordSearchOut)
+async def search_records(
+    q: Optional[str] = Query(None, max_length=200, description="Words in the title, type or AI insight"),
+    record_type: Optional[List[str]] = Query(None),
+    date_from: Optional[date] = Query(None),
+    date_to: Optional[date] = Query(None),
+    owner_id: Optional[UUID] = Query(None),
+    limit: int = Query(50, ge=1, le=200),
+    offset: int = Query(0, ge=0),
+    current_user: AuthUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    return await medical_record_service.search_records_async(
+        db, current_user.id, q, record_type, date_from, date_to, owner_id, limit, offset
+    )
+
+@router.get("/export")
+async def export_records(
+    current_user: AuthUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
+):
+    # ZIP of every record file + manifest.json, streamed as it is built
+    records, profile = await export_service.load_export(db, current_user.id)
+    filename = f"chikitsa-records-{datetime.now(timezone.utc):%Y%m%d}.zip"
+    return StreamingResponse(
+        export_service.stream_export(records, profile),
+        media_type="application/zip",
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
 
 @router.delete("/{record_id}")
 async def delete_record(
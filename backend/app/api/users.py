@@ -1,11 +1,13 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from typing import List
 from uuid import UUID
 
-from app.database import get_db
-from app.services import user_service
-from app.api.deps import get_current_user
+from app.database import get_db, get_async_db
+from app.services import user_service, emergency_service
+from app.api.deps import get_current_user, get_current_user_async
+from app.core import etag, rate_limit, serialization
 from app.models.user import AuthUser
 from app.schemas.user import (
     UserProfileCreate,
@@ -20,7 +22,7 @@ from app.schemas.user import (
 
 router = APIRouter(prefix="/users", tags=["Users"])
 
-@router.get("/search", response_model=UserProfileOut)
+@router.get("/search", response_model=UserProfileOut, dependencies=[Depends(rate_limit.USER_SEARCH_PER_IP)])
 def search_user_by_email(
     email: str,
     db: Session = Depends(get_db)
@@ -39,22 +41,29 @@ def search_user_by_email(
 # -------- Consolidated Profile --------
 
 @router.get("/profile", response_model=ConsolidatedProfileOut)
-def get_full_profile(
-    current_user: AuthUser = Depends(get_current_user),
-    db: Session = Depends(get_db)
+async def get_full_profile(
+    request: Request,
+    current_user: AuthUser = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_db)
 ):
-    profile = user_service.get_user_profile(db, current_user.id)
+    # No validator until the profile exists (it is created below)
+    fingerprint = await user_service.get_profile_fingerprint_async(db, current_user.id)
+    tag = etag.weak_etag("profile", current_user.id, *fingerprint) if fingerprint else None
+    if tag and etag.is_fresh(request, tag):
+        return etag.not_modified(tag)
+
+    profile = await user_service.get_user_profile_async(db, current_user.id)
     if not profile:
         # Create an empty profile if none exists
-        profile = user_service.create_user_profile(db, current_user.id, UserProfileCreate(name=current_user.email.split('@')[0]))
+        profile = await user_service.create_user_profile_async(db, current_user.id, UserProfileCreate(name=current_user.email.split('@')[0]))
     
-    emergency_contacts = user_service.get_emergency_contacts(db, current_user.id)
+    emergency_contacts = await user_service.get_emergency_contacts_async(db, current_user.id)
     
-    return {
+    return serialization.CONSOLIDATED_PROFILE.response({
         "personal_details": profile,
         "emergency_contacts": emergency_contacts,
         "allergies": profile.allergies
-    }
+    }, headers=etag.headers(tag) if tag else None)
 
 @router.put("/profile", response_model=ConsolidatedProfileOut)
 def update_full_profile(
@@ -67,15 +76,16 @@ def update_full_profile(
     
     if update_data.emergency_contact:
         user_service.update_emergency_contact(db, current_user.id, update_data.emergency_contact)
+    emergency_service.invalidate_bundle(current_user.id)
         
     profile = user_service.get_user_profile(db, current_user.id)
     emergency_contacts = user_service.get_emergency_contacts(db, current_user.id)
     
-    return {
+    return serialization.CONSOLIDATED_PROFILE.response({
         "personal_details": profile,
         "emergency_contacts": emergency_contacts,
         "allergies": profile.allergies
-    }
+    })
 
 # -------- Emergency Contacts --------
 
@@ -85,7 +95,9 @@ def add_emergency_contact(
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return user_service.create_emergency_contact(db, current_user.id, contact)
+    contact = user_service.create_emergency_contact(db, current_user.id, contact)
+    emergency_service.invalidate_bundle(current_user.id)
+    return contact
 
 @router.get("/emergency-contacts", response_model=List[EmergencyContactOut])
 def list_emergency_contacts(
@@ -101,7 +113,9 @@ def update_emergency_contact(
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return user_service.update_emergency_contact_by_id(db, current_user.id, contact_id, contact_data)
+    contact = user_service.update_emergency_contact_by_id(db, current_user.id, contact_id, contact_data)
+    emergency_service.invalidate_bundle(current_user.id)
+    return contact
 
 @router.delete("/emergency-contacts/{contact_id}")
 def delete_emergency_contact(
@@ -109,4 +123,6 @@ def delete_emergency_contact(
     current_user: AuthUser = Depends(get_current_user),
     db: Session = Depends(get_db)
 ):
-    return user_service.delete_emergency_contact(db, current_user.id, contact_id)
+    result = user_service.delete_emergency_contact(db, current_user.id, contact_id)
+    emergency_service.invalidate_bundle(current_user.id)
+    return result
@@ -0,0 +1,101 @@
+import time
+from typing import Any, Awaitable, Callable, Optional
+
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """
+    Raised instead of calling an upstream whose circuit is open.
+    """
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"Circuit '{name}' is open")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Per-upstream circuit breaker.
+
+    - closed:    calls go through; `failure_threshold` consecutive failures open it.
+    - open:      calls fail fast with CircuitOpenError for `recovery_timeout` seconds.
+    - half_open: up to `half_open_max_calls` probe calls are let through;
+                 a successful probe closes the circuit, a failed one re-opens it.
+
+    `is_failure` decides which exceptions count against the upstream
+    (e.g. a 404 for an unknown place is not an upstream failure).
+    """
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: int = 5,
+        recovery_timeout: float = 30.0,
+        half_open_max_calls: int = 1,
+        is_failure: Optional[Callable[[Exception], bool]] = None,
+    ):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_timeout = recovery_timeout
+        self.half_open_max_calls = half_open_max_calls
+        self._is_failure = is_failure or (lambda exc: True)
+        self._failures = 0
+        self._opened_at: Optional[float] = None
+        self._probes_in_flight = 0
+
+    @property
+    def state(self) -> str:
+        if self._opened_at is None:
+            return CLOSED
+        if time.monotonic() - self._opened_at >= self.recovery_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    def retry_after(self) -> float:
+        if self._opened_at is None:
+            return 0.0
+        return max(self.recovery_timeout - (time.monotonic() - self._opened_at), 0.0)
+
+    def allow_request(self) -> bool:
+        state = self.state
+        if state == CLOSED:
+            return True
+        if state == HALF_OPEN and self._probes_in_flight < self.half_open_max_calls:
+            return True
+        return False
+
+    def record_success(self):
+        self._failures = 0
+        self._opened_at = None
+
+    def record_failure(self):
+        self._failures += 1
+        if self.state == HALF_OPEN or self._failures >= self.failure_threshold:
+            self._opened_at = time.monotonic()
+
+    async def call(self, fn: Callable[[], Awaitable[Any]]) -> Any:
+        if not self.allow_request():
+            raise CircuitOpenError(self.name, self.retry_after())
+
+        probing = self.state == HALF_OPEN
+        if probing:
+            self._probes_in_flight += 1
+        try:
+            result = await fn()
+        except Exception as exc:
+            if self._is_failure(exc):
+                self.record_failure()
+            else:
+                # The upstream answered (e.g. "not found"), so it is healthy.
+                self.record_success()
+            raise
+        else:
+            self.record_success()
+            return result
+        finally:
+            if probing:
+                self._probes_in_flight -= 1
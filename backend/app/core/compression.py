@@ -0,0 +1,183 @@
+import zlib
+from typing import List, Optional, Tuple
+
+import brotli
+
+from app.core.config import settings
+
+# Already compressed (zip exports, PDFs, images) or not worth it
+_COMPRESSIBLE_TYPES = ("text/", "application/json", "application/javascript", "application/xml")
+_SKIP_STATUSES = (204, 206, 304)
+
+
+def _compressible(content_type: str) -> bool:
+    media_type = content_type.split(";", 1)[0].strip().lower()
+    return media_type.startswith(_COMPRESSIBLE_TYPES) or media_type.endswith(("+json", "+xml"))
+
+
+def negotiate(accept_encoding: str) -> Optional[str]:
+    """
+    "br", "gzip" or None for an Accept-Encoding value; br wins ties.
+    """
+    weights = {}
+    for part in accept_encoding.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        weights[coding.strip().lower()] = q
+    star = weights.get("*", 0.0)
+    best, best_q = None, 0.0
+    for coding in ("br", "gzip"):
+        q = weights.get(coding, star)
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+class _Encoder:
+    def __init__(self, encoding: str, gzip_level: int, brotli_quality: int):
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=brotli_quality, mode=brotli.MODE_TEXT)
+            self._zlib = None
+        else:
+            self._brotli = None
+            # wbits 31: gzip container
+            self._zlib = zlib.compressobj(gzip_level, zlib.DEFLATED, 31)
+
+    def chunk(self, data: bytes) -> bytes:
+        # Flushed per chunk so a streamed body is not held back by the encoder
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.flush()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self._brotli is not None:
+            return self._brotli.process(data) + self._brotli.finish()
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """
+    Pure ASGI middleware compressing text/JSON responses with brotli or
+    gzip, as negotiated by Accept-Encoding.
+
+    - A body sent in one message is compressed whole, or passed through when
+      it is shorter than COMPRESSION_MIN_SIZE.
+    - A streamed body is compressed chunk by chunk and flushed after each
+      one; nothing is buffered.
+    - Responses that already have a Content-Encoding, are not text/JSON
+      (zip exports, files), or carry no body (304) pass through untouched.
+
+    COMPRESSION_BROTLI_QUALITY (0-11) and COMPRESSION_GZIP_LEVEL (1-9) trade
+    CPU for bandwidth.
+    """
+
+    def __init__(self, app, minimum_size: Optional[int] = None,
+                 gzip_level: Optional[int] = None, brotli_quality: Optional[int] = None):
+        self.app = app
+        self.minimum_size = settings.COMPRESSION_MIN_SIZE if minimum_size is None else minimum_size
+        self.gzip_level = settings.COMPRESSION_GZIP_LEVEL if gzip_level is None else gzip_level
+        self.brotli_quality = settings.COMPRESSION_BROTLI_QUALITY if brotli_quality is None else brotli_quality
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        encoding = None
+        for name, value in scope.get("headers", []):
+            if name == b"accept-encoding":
+                encoding = negotiate(value.decode("latin-1"))
+                break
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        responder = _CompressingResponder(send, encoding, self)
+        await self.app(scope, receive, responder.send)
+
+
+class _CompressingResponder:
+    def __init__(self, send, encoding: str, config: CompressionMiddleware):
+        self._send = send
+        self.encoding = encoding
+        self.config = config
+        self.start: Optional[dict] = None
+        # None until the first body message decides
+        self.encoder: Optional[_Encoder] = None
+        self.passthrough = False
+
+    async def send(self, message):
+        kind = message["type"]
+        if kind == "http.response.start":
+            headers: List[Tuple[bytes, bytes]] = message.get("headers", [])
+            content_type = b""
+            content_length = None
+            for name, value in headers:
+                if name == b"content-encoding":
+                    self.passthrough = True
+                elif name == b"content-type":
+                    content_type = value
+                elif name == b"content-length":
+                    content_length = int(value)
+            if (
+                message["status"] in _SKIP_STATUSES
+                or not _compressible(content_type.decode("latin-1"))
+                or (content_length is not None and content_length < self.config.minimum_size)
+            ):
+                self.passthrough = True
+            if self.passthrough:
+                await self._send(message)
+            else:
+                # Held until the first body message shows whether to compress
+                self.start = message
+            return
+
+        if kind != "http.response.body" or self.passthrough:
+            await self._send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+
+        if self.encoder is None:
+            if not more_body and len(body) < self.config.minimum_size:
+                self.passthrough = True
+                await self._send(self.start)
+                await self._send(message)
+                return
+            self.encoder = _Encoder(self.encoding, self.config.gzip_level, self.config.brotli_quality)
+            await self._send_start(None if more_body else self.encoder.finish(body))
+            if not more_body:
+                return
+
+        data = self.encoder.chunk(body) if more_body else self.encoder.finish(body)
+        await self._send({"type": "http.response.body", "body": data, "more_body": more_body})
+
+    async def _send_start(self, whole_body: Optional[bytes]):
+        headers = []
+        vary = None
+        for name, value in self.start.get("headers", []):
+            if name == b"content-length":
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                # Different bytes than the identity response
+                value = b"W/" + value
+            if name == b"vary":
+                vary = value
+                continue
+            headers.append((name, value))
+        headers.append((b"content-encoding", self.encoding.encode()))
+        if vary is None:
+            vary = b"Accept-Encoding"
+        elif b"accept-encoding" not in vary.lower():
+            vary += b", Accept-Encoding"
+        headers.append((b"vary", vary))
+        if whole_body is not None:
+            headers.append((b"content-length", str(len(whole_body)).encode()))
+        await self._send({**self.start, "headers": headers})
+        if whole_body is not None:
+            await self._send({"type": "http.response.body", "body": whole_body})
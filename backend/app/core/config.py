@@ -5,9 +5,22 @@ class Settings(BaseSettings):
     # App
     PROJECT_NAME: str = "Chikitsa Cloud API"
     DEBUG: bool = False
+    LOG_LEVEL: str = "INFO"
+    LOG_JSON: bool = True
     
     # Database
     DATABASE_URL: str
+    DB_POOL_SIZE: int = 20
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30.0
+    DB_POOL_RECYCLE_SECONDS: int = 300
+    DB_POOL_PRE_PING: bool = False
+    # Transaction pooler (pgbouncer / Supabase port 6543): NullPool unless a
+    # small DB_PGBOUNCER_POOL_SIZE is set, no server-side prepared statements
+    DB_PGBOUNCER_MODE: bool = False
+    DB_PGBOUNCER_POOL_SIZE: int = 0
+    # Statements slower than this are logged with their parameter types (0 = off)
+    SLOW_QUERY_MS: float = 200.0
     
     # Email (Generic SMTP)
     SMTP_EMAIL: str
@@ -26,6 +39,64 @@ class Settings(BaseSettings):
     SUPABASE_KEY: str
     SUPABASE_BUCKET: str = "medical records"
 
+    # Hospital discovery (external OpenStreetMap services)
+    NOMINATIM_URL: str = "https://nominatim.openstreetmap.org/search"
+    OVERPASS_URL: str = "https://overpass-api.de/api/interpreter"
+    UPSTREAM_BREAKER_FAILURE_THRESHOLD: int = 5
+    UPSTREAM_BREAKER_RECOVERY_SECONDS: float = 30.0
+
+    # Readiness probe (/readyz)
+    HEALTH_CHECK_TIMEOUT_SECONDS: float = 2.0
+    HEALTH_CHECK_CACHE_SECONDS: float = 5.0
+
+    # Sampling profiler: folded stacks per route in PROFILING_OUTPUT_DIR.
+    # Requests with a valid X-Profile-Token are profiled whenever a secret is set.
+    PROFILING_ENABLED: bool = False
+    PROFILING_SAMPLE_RATE: float = 0.01
+    PROFILING_INTERVAL_MS: float = 5.0
+    PROFILING_OUTPUT_DIR: str = "profiles"
+    PROFILING_HEADER_SECRET: str = ""
+
+    # Family access checks: cached viewer sets per owner. Each worker polls
+    # the shared access_control_version row at most every
+    # ACL_VERSION_CHECK_SECONDS to notice changes made by other workers.
+    ACL_CACHE_TTL_SECONDS: float = 60.0
+    ACL_VERSION_CHECK_SECONDS: float = 1.0
+
+    # Background extraction of uploaded PDF lab reports
+    LAB_REPORT_WORKERS: int = 2
+    LAB_REPORT_MAX_PENDING: int = 32
+    LAB_REPORT_MAX_PAGES: int = 20
+
+    # /records/export: record files downloaded from storage at once per export
+    EXPORT_FETCH_CONCURRENCY: int = 4
+
+    # Response compression (brotli/gzip). Higher levels: smaller bodies, more CPU.
+    COMPRESSION_ENABLED: bool = True
+    COMPRESSION_MIN_SIZE: int = 500
+    COMPRESSION_BROTLI_QUALITY: int = 4
+    COMPRESSION_GZIP_LEVEL: int = 6
+
+    # Token-bucket rate limits (requests per minute, burst), per client IP
+    # and, for logins, per account
+    RATE_LIMIT_ENABLED: bool = True
+    RATE_LIMIT_LOGIN_IP_PER_MINUTE: float = 20
+    RATE_LIMIT_LOGIN_IP_BURST: int = 10
+    RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE: float = 5
+    RATE_LIMIT_LOGIN_ACCOUNT_BURST: int = 5
+    RATE_LIMIT_SIGNUP_IP_PER_MINUTE: float = 5
+    RATE_LIMIT_SIGNUP_IP_BURST: int = 5
+    RATE_LIMIT_LOOKUP_IP_PER_MINUTE: float = 60
+    RATE_LIMIT_LOOKUP_IP_BURST: int = 20
+
+    # Idempotency-Key: stored responses are replayed for IDEMPOTENCY_TTL_HOURS.
+    # A retry of a request still running in another worker waits up to
+    # IDEMPOTENCY_WAIT_SECONDS, then gets 409; a key left in progress longer
+    # than IDEMPOTENCY_PENDING_TIMEOUT_SECONDS (crashed worker) is taken over.
+    IDEMPOTENCY_TTL_HOURS: float = 24.0
+    IDEMPOTENCY_WAIT_SECONDS: float = 10.0
+    IDEMPOTENCY_PENDING_TIMEOUT_SECONDS: float = 120.0
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = ["*"]
 
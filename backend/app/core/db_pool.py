@@ -0,0 +1,172 @@
+import threading
+import time
+import uuid
+from typing import Dict
+
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from app.core import metrics
+from app.core.config import settings
+
+
+POOL_CHECKOUTS = metrics.counter("db_pool_checkouts_total", "Connections handed out", ("engine",))
+POOL_CHECKOUT_FAILURES = metrics.counter(
+    "db_pool_checkout_failures_total", "Checkouts that timed out or failed to connect", ("engine",)
+)
+POOL_CHECKOUT_WAIT = metrics.histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time from asking the pool for a connection until it is handed out",
+    ("engine",),
+    buckets=(0.0005, 0.001, 0.005, 0.01, 0.05, 0.1, 0.5, 1.0, 5.0, 30.0),
+)
+POOL_CHECKED_OUT = metrics.gauge("db_pool_checked_out", "Connections currently checked out", ("engine",))
+POOL_CAPACITY = metrics.gauge("db_pool_capacity", "pool_size + max_overflow", ("engine",))
+
+
+class PoolMetrics:
+    """
+    Checkout statistics for one connection pool. Checkout time covers
+    waiting for a free connection (or opening one) until it is handed out.
+    """
+
+    def __init__(self, name: str):
+        self.name = name
+        self._lock = threading.Lock()
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_seconds_total = 0.0
+        self.wait_seconds_max = 0.0
+
+    def record(self, wait_seconds: float, timed_out: bool = False):
+        if timed_out:
+            POOL_CHECKOUT_FAILURES.labels(engine=self.name).inc()
+        else:
+            POOL_CHECKOUTS.labels(engine=self.name).inc()
+            POOL_CHECKOUT_WAIT.labels(engine=self.name).observe(wait_seconds)
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_seconds_total += wait_seconds
+            self.wait_seconds_max = max(self.wait_seconds_max, wait_seconds)
+
+
+_metrics: Dict[str, PoolMetrics] = {}
+_pools: Dict[str, object] = {}
+
+
+class _InstrumentedPoolMixin:
+    # Metrics are kept per pool class (not instance) so they survive
+    # pool.recreate() after engine.dispose().
+    metrics_name = "pool"
+
+    def connect(self):
+        pool_metrics = _metrics.setdefault(self.metrics_name, PoolMetrics(self.metrics_name))
+        _pools[self.metrics_name] = self
+        start = time.perf_counter()
+        try:
+            connection = super().connect()
+        except Exception:
+            pool_metrics.record(time.perf_counter() - start, timed_out=True)
+            raise
+        pool_metrics.record(time.perf_counter() - start)
+        return connection
+
+
+class InstrumentedQueuePool(_InstrumentedPoolMixin, QueuePool):
+    metrics_name = "sync"
+
+class InstrumentedNullPool(_InstrumentedPoolMixin, NullPool):
+    metrics_name = "sync"
+
+class InstrumentedAsyncQueuePool(_InstrumentedPoolMixin, AsyncAdaptedQueuePool):
+    metrics_name = "async"
+
+class InstrumentedAsyncNullPool(_InstrumentedPoolMixin, NullPool):
+    metrics_name = "async"
+
+
+def engine_options(is_async: bool = False) -> dict:
+    """
+    create_engine / create_async_engine keyword arguments built from Settings.
+
+    Liveness comes from recycling connections older than DB_POOL_RECYCLE_SECONDS
+    (below the server/pooler idle timeout) rather than a pre-ping round trip on
+    every checkout; DB_POOL_PRE_PING can turn the ping back on.
+
+    DB_PGBOUNCER_MODE targets a transaction pooler (e.g. Supabase on port 6543):
+    the pooler already multiplexes server connections, so we keep no pool
+    (or a small one) and disable server-side prepared statements, which do
+    not survive across pooled transactions.
+    """
+    options = {
+        "pool_pre_ping": settings.DB_POOL_PRE_PING,
+        "pool_recycle": settings.DB_POOL_RECYCLE_SECONDS,
+    }
+
+    if settings.DB_PGBOUNCER_MODE:
+        if settings.DB_PGBOUNCER_POOL_SIZE > 0:
+            options["poolclass"] = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+            options["pool_size"] = settings.DB_PGBOUNCER_POOL_SIZE
+            options["max_overflow"] = 0
+            options["pool_timeout"] = settings.DB_POOL_TIMEOUT
+        else:
+            options["poolclass"] = InstrumentedAsyncNullPool if is_async else InstrumentedNullPool
+            del options["pool_recycle"]
+        if is_async:
+            # asyncpg: no statement cache, unnamed-per-use statement names
+            options["connect_args"] = {
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": _unique_statement_name,
+            }
+        return options
+
+    options["poolclass"] = InstrumentedAsyncQueuePool if is_async else InstrumentedQueuePool
+    options["pool_size"] = settings.DB_POOL_SIZE
+    options["max_overflow"] = settings.DB_MAX_OVERFLOW
+    options["pool_timeout"] = settings.DB_POOL_TIMEOUT
+    return options
+
+
+def _unique_statement_name() -> str:
+    return f"__asyncpg_{uuid.uuid4()}__"
+
+
+def pool_stats() -> dict:
+    """
+    Snapshot of pool utilization and checkout wait times, per engine.
+    """
+    stats = {}
+    for name, pool_metrics in _metrics.items():
+        pool = _pools.get(name)
+        entry = {
+            "checkouts": pool_metrics.checkouts,
+            "checkout_timeouts": pool_metrics.timeouts,
+            "checkout_wait_seconds_total": round(pool_metrics.wait_seconds_total, 6),
+            "checkout_wait_seconds_max": round(pool_metrics.wait_seconds_max, 6),
+            "checkout_wait_seconds_avg": round(pool_metrics.wait_seconds_total / pool_metrics.checkouts, 6) if pool_metrics.checkouts else 0.0,
+        }
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            entry.update({
+                "pool_size": pool.size(),
+                "capacity": capacity,
+                "checked_out": pool.checkedout(),
+                "idle": pool.checkedin(),
+                "overflow": max(pool.overflow(), 0),
+                "utilization": round(pool.checkedout() / capacity, 4) if capacity else 0.0,
+            })
+        stats[name] = entry
+    return stats
+
+
+def _collect_pool_metrics():
+    for name, entry in pool_stats().items():
+        if "capacity" in entry:
+            POOL_CHECKED_OUT.labels(engine=name).set(entry["checked_out"])
+            POOL_CAPACITY.labels(engine=name).set(entry["capacity"])
+
+
+metrics.REGISTRY.add_collector(_collect_pool_metrics)
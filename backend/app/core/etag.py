@@ -0,0 +1,44 @@
+import hashlib
+from typing import Dict
+
+from fastapi import Request, Response
+
+# Clients may keep the body but must revalidate before every reuse
+CACHE_CONTROL = "private, no-cache"
+
+
+def weak_etag(*parts) -> str:
+    """
+    W/"..." validator for a response whose content is determined by
+    `parts`: the route and requester plus the row counts and latest
+    created_at/updated_at of everything the response is built from. Weak,
+    because equal validators mean equal data, not byte-identical bodies.
+    """
+    digest = hashlib.blake2b(repr(parts).encode(), digest_size=12).hexdigest()
+    return f'W/"{digest}"'
+
+
+def _opaque(tag: str) -> str:
+    tag = tag.strip()
+    return tag[2:] if tag.startswith("W/") else tag
+
+
+def is_fresh(request: Request, etag: str) -> bool:
+    """
+    True when If-None-Match names `etag` (weak comparison, RFC 9110 13.1.2).
+    """
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    opaque = _opaque(etag)
+    return any(_opaque(tag) == opaque for tag in header.split(","))
+
+
+def headers(etag: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": CACHE_CONTROL}
+
+
+def not_modified(etag: str) -> Response:
+    return Response(status_code=304, headers=headers(etag))
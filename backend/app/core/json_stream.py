@@ -0,0 +1,83 @@
+import codecs
+import json
+import re
+from typing import Any, List
+
+_SEEKING, _ITEMS, _DONE = range(3)
+_SEPARATORS = re.compile(r"[\s,]*")
+
+
+class JsonArrayStream:
+    """
+    Incremental parser for ONE array inside a streamed JSON document,
+    e.g. the "elements" array of an Overpass response.
+
+    Feed raw byte chunks as they arrive; each call returns the array items
+    that are complete so far. Only the current, partially received item is
+    buffered, so memory stays proportional to the largest item rather than
+    to the whole response. Everything outside the array is skipped.
+    """
+
+    def __init__(self, key: str, max_item_chars: int = 1_000_000):
+        self._key_pattern = re.compile(r'"%s"\s*:\s*\[' % re.escape(key))
+        self._key_overlap = len(key) + 64
+        self._max_item_chars = max_item_chars
+        self._decoder = json.JSONDecoder()
+        self._utf8 = codecs.getincrementaldecoder("utf-8")()
+        self._buffer = ""
+        self._state = _SEEKING
+
+    @property
+    def finished(self) -> bool:
+        return self._state == _DONE
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        if self._state == _DONE:
+            return []
+        self._buffer += self._utf8.decode(chunk)
+        return self._drain()
+
+    def close(self) -> None:
+        """
+        Signals end of input. Raises ValueError if the array never closed.
+        """
+        self._buffer += self._utf8.decode(b"", final=True)
+        if self._state != _DONE:
+            raise ValueError("JSON stream ended before the array was complete")
+
+    def _drain(self) -> List[Any]:
+        if self._state == _SEEKING:
+            match = self._key_pattern.search(self._buffer)
+            if not match:
+                # Keep a tail in case the key is split across chunks.
+                self._buffer = self._buffer[-self._key_overlap:]
+                return []
+            self._buffer = self._buffer[match.end():]
+            self._state = _ITEMS
+
+        items = []
+        buffer = self._buffer
+        pos = 0
+        while True:
+            pos = _SEPARATORS.match(buffer, pos).end()
+            if pos == len(buffer):
+                break
+            if buffer[pos] == "]":
+                self._state = _DONE
+                self._buffer = ""
+                return items
+            try:
+                item, end = self._decoder.raw_decode(buffer, pos)
+            except json.JSONDecodeError:
+                # Item not fully received yet (or malformed: bounded below).
+                if len(buffer) - pos > self._max_item_chars:
+                    raise ValueError("JSON array item exceeds the maximum buffered size")
+                break
+            if end == len(buffer) and not isinstance(item, (dict, list, str)):
+                # A bare number/literal may continue in the next chunk.
+                break
+            items.append(item)
+            pos = end
+
+        self._buffer = buffer[pos:]
+        return items
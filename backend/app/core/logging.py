@@ -0,0 +1,190 @@
+import atexit
+import copy
+import json
+import logging
+import queue
+import re
+import sys
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+from app.core.config import settings
+
+REQUEST_ID_HEADER = b"x-request-id"
+_VALID_REQUEST_ID = re.compile(r"^[A-Za-z0-9._\-]{1,128}$")
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else was passed via `extra=`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_REDACTIONS = [
+    # JWTs (access tokens)
+    (re.compile(r"\beyJ[\w-]+\.[\w-]+\.[\w-]+"), "[token]"),
+    (re.compile(r"(?i)\b(bearer)\s+[\w\-.~+/]+=*"), r"\1 [token]"),
+    (re.compile(r"(?i)(token|password|secret|api_?key)(['\"]?\s*[=:]\s*['\"]?)[^\s'\",&]+"), r"\1\2[redacted]"),
+    (re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+"), "[email]"),
+]
+
+
+def redact(text: str) -> str:
+    for pattern, replacement in _REDACTIONS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+class RequestIdFilter(logging.Filter):
+    """
+    Stamps each record with the current request ID. Runs on the calling
+    thread, where the request's ContextVar is visible.
+    """
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class RedactionFilter(logging.Filter):
+    """
+    Masks emails, JWTs/bearer tokens and `token=`/`password=` style values
+    in the message and in string `extra` fields.
+    """
+
+    def filter(self, record):
+        record.msg = redact(record.getMessage())
+        record.args = None
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS and isinstance(value, str):
+                setattr(record, key, redact(value))
+        if record.exc_text:
+            record.exc_text = redact(record.exc_text)
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        for key, value in vars(record).items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class _TextFormatter(logging.Formatter):
+    def format(self, record):
+        line = super().format(record)
+        return f"{line} [request_id={record.request_id}]" if getattr(record, "request_id", None) else line
+
+
+class _DeferredFormatQueueHandler(QueueHandler):
+    """
+    QueueHandler.prepare() formats the record on the calling thread. This
+    only freezes the message and traceback text (so later mutation of the
+    arguments cannot change it) and leaves redaction, JSON encoding and the
+    stream write to the listener thread.
+    """
+
+    def prepare(self, record):
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+
+_listener: Optional[QueueListener] = None
+
+
+def setup_logging(level: Optional[str] = None, json_output: Optional[bool] = None):
+    """
+    Routes every logger through a queue: request threads only enqueue the
+    record, a background QueueListener formats and writes it to stdout.
+    Safe to call more than once.
+    """
+    global _listener
+    level = (level or settings.LOG_LEVEL).upper()
+    json_output = settings.LOG_JSON if json_output is None else json_output
+
+    stream_handler = logging.StreamHandler(sys.stdout)
+    if json_output:
+        stream_handler.setFormatter(JsonFormatter())
+    else:
+        stream_handler.setFormatter(_TextFormatter("%(asctime)s %(levelname)s %(name)s: %(message)s"))
+    stream_handler.addFilter(RedactionFilter())
+
+    queue_handler = _DeferredFormatQueueHandler(queue.SimpleQueue())
+    queue_handler.addFilter(RequestIdFilter())
+
+    if _listener is not None:
+        _listener.stop()
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        if isinstance(handler, QueueHandler):
+            root.removeHandler(handler)
+    root.addHandler(queue_handler)
+    root.setLevel(level)
+
+    _listener = QueueListener(queue_handler.queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+
+
+def shutdown_logging():
+    """
+    Stops the listener after flushing the records still queued.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(shutdown_logging)
+
+
+class RequestIdMiddleware:
+    """
+    Pure ASGI middleware: takes the caller's X-Request-ID (if well formed)
+    or generates one, exposes it to log records and echoes it back.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope.get("headers", []):
+            if name == REQUEST_ID_HEADER:
+                candidate = value.decode("latin-1")
+                if _VALID_REQUEST_ID.match(candidate):
+                    request_id = candidate
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                headers = list(message.get("headers", []))
+                headers.append((REQUEST_ID_HEADER, request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
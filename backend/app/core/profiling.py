@@ -0,0 +1,235 @@
+import asyncio
+import hashlib
+import hmac
+import logging
+import os
+import random
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+from typing import List, Optional
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PROFILE_HEADER = b"x-profile-token"
+MAX_STACK_DEPTH = 128
+
+_session_var: ContextVar[Optional["ProfileSession"]] = ContextVar("profile_session", default=None)
+
+
+def make_profile_token(ttl_seconds: int = 300, secret: Optional[str] = None) -> str:
+    """
+    Value for the X-Profile-Token header: "<expiry>.<hmac>", valid for
+    `ttl_seconds`. From backend/:
+
+        python -c "from app.core.profiling import make_profile_token; print(make_profile_token())"
+    """
+    expires = str(int(time.time()) + ttl_seconds)
+    key = (secret or settings.PROFILING_HEADER_SECRET).encode()
+    return f"{expires}.{hmac.new(key, expires.encode(), hashlib.sha256).hexdigest()}"
+
+
+def _valid_token(token: str, secret: str) -> bool:
+    expires, _, signature = token.partition(".")
+    if not expires.isdigit() or int(expires) < time.time():
+        return False
+    expected = hmac.new(secret.encode(), expires.encode(), hashlib.sha256).hexdigest()
+    return hmac.compare_digest(signature, expected)
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{code.co_firstlineno})"
+
+
+def _fold(frames) -> str:
+    """
+    `frames` innermost first -> "root;...;leaf" (Brendan Gregg's folded format).
+    """
+    return ";".join(_frame_label(f) for f in reversed(frames[:MAX_STACK_DEPTH]))
+
+
+def _thread_stack(frame) -> List:
+    stack = []
+    while frame is not None:
+        stack.append(frame)
+        frame = frame.f_back
+    return stack
+
+
+def _worker_context(stack):
+    # Sync endpoints/dependencies run in anyio worker threads inside
+    # `context.run(func)` with a copy of the request's context; the copy tells
+    # us which request (if any) the thread is currently working for.
+    for frame in reversed(stack):
+        if frame.f_code.co_name == "run" and "anyio" in frame.f_code.co_filename:
+            return frame.f_locals.get("context")
+    return None
+
+
+class ProfileSession:
+    def __init__(self, task: asyncio.Task, loop: asyncio.AbstractEventLoop, loop_thread_id: int):
+        self.task = task
+        self.loop = loop
+        self.loop_thread_id = loop_thread_id
+        self.samples: Counter = Counter()
+        self.in_worker = False
+        self.route = "unmatched"
+        self.started = time.perf_counter()
+        self.duration = 0.0
+
+
+class Sampler:
+    """
+    Statistical profiler: a background thread wakes every `interval` seconds
+    while at least one profiled request is in flight and records the stacks
+    that belong to those requests. Nothing runs while no request is profiled.
+
+    - event loop thread: the request's task stack when it is the running
+      task, else the coroutine chain it is suspended in (shown under
+      "(await)"), so time spent awaiting upstreams/DB shows up too;
+    - worker threads: stacks of sync code running in the request's context.
+
+    Finished sessions are appended to <output_dir>/<route>.folded by the
+    sampler thread, never on the request path.
+    """
+
+    def __init__(self, interval: float, output_dir: str):
+        self.interval = interval
+        self.output_dir = output_dir
+        self._lock = threading.Lock()
+        self._active: List[ProfileSession] = []
+        self._finished: List[ProfileSession] = []
+        self._wakeup = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, session: ProfileSession):
+        with self._lock:
+            self._active.append(session)
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(target=self._run, name="profiler", daemon=True)
+                self._thread.start()
+        self._wakeup.set()
+
+    def stop(self, session: ProfileSession):
+        session.duration = time.perf_counter() - session.started
+        with self._lock:
+            self._active.remove(session)
+            self._finished.append(session)
+        self._wakeup.set()
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active)
+                finished, self._finished = self._finished, []
+            for session in finished:
+                self._write(session)
+            if not active:
+                self._wakeup.clear()
+                # Park until the next profiled request (or exit when idle)
+                if not self._wakeup.wait(timeout=30):
+                    with self._lock:
+                        if not self._active and not self._finished:
+                            self._thread = None
+                            return
+                continue
+            self._sample(active)
+            time.sleep(self.interval)
+
+    def _sample(self, sessions: List[ProfileSession]):
+        frames = sys._current_frames()
+        me = threading.get_ident()
+        for thread_id, frame in frames.items():
+            if thread_id == me:
+                continue
+            stack = _thread_stack(frame)
+            context = _worker_context(stack)
+            if context is None:
+                continue
+            session = context.get(_session_var)
+            if session in sessions:
+                session.samples[_fold(stack)] += 1
+                session.in_worker = True
+
+        for session in sessions:
+            in_worker, session.in_worker = session.in_worker, False
+            if asyncio.current_task(session.loop) is session.task:
+                frame = frames.get(session.loop_thread_id)
+                if frame is not None:
+                    session.samples[_fold(_thread_stack(frame))] += 1
+            elif not in_worker and not session.task.done():
+                # Suspended: record where it awaits (outermost coroutine first)
+                try:
+                    stack = session.task.get_stack(limit=MAX_STACK_DEPTH)
+                except Exception:
+                    continue
+                if stack:
+                    session.samples["(await);" + ";".join(_frame_label(f) for f in stack)] += 1
+
+    def _write(self, session: ProfileSession):
+        if not session.samples:
+            return
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{session.route}.folded")
+            with open(path, "a") as f:
+                for stack, count in session.samples.items():
+                    f.write(f"{stack} {count}\n")
+            logger.info(
+                "Profiled request written to %s", path,
+                extra={"route": session.route, "samples": sum(session.samples.values()),
+                       "duration_ms": round(session.duration * 1000, 1)},
+            )
+        except OSError as e:
+            logger.warning("Could not write profile: %s", e)
+
+
+def _route_slug(scope) -> str:
+    route = scope.get("route")
+    path = getattr(route, "path", None) or "unmatched"
+    return re.sub(r"[^A-Za-z0-9]+", "_", f"{scope['method']} {path}").strip("_")
+
+
+class ProfilingMiddleware:
+    """
+    Pure ASGI middleware profiling a PROFILING_SAMPLE_RATE fraction of
+    requests when PROFILING_ENABLED, and any request carrying a valid
+    X-Profile-Token (signed with PROFILING_HEADER_SECRET). When neither is
+    configured it is a single attribute check per request.
+    """
+
+    def __init__(self, app):
+        self.app = app
+        self.enabled = settings.PROFILING_ENABLED
+        self.sample_rate = settings.PROFILING_SAMPLE_RATE
+        self.secret = settings.PROFILING_HEADER_SECRET
+        self.sampler = Sampler(settings.PROFILING_INTERVAL_MS / 1000, settings.PROFILING_OUTPUT_DIR)
+
+    def _should_profile(self, scope) -> bool:
+        if self.secret:
+            for name, value in scope.get("headers", []):
+                if name == PROFILE_HEADER:
+                    return _valid_token(value.decode("latin-1"), self.secret)
+        return self.enabled and random.random() < self.sample_rate
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not (self.enabled or self.secret) or not self._should_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        loop = asyncio.get_running_loop()
+        session = ProfileSession(asyncio.current_task(), loop, threading.get_ident())
+        token = _session_var.set(session)
+        self.sampler.start(session)
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            _session_var.reset(token)
+            session.route = _route_slug(scope)
+            self.sampler.stop(session)
@@ -0,0 +1,183 @@
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Optional
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+MAX_LOGGED_STATEMENT_CHARS = 1000
+
+
+class QueryStats:
+    """
+    Number of queries and total DB time for one unit of work (a request,
+    or a block wrapped in count_queries). Queries also count towards the
+    enclosing unit, so a test block inside a request does not hide them.
+    """
+
+    def __init__(self, parent: Optional["QueryStats"] = None):
+        self.parent = parent
+        self.count = 0
+        self.total_ms = 0.0
+        self.statements = []
+
+    def record(self, statement: str, elapsed_ms: float):
+        stats = self
+        while stats is not None:
+            stats.count += 1
+            stats.total_ms += elapsed_ms
+            stats.statements.append(statement)
+            stats = stats.parent
+
+
+_current_stats: ContextVar[Optional[QueryStats]] = ContextVar("query_stats", default=None)
+
+
+def current_query_stats() -> Optional[QueryStats]:
+    return _current_stats.get()
+
+
+def parameters_shape(parameters: Any) -> Any:
+    """
+    Types of the bound parameters, never their values (they can hold PHI).
+    """
+    if isinstance(parameters, dict):
+        return {key: type(value).__name__ for key, value in parameters.items()}
+    if isinstance(parameters, (list, tuple)):
+        if parameters and isinstance(parameters[0], (dict, list, tuple)):
+            # executemany: one parameter set per row
+            return {"rows": len(parameters), "row": parameters_shape(parameters[0])}
+        return [type(value).__name__ for value in parameters]
+    return type(parameters).__name__
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_start_time", []).append(time.perf_counter())
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_start_time"].pop()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    stats = _current_stats.get()
+    if stats is not None:
+        stats.record(statement, elapsed_ms)
+
+    if settings.SLOW_QUERY_MS and elapsed_ms >= settings.SLOW_QUERY_MS:
+        logger.warning(
+            "slow query duration_ms=%.1f statement=%r parameters=%s",
+            elapsed_ms,
+            statement[:MAX_LOGGED_STATEMENT_CHARS],
+            parameters_shape(parameters),
+            extra={
+                "duration_ms": round(elapsed_ms, 1),
+                "statement": statement[:MAX_LOGGED_STATEMENT_CHARS],
+                "parameters_shape": parameters_shape(parameters),
+            },
+        )
+
+
+def install_query_hooks(engine: Engine):
+    """
+    Attach the timing hooks to a sync Engine (for an AsyncEngine pass
+    `async_engine.sync_engine`).
+    """
+    if not event.contains(engine, "before_cursor_execute", _before_cursor_execute):
+        event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+        event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+@contextmanager
+def count_queries():
+    """
+    Counts the queries run inside the block:
+
+        with count_queries() as stats:
+            client.get("/family-access/active-access")
+        assert stats.count <= 3
+    """
+    stats = QueryStats(parent=_current_stats.get())
+    token = _current_stats.set(stats)
+    try:
+        yield stats
+    finally:
+        _current_stats.reset(token)
+
+
+@contextmanager
+def assert_max_queries(budget: int):
+    """
+    Fails with AssertionError if the block runs more than `budget` queries.
+    """
+    with count_queries() as stats:
+        yield stats
+    if stats.count > budget:
+        listing = "\n".join(f"  {i + 1}. {s}" for i, s in enumerate(stats.statements))
+        raise AssertionError(
+            f"Expected at most {budget} queries, {stats.count} were run:\n{listing}"
+        )
+
+
+class QueryStatsMiddleware:
+    """
+    Pure ASGI middleware: counts the queries each HTTP request runs, adds a
+    `Server-Timing: db;dur=<ms>;desc="<n> queries"` header and logs the totals.
+
+    The header reflects queries run before the response starts; the log
+    line is written after the body is sent, so it includes the rest.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        # Chained to an enclosing count_queries() block, e.g. in tests
+        stats = QueryStats(parent=_current_stats.get())
+        token = _current_stats.set(stats)
+        started = time.perf_counter()
+        status_code = 500
+
+        async def send_with_timing(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+                headers = list(message.get("headers", []))
+                headers.append((
+                    b"server-timing",
+                    f'db;dur={stats.total_ms:.1f};desc="{stats.count} queries"'.encode(),
+                ))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current_stats.reset(token)
+            duration_ms = (time.perf_counter() - started) * 1000
+            logger.info(
+                "request db stats method=%s path=%s status=%s queries=%d db_ms=%.1f duration_ms=%.1f",
+                scope["method"],
+                scope["path"],
+                status_code,
+                stats.count,
+                stats.total_ms,
+                duration_ms,
+                extra={
+                    "method": scope["method"],
+                    "path": scope["path"],
+                    "status": status_code,
+                    "queries": stats.count,
+                    "db_ms": round(stats.total_ms, 1),
+                    "duration_ms": round(duration_ms, 1),
+                },
+            )
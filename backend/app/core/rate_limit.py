@@ -0,0 +1,111 @@
+import math
+import threading
+import time
+from collections import OrderedDict
+from typing import Tuple
+
+from fastapi import HTTPException, Request, status
+
+from app.core import metrics
+from app.core.config import settings
+
+RATE_LIMITED = metrics.counter("rate_limited_total", "Requests rejected by a rate limit", ("limit",))
+
+
+class RateLimitBackend:
+    """
+    Where token buckets live. The default InMemoryBackend limits each worker
+    on its own; an implementation over a shared store (one atomic
+    read-refill-take per call, e.g. a Redis script) makes the limits global.
+    Install it with set_backend() at startup. `take` is called on the event
+    loop, so it must not block for long.
+    """
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Takes one token from bucket `key`, which refills at `rate` tokens
+        per second up to `burst`. Returns 0 when a token was taken, else
+        the seconds until one is available.
+        """
+        raise NotImplementedError
+
+
+class InMemoryBackend(RateLimitBackend):
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._lock = threading.Lock()
+        # key -> (tokens, monotonic time of the last update), least recently used first
+        self._buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, updated = self._buckets.pop(key, (float(burst), now))
+            tokens = min(float(burst), tokens + (now - updated) * rate)
+            if tokens >= 1:
+                tokens -= 1
+                wait = 0.0
+            else:
+                wait = (1 - tokens) / rate
+            self._buckets[key] = (tokens, now)
+            if len(self._buckets) > self.max_keys:
+                # Idle the longest, so (nearly) full again anyway
+                self._buckets.popitem(last=False)
+        return wait
+
+
+_backend: RateLimitBackend = InMemoryBackend()
+
+
+def set_backend(backend: RateLimitBackend):
+    global _backend
+    _backend = backend
+
+
+def client_ip(request: Request) -> str:
+    # Behind a proxy run uvicorn with --proxy-headers/--forwarded-allow-ips,
+    # which puts the X-Forwarded-For client here; the header itself is
+    # never trusted.
+    return request.client.host if request.client else "unknown"
+
+
+class RateLimit:
+    """
+    Token bucket of `burst` requests refilled at `per_minute`, one bucket
+    per key. As a route dependency it keys by client IP and runs before
+    the handler; `check(key)` limits by account once the body is parsed.
+    Rejections are 429 with Retry-After.
+    """
+
+    def __init__(self, name: str, per_minute: float, burst: int):
+        self.name = name
+        self.rate = per_minute / 60
+        self.burst = burst
+
+    def check(self, key: str):
+        if not settings.RATE_LIMIT_ENABLED:
+            return
+        wait = _backend.take(f"{self.name}:{key}", self.rate, self.burst)
+        if wait > 0:
+            RATE_LIMITED.labels(limit=self.name).inc()
+            raise HTTPException(
+                status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+                detail="Too many requests, please try again later",
+                headers={"Retry-After": str(max(math.ceil(wait), 1))},
+            )
+
+    async def __call__(self, request: Request):
+        # Runs on the event loop: as a sync dependency the rejection would
+        # queue in the threadpool behind the bcrypt work it is shedding
+        self.check(client_ip(request))
+
+
+# bcrypt per request
+LOGIN_PER_IP = RateLimit("login_ip", settings.RATE_LIMIT_LOGIN_IP_PER_MINUTE, settings.RATE_LIMIT_LOGIN_IP_BURST)
+LOGIN_PER_ACCOUNT = RateLimit(
+    "login_account", settings.RATE_LIMIT_LOGIN_ACCOUNT_PER_MINUTE, settings.RATE_LIMIT_LOGIN_ACCOUNT_BURST
+)
+SIGNUP_PER_IP = RateLimit("signup_ip", settings.RATE_LIMIT_SIGNUP_IP_PER_MINUTE, settings.RATE_LIMIT_SIGNUP_IP_BURST)
+# Unauthenticated lookups (user enumeration, Nominatim/Overpass quota)
+USER_SEARCH_PER_IP = RateLimit("user_search_ip", settings.RATE_LIMIT_LOOKUP_IP_PER_MINUTE, settings.RATE_LIMIT_LOOKUP_IP_BURST)
+HOSPITALS_PER_IP = RateLimit("hospitals_ip", settings.RATE_LIMIT_LOOKUP_IP_PER_MINUTE, settings.RATE_LIMIT_LOOKUP_IP_BURST)
@@ -4,11 +4,19 @@ from typing import Optional
 
 from jose import JWTError, jwt
 
+from app.core import metrics
 from app.core.config import settings
 
 # We use bcrypt library directly because passlib is deprecated and has bugs
 # with newer bcrypt versions and Python 3.12+.
 
+BCRYPT_DURATION = metrics.histogram(
+    "bcrypt_duration_seconds",
+    "Time spent hashing or verifying passwords",
+    ("operation",),
+    buckets=(0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1.0, 2.0),
+)
+
 
 def _truncate_bcrypt_bytes(password: str) -> bytes:
     """
@@ -29,7 +37,8 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
         # bcrypt expects bytes for both password and hash
         password_bytes = _truncate_bcrypt_bytes(plain_password)
         hashed_bytes = hashed_password.encode("utf-8")
-        return bcrypt.checkpw(password_bytes, hashed_bytes)
+        with BCRYPT_DURATION.labels(operation="verify").time():
+            return bcrypt.checkpw(password_bytes, hashed_bytes)
     except (ValueError, Exception):
         return False
 
@@ -38,7 +47,8 @@ def get_password_hash(password: str) -> str:
     # Truncate to 72 bytes before hashing to avoid backend errors.
     password_bytes = _truncate_bcrypt_bytes(password)
     # gensalt() defaults to 12 rounds, matching passlib's common default.
-    hashed_bytes = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
+    with BCRYPT_DURATION.labels(operation="hash").time():
+        hashed_bytes = bcrypt.hashpw(password_bytes, bcrypt.gensalt())
     return hashed_bytes.decode("utf-8")
 
 
@@ -0,0 +1,39 @@
+from typing import Any, List, Mapping, Optional
+
+from fastapi import Response
+from pydantic import TypeAdapter
+
+from app.schemas.family_access import AccessRequestOut, FamilyAccessOut
+from app.schemas.medical_record import MedicalRecordOut
+from app.schemas.user import ConsolidatedProfileOut
+
+
+class ResponseSerializer:
+    """
+    JSON encoder for one response type, with its pydantic-core validator and
+    serializer built once at import. `dump` turns ORM rows or dicts straight
+    into JSON bytes; nothing passes through jsonable_encoder or json.dumps.
+
+    Routes returning `serializer.response(...)` keep their response_model
+    for the OpenAPI schema.
+    """
+
+    def __init__(self, response_type: Any):
+        self.adapter = TypeAdapter(response_type)
+
+    def dump(self, content: Any) -> bytes:
+        return self.adapter.dump_json(self.adapter.validate_python(content, from_attributes=True))
+
+    def response(self, content: Any, status_code: int = 200, headers: Optional[Mapping[str, str]] = None) -> Response:
+        return Response(self.dump(content), status_code=status_code, headers=headers, media_type="application/json")
+
+
+# Hottest responses (see devtools/bench_serialization.py)
+MEDICAL_RECORDS = ResponseSerializer(List[MedicalRecordOut])
+ACCESS_REQUESTS = ResponseSerializer(List[AccessRequestOut])
+FAMILY_ACCESS = ResponseSerializer(List[FamilyAccessOut])
+CONSOLIDATED_PROFILE = ResponseSerializer(ConsolidatedProfileOut)
+
+# Stored for Idempotency-Key replays (app/services/idempotency_service.py)
+MEDICAL_RECORD = ResponseSerializer(MedicalRecordOut)
+ACCESS_REQUEST = ResponseSerializer(AccessRequestOut)
@@ -0,0 +1,47 @@
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent calls that share the same key into ONE in-flight call.
+
+    The first caller for a key starts the work as a background task; every
+    caller that arrives while it is still running awaits that same task and
+    receives the same result (or the same exception). Once the task finishes
+    the key is released, so later calls start a fresh request.
+
+    Each waiter may give up after `timeout` seconds without cancelling the
+    shared call, so one impatient client never aborts the work for the others.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def inflight_count(self) -> int:
+        return len(self._inflight)
+
+    async def do(
+        self,
+        key: Hashable,
+        fn: Callable[[], Awaitable[Any]],
+        timeout: Optional[float] = None,
+    ) -> Any:
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._release(key, t))
+
+        # shield() keeps a timed-out or cancelled waiter from cancelling
+        # the shared task that other callers are still waiting on.
+        if timeout is None:
+            return await asyncio.shield(task)
+        return await asyncio.wait_for(asyncio.shield(task), timeout)
+
+    def _release(self, key: Hashable, task: asyncio.Task):
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        # Mark the exception as retrieved even if every waiter timed out.
+        if not task.cancelled():
+            task.exception()
@@ -1,17 +1,21 @@
 from sqlalchemy import create_engine
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 
 from app.core.config import settings
+from app.core.db_pool import engine_options
+from app.core.query_stats import install_query_hooks
 
 # PostgreSQL connection URL
 SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL
 
+# Pool sizing, liveness and pgbouncer mode come from Settings (see app/core/db_pool.py)
 engine = create_engine(
     SQLALCHEMY_DATABASE_URL,
-    pool_pre_ping=True,
-    pool_size=20,
-    max_overflow=10
+    **engine_options()
 )
+install_query_hooks(engine)
 
 SessionLocal = sessionmaker(
     autocommit=False,
@@ -27,3 +31,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+# --- Async engine ---
+# Sync routes are limited by FastAPI's threadpool (40 threads); async routes
+# on this engine only wait on the connection pool itself.
+
+def to_async_database_url(url: str) -> str:
+    """
+    Same database, async driver: postgresql[+psycopg2]:// -> postgresql+asyncpg://
+    """
+    parsed = make_url(url)
+    if parsed.get_backend_name() != "postgresql":
+        return url
+    # asyncpg takes `ssl` instead of libpq's `sslmode`
+    query = dict(parsed.query)
+    if "sslmode" in query:
+        query["ssl"] = query.pop("sslmode")
+    return parsed.set(drivername="postgresql+asyncpg", query=query).render_as_string(hide_password=False)
+
+async_engine = create_async_engine(
+    to_async_database_url(SQLALCHEMY_DATABASE_URL),
+    **engine_options(is_async=True)
+)
+install_query_hooks(async_engine.sync_engine)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False
+)
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,17 +1,69 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.core.compression import CompressionMiddleware
 from app.core.config import settings
+from app.core.logging import RequestIdMiddleware, setup_logging
+from app.core.metrics import MetricsMiddleware
+from app.core.profiling import ProfilingMiddleware
+from app.core.query_stats import QueryStatsMiddleware
 from fastapi.middleware.cors import CORSMiddleware
-from app.api import general, auth, users, medical_records, hospitals, medical
+from app.api import general, auth, users, medical_records, hospitals, medical, emergency
 from app.api import family_access as family_access_api
 
 # Note: Use Alembic migrations for production schema management
 # from app.database import engine, Base
 # Base.metadata.create_all(bind=engine)
 
+# JSON logs written from a background thread (see app/core/logging.py)
+setup_logging()
+
+logger = logging.getLogger(__name__)
+
+
+def _warm_up():
+    # Import-heavy singletons are built here, after the worker is up, instead
+    # of at import time; /readyz stays 503 until the model is loaded.
+    from app.ML.ml_model import get_ml_model
+    from app.services.storage_service import get_supabase_client
+    try:
+        get_supabase_client()
+        get_ml_model()
+    except Exception:
+        logger.exception("Startup warm-up failed")
+
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    from app.services.idempotency_service import purge_expired_keys_periodically
+    warm_up = asyncio.create_task(asyncio.to_thread(_warm_up))
+    purge = asyncio.create_task(purge_expired_keys_periodically())
+    yield
+    purge.cancel()
+    await asyncio.gather(warm_up, purge, return_exceptions=True)
+
+    from app.database import async_engine, engine
+    from app.ML.ml_model import unload_ml_model
+    from app.services.lab_report_service import shutdown_lab_report_pool
+    from app.services.storage_service import close_supabase_client
+    await asyncio.to_thread(shutdown_lab_report_pool)
+    close_supabase_client()
+    unload_ml_model()
+    await async_engine.dispose()
+    engine.dispose()
+
+
+# No default_response_class on purpose: with the default, routes that declare
+# a response_model are serialized to JSON bytes by pydantic-core in one pass,
+# which ORJSONResponse would replace with a Python dict round trip (slower,
+# and deprecated). Hot list/profile routes go further and return precompiled
+# serializers from app/core/serialization.py.
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    debug=settings.DEBUG
+    debug=settings.DEBUG,
+    lifespan=lifespan
 )
 
 app.add_middleware(
@@ -22,6 +74,19 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# brotli/gzip for JSON and text bodies; inside the metrics/profiling layers
+# so its CPU shows up in request latency and profiles
+if settings.COMPRESSION_ENABLED:
+    app.add_middleware(CompressionMiddleware)
+# Query count and DB time per request (Server-Timing header + log line)
+app.add_middleware(QueryStatsMiddleware)
+# Sampled / on-demand (signed X-Profile-Token) flamegraph profiles per route
+app.add_middleware(ProfilingMiddleware)
+# Latency per route template, in-flight requests, status counts (GET /metrics)
+app.add_middleware(MetricsMiddleware)
+# Outermost, so every log line of the request carries its X-Request-ID
+app.add_middleware(RequestIdMiddleware)
+
 # Include routers
 app.include_router(general.router)
 app.include_router(auth.router)
@@ -30,3 +95,4 @@ app.include_router(medical_records.router)
 app.include_router(medical.router)         
 app.include_router(family_access_api.router)
 app.include_router(hospitals.router)
+app.include_router(emergency.router)
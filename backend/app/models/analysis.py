@@ -0,0 +1,48 @@
+import uuid
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, Float, Index
+from sqlalchemy.dialects.postgresql import UUID, JSONB
+from sqlalchemy.sql import func
+from app.database import Base
+
+class AnalysisRun(Base):
+    __tablename__ = "analysis_runs"
+
+    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id", ondelete="CASCADE"), nullable=False)
+
+    inputs = Column(JSONB, nullable=False)
+    overall_health_risk = Column(String, nullable=True)
+    ml_risk_score = Column(Integer, nullable=True)
+    result = Column(JSONB, nullable=False)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+
+    __table_args__ = (
+        Index("ix_analysis_runs_user_id_created_at", "user_id", "created_at"),
+    )
+
+class ParameterTrend(Base):
+    """
+    Running statistics of one parameter (e.g. bp_systolic) for one user,
+    updated by every analysis run so trends never rescan analysis_runs.
+
+    The slope is a least-squares fit kept as running sums over
+    t = days since first_at.
+    """
+    __tablename__ = "parameter_trends"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id", ondelete="CASCADE"), primary_key=True)
+    parameter = Column(String, primary_key=True)
+
+    count = Column(Integer, default=0, nullable=False)
+    first_at = Column(DateTime(timezone=True), nullable=True)
+    last_at = Column(DateTime(timezone=True), nullable=True)
+    last_value = Column(Float, nullable=True)
+    min_value = Column(Float, nullable=True)
+    max_value = Column(Float, nullable=True)
+    rolling_mean = Column(Float, nullable=True)
+
+    sum_t = Column(Float, default=0.0, nullable=False)
+    sum_y = Column(Float, default=0.0, nullable=False)
+    sum_tt = Column(Float, default=0.0, nullable=False)
+    sum_ty = Column(Float, default=0.0, nullable=False)
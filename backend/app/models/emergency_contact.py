@@ -9,7 +9,7 @@ class EmergencyContact(Base):
     __tablename__ = "emergency_contacts"
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
-    user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=False)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=False, index=True)
     
     name = Column(Text, nullable=False)
     relation = Column(String, nullable=True)
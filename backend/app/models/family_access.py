@@ -1,5 +1,5 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Boolean, UniqueConstraint
+from sqlalchemy import BigInteger, Column, String, DateTime, ForeignKey, Boolean, Integer, UniqueConstraint, Index
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
@@ -20,6 +20,7 @@ class FamilyAccessRequest(Base):
     __table_args__ = (
         UniqueConstraint('requester_user_id', 'owner_user_id', 'status', 
                         name='unique_pending_request'),
+        Index('ix_family_access_requests_owner_status', 'owner_user_id', 'status'),
     )
 
 class FamilyMedicalAccess(Base):
@@ -27,7 +28,7 @@ class FamilyMedicalAccess(Base):
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     owner_user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=False)
-    viewer_user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=False)
+    viewer_user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=False, index=True)
     
     can_view_medical_records = Column(Boolean, default=True, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
@@ -48,3 +49,15 @@ class FamilyInviteToken(Base):
     is_used = Column(Boolean, default=False, nullable=False)
     used_by_user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id"), nullable=True)
     used_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index('ix_family_invite_tokens_owner_active', 'owner_user_id', 'is_used', 'expires_at'),
+    )
+
+class AccessControlVersion(Base):
+    # Single row bumped in the same transaction as every change to
+    # family_medical_access; workers poll it to drop cached viewer sets.
+    __tablename__ = "access_control_version"
+
+    id = Column(Integer, primary_key=True, default=1)
+    version = Column(BigInteger, default=0, nullable=False)
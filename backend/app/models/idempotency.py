@@ -0,0 +1,27 @@
+from sqlalchemy import Column, String, DateTime, ForeignKey, Integer, LargeBinary, Index
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+from app.database import Base
+
+class IdempotencyKey(Base):
+    """
+    First response to a mutating request sent with an Idempotency-Key,
+    replayed for retries with the same key. status_code is NULL while the
+    first request is still running.
+    """
+    __tablename__ = "idempotency_keys"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("auth_users.id", ondelete="CASCADE"), primary_key=True)
+    key = Column(String(255), primary_key=True)
+
+    # "POST /records": a key cannot be reused for another endpoint
+    fingerprint = Column(String, nullable=False)
+    status_code = Column(Integer, nullable=True)
+    response_body = Column(LargeBinary, nullable=True)
+
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    completed_at = Column(DateTime(timezone=True), nullable=True)
+
+    __table_args__ = (
+        Index("ix_idempotency_keys_created_at", "created_at"),
+    )
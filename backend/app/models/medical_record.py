@@ -1,10 +1,17 @@
 import uuid
-from sqlalchemy import Column, String, DateTime, ForeignKey, Text, Enum
-from sqlalchemy.dialects.postgresql import UUID
-from sqlalchemy.orm import relationship
+from sqlalchemy import Column, Computed, String, DateTime, ForeignKey, Text, Enum, Index
+from sqlalchemy.dialects.postgresql import TSVECTOR, UUID
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
 from app.database import Base
 
+# Title weighs most, then the record type, then the extracted insight text
+SEARCH_VECTOR_EXPRESSION = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', replace(record_type, '_', ' ')), 'B') || "
+    "setweight(to_tsvector('english', coalesce(ai_insight, '')), 'C')"
+)
+
 class MedicalRecord(Base):
     __tablename__ = "medical_records"
 
@@ -17,6 +24,16 @@ class MedicalRecord(Base):
     ai_insight = Column(Text, nullable=True)
     
     created_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set when ai_insight (or anything else) changes; feeds the /records ETag
+    updated_at = Column(DateTime(timezone=True), onupdate=func.now(), server_default=func.now())
+
+    # Maintained by Postgres; deferred so record listings do not load it
+    search_vector = deferred(Column(TSVECTOR, Computed(SEARCH_VECTOR_EXPRESSION, persisted=True)))
     
     # Relationship
     auth_user = relationship("AuthUser", back_populates="medical_records")
+
+    __table_args__ = (
+        Index("ix_medical_records_user_id_created_at", "user_id", "created_at"),
+        Index("ix_medical_records_search_vector", "search_vector", postgresql_using="gin"),
+    )
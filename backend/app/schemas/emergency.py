@@ -0,0 +1,23 @@
+from pydantic import BaseModel
+from uuid import UUID
+from datetime import date, datetime
+from typing import Optional, List
+
+from app.schemas.hospital import HospitalDetail
+
+class EmergencyContactBrief(BaseModel):
+    name: str
+    relation: Optional[str] = None
+    phone: Optional[str] = None  # "+91 9876543210"
+
+class EmergencyBundleOut(BaseModel):
+    user_id: UUID
+    name: str
+    blood_group: Optional[str] = None
+    date_of_birth: Optional[date] = None
+    allergies: List[str] = []
+    emergency_contacts: List[EmergencyContactBrief]
+    hospitals: List[HospitalDetail]
+    hospitals_stale: bool = False  # served from cache because discovery failed
+    cached: bool = False           # whole bundle served from the per-user cache
+    generated_at: datetime
@@ -1,6 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
-from typing import Optional
+from typing import List, Optional
+from datetime import datetime
 
 class MedicalInput(BaseModel):
     user_id: UUID
@@ -15,3 +16,32 @@ class MedicalInput(BaseModel):
     creatinine: float
     blood_sugar: float
     cholesterol: float
+
+class ParameterAnalysisOut(BaseModel):
+    parameter: str
+    value: float
+    unit: str
+    range: str
+    deviation: str
+    severity: str
+    explanation: str
+    factors: List[str]
+
+class AnalysisResultOut(BaseModel):
+    overall_health_risk: str
+    ml_risk_score: int
+    flagged_parameters: List[ParameterAnalysisOut]
+    all_analysis: List[ParameterAnalysisOut]
+    summary: str
+
+class ParameterTrendOut(BaseModel):
+    parameter: str
+    label: str
+    unit: str
+    count: int
+    last_value: Optional[float] = None
+    last_at: Optional[datetime] = None
+    rolling_mean: Optional[float] = None
+    min_value: Optional[float] = None
+    max_value: Optional[float] = None
+    slope_per_day: Optional[float] = None
@@ -1,7 +1,7 @@
 from pydantic import BaseModel
 from uuid import UUID
 from datetime import datetime
-from typing import Optional, List
+from typing import Dict, Optional, List
 
 class MedicalRecordBase(BaseModel):
     title: str
@@ -19,3 +19,9 @@ class MedicalRecordOut(MedicalRecordBase):
 
     class Config:
         from_attributes = True
+
+class RecordSearchOut(BaseModel):
+    total: int
+    items: List[MedicalRecordOut]
+    # record_type -> matching records, ignoring the record_type filter
+    facets: Dict[str, int]
@@ -0,0 +1,164 @@
+import logging
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+from uuid import UUID
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.analysis import AnalysisRun, ParameterTrend
+from app.services import family_access_service
+from app.utils.age import calculate_age
+
+logger = logging.getLogger(__name__)
+
+# MedicalInput field -> (label, unit), as reported by the engine
+TREND_PARAMETERS = {
+    "bp_systolic": ("Systolic BP", "mmHg"),
+    "bp_diastolic": ("Diastolic BP", "mmHg"),
+    "spo2": ("SpO2", "%"),
+    "hemoglobin": ("Hemoglobin", "g/dL"),
+    "creatinine": ("Creatinine", "mg/dL"),
+    "blood_sugar": ("Blood Sugar (Fasting)", "mg/dL"),
+    "cholesterol": ("Cholesterol", "mg/dL"),
+}
+
+# Weight of the newest reading in the rolling (exponentially weighted) mean
+ROLLING_MEAN_ALPHA = 0.3
+
+SECONDS_PER_DAY = 86400.0
+
+
+def build_patient_data(profile, age=None, gender=None, height=None, weight=None, **readings) -> Dict[str, Any]:
+    """
+    Engine input from explicit values, falling back to the user's profile
+    and then to defaults (30, Male, 170, 70) so the engine always runs.
+    `readings` are the TREND_PARAMETERS values, None when unknown.
+    """
+    name = "Guest"
+    if profile:
+        name = profile.name
+        if age is None and profile.date_of_birth:
+            age = calculate_age(profile.date_of_birth)
+        if gender is None:
+            gender = profile.gender
+        if height is None and profile.height:
+            height = float(profile.height)
+        if weight is None and profile.weight:
+            weight = float(profile.weight)
+
+    patient_data = {
+        "name": name,
+        "age": age or 30,
+        "gender": gender or "Male",
+        "height": height or 170,
+        "weight": weight or 70,
+    }
+    for parameter in TREND_PARAMETERS:
+        patient_data[parameter] = readings.get(parameter)
+    return patient_data
+
+
+def _update_trend(trend: ParameterTrend, value: float, at: datetime):
+    if trend.count == 0:
+        trend.first_at = at
+        trend.min_value = trend.max_value = trend.rolling_mean = value
+    else:
+        trend.min_value = min(trend.min_value, value)
+        trend.max_value = max(trend.max_value, value)
+        trend.rolling_mean += ROLLING_MEAN_ALPHA * (value - trend.rolling_mean)
+
+    t = (at - trend.first_at).total_seconds() / SECONDS_PER_DAY
+    trend.count += 1
+    trend.last_value = value
+    trend.last_at = at
+    trend.sum_t += t
+    trend.sum_y += value
+    trend.sum_tt += t * t
+    trend.sum_ty += t * value
+
+
+def _slope_per_day(trend: ParameterTrend) -> Optional[float]:
+    n = trend.count
+    denominator = n * trend.sum_tt - trend.sum_t ** 2
+    # Fewer than two readings, or all on the same instant: no trend yet
+    if n < 2 or abs(denominator) < 1e-12:
+        return None
+    return (n * trend.sum_ty - trend.sum_t * trend.sum_y) / denominator
+
+
+def record_analysis_run(db: Session, user_id: UUID, inputs: Dict[str, Any], result: Dict[str, Any]) -> AnalysisRun:
+    """
+    Stores one /medical/analyze run and folds its readings into the user's
+    parameter_trends rows (locked, so concurrent runs do not lose updates).
+    """
+    now = datetime.now(timezone.utc)
+    readings = {
+        name: float(inputs[name])
+        for name in TREND_PARAMETERS
+        if inputs.get(name) is not None and inputs[name] > 0
+    }
+
+    run = AnalysisRun(
+        user_id=user_id,
+        inputs={key: value for key, value in inputs.items() if key != "name"},
+        overall_health_risk=result.get("overall_health_risk"),
+        ml_risk_score=result.get("ml_risk_score"),
+        result=result,
+        created_at=now,
+    )
+    db.add(run)
+
+    if readings:
+        db.execute(
+            insert(ParameterTrend)
+            .values([
+                {"user_id": user_id, "parameter": name, "count": 0,
+                 "sum_t": 0.0, "sum_y": 0.0, "sum_tt": 0.0, "sum_ty": 0.0}
+                for name in readings
+            ])
+            .on_conflict_do_nothing(index_elements=["user_id", "parameter"])
+        )
+        trends = db.execute(
+            select(ParameterTrend)
+            .where(ParameterTrend.user_id == user_id, ParameterTrend.parameter.in_(readings))
+            .with_for_update()
+        ).scalars()
+        for trend in trends:
+            _update_trend(trend, readings[trend.parameter], now)
+
+    db.commit()
+    return run
+
+
+def _trend_out(trend: ParameterTrend) -> Dict[str, Any]:
+    label, unit = TREND_PARAMETERS.get(trend.parameter, (trend.parameter, ""))
+    return {
+        "parameter": trend.parameter,
+        "label": label,
+        "unit": unit,
+        "count": trend.count,
+        "last_value": trend.last_value,
+        "last_at": trend.last_at,
+        "rolling_mean": trend.rolling_mean,
+        "min_value": trend.min_value,
+        "max_value": trend.max_value,
+        "slope_per_day": _slope_per_day(trend),
+    }
+
+
+async def get_trends_async(db: AsyncSession, requester_id: UUID, owner_id: Optional[UUID] = None) -> List[Dict[str, Any]]:
+    target_id = owner_id if owner_id else requester_id
+
+    # Family members with access may view a relative's trends
+    if target_id != requester_id:
+        await family_access_service.enforce_medical_record_access_async(db, requester_id, target_id)
+
+    result = await db.execute(
+        select(ParameterTrend)
+        .where(ParameterTrend.user_id == target_id, ParameterTrend.count > 0)
+        .order_by(ParameterTrend.parameter)
+    )
+    return [_trend_out(trend) for trend in result.scalars()]
@@ -1,3 +1,4 @@
+import logging
 import random
 import string
 from datetime import datetime, timedelta, timezone
@@ -8,14 +9,16 @@ from app.schemas.auth import UserSignup, VerifyEmail, UserLogin
 from app.core import security
 from app.services import email_service
 
+logger = logging.getLogger(__name__)
+
 def create_user(db: Session, user_data: UserSignup):
     # Normalize email
     email = user_data.email.strip().lower()
-    print(f"[DEBUG] Starting signup for email: {email}")
+    logger.debug("Starting signup")
     # 1. Check if email exists
     existing_user = db.query(AuthUser).filter(AuthUser.email == email).first()
     if existing_user:
-        print(f"[WARNING] Signup failed: Email {user_data.email} already registered")
+        logger.warning("Signup failed: email already registered")
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already registered"
@@ -42,7 +45,7 @@ def create_user(db: Session, user_data: UserSignup):
     db.add(new_user)
     db.commit()
     db.refresh(new_user)
-    print(f"[DEBUG] User created in DB with ID: {new_user.id}")
+    logger.info("User created", extra={"user_id": str(new_user.id)})
     
     # 5. Send Email (Disabled)
     # try:
@@ -93,23 +96,23 @@ def create_user(db: Session, user_data: UserSignup):
 def authenticate_user(db: Session, data: UserLogin):
     # Normalize email
     email = data.email.strip().lower()
-    print(f"[DEBUG] Attempting login for email: {email}")
+    logger.debug("Attempting login")
     
     user = db.query(AuthUser).filter(AuthUser.email == email).first()
     
     # 1. Check user exists
     if not user:
-        print(f"[WARNING] Login failed: User {email} not found")
+        logger.warning("Login failed: user not found")
         raise HTTPException(status_code=401, detail="Invalid credentials")
     
     # 2. Check auth provider
     if user.auth_provider != "email":
-        print(f"[WARNING] Login failed: User {email} registered with {user.auth_provider}")
+        logger.warning("Login failed: user registered with %s", user.auth_provider, extra={"user_id": str(user.id)})
         raise HTTPException(status_code=400, detail=f"Please login with {user.auth_provider}")
         
     # 3. Check password
     if not user.password_hash or not security.verify_password(data.password, user.password_hash):
-        print(f"[WARNING] Login failed: Password mismatch for {email}")
+        logger.warning("Login failed: password mismatch", extra={"user_id": str(user.id)})
         raise HTTPException(status_code=401, detail="Invalid credentials")
         
     # 4. Check verification (Disabled)
@@ -161,14 +164,14 @@ def delete_user_account(db: Session, user_id):
     if not user:
         raise HTTPException(status_code=404, detail="User not found")
     
-    from app.services import storage_service
+    from app.services import family_access_service, storage_service
     from app.models.family_access import FamilyInviteToken, FamilyAccessRequest, FamilyMedicalAccess
     
     # 1. Cleanup physical storage
     try:
         storage_service.delete_user_storage(user.id)
     except Exception as e:
-        print(f"Storage cleanup warning: {e}")
+        logger.warning("Storage cleanup failed during account deletion: %s", e)
     
     # 2. Cleanup all family-related records (Foreign Key constraints)
     try:
@@ -189,6 +192,7 @@ def delete_user_account(db: Session, user_id):
             (FamilyMedicalAccess.owner_user_id == user_id) | 
             (FamilyMedicalAccess.viewer_user_id == user_id)
         ).delete(synchronize_session=False)
+        family_access_service.bump_access_version(db)
         
         db.flush() # Ensure FK deletions are processed before user deletion
     except Exception as e:
@@ -202,5 +206,7 @@ def delete_user_account(db: Session, user_id):
     except Exception as e:
         db.rollback()
         raise HTTPException(status_code=500, detail=f"Final deletion failed: {str(e)}")
+    # The user may have been a viewer of any number of owners
+    family_access_service.invalidate_access_cache()
         
     return {"message": "Account deleted successfully"}
@@ -1,8 +1,16 @@
 from .clinical_rules import ClinicalKnowledgeBase
 from .schemas import EvaluationResult, SeverityColor
-from app.ML.ml_model import ml_model_instance
+from app.ML.ml_model import get_ml_model
+from app.core import metrics
 from typing import Dict, Any, List
 
+ML_PREDICT_DURATION = metrics.histogram(
+    "ml_prediction_duration_seconds",
+    "Time spent in the ML risk model's predict call",
+    buckets=(0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0),
+)
+ML_PREDICT_ERRORS = metrics.counter("ml_prediction_errors_total", "ML risk predictions that raised")
+
 class ChikitsaEngine:
     def __init__(self):
         self.kb = ClinicalKnowledgeBase()
@@ -156,10 +164,14 @@ def run_chikitsa_engine(data: Dict[str, Any]):
             "Blood Sugar (Fasting)": data.get("blood_sugar"),
             "Cholesterol": data.get("cholesterol")
         }
-        ml_risk = ml_model_instance.predict(patient, ml_input)
+        # Missing readings (e.g. not found in a lab report) fall back to the model's defaults
+        ml_input = {k: v for k, v in ml_input.items() if v is not None and v > 0}
+        with ML_PREDICT_DURATION.time():
+            ml_risk = get_ml_model().predict(patient, ml_input)
         risk_map = {0: "Low Risk", 1: "Moderate Risk", 2: "High Risk", 3: "Critical Risk"}
         risk_label = risk_map.get(ml_risk, "Unknown")
     except Exception:
+        ML_PREDICT_ERRORS.inc()
         ml_risk = -1
         risk_label = "Error"
 
@@ -0,0 +1,216 @@
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import List, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.database import AsyncSessionLocal, SessionLocal
+from app.services import hospital_service, user_service
+
+logger = logging.getLogger(__name__)
+
+# The last bundle per user is kept in memory so a repeat request (e.g. the
+# app reopening during an emergency) is answered from one cheap fingerprint
+# query instead of the full DB and upstream round trip. The fingerprint
+# catches profile/contact edits made through other workers; invalidate_bundle
+# only covers this one.
+BUNDLE_CACHE_TTL_SECONDS = 300
+BUNDLE_CACHE_MAX_ENTRIES = 1024
+BUNDLE_HOSPITAL_LIMIT = 5
+LOCATION_KEY_PRECISION = 3  # ~110 m
+
+# Never equal to a real fingerprint (tuple or None)
+_INVALIDATED = object()
+
+_bundle_cache: "OrderedDict[UUID, dict]" = OrderedDict()
+
+
+def _remember(user_id: UUID, entry: dict):
+    _bundle_cache[user_id] = entry
+    _bundle_cache.move_to_end(user_id)
+    while len(_bundle_cache) > BUNDLE_CACHE_MAX_ENTRIES:
+        _bundle_cache.popitem(last=False)
+
+
+def _cached_entry(user_id: UUID) -> Optional[dict]:
+    cached = _bundle_cache.get(user_id)
+    if cached is None:
+        return None
+    # Past the TTL an entry only serves as the last known hospitals, for as
+    # long as hospital_service serves stale areas
+    if time.monotonic() - cached["created_at"] > hospital_service.STALE_MAX_AGE_SECONDS:
+        del _bundle_cache[user_id]
+        return None
+    _bundle_cache.move_to_end(user_id)
+    return cached
+
+
+def invalidate_bundle(user_id: UUID):
+    """
+    Drop the cached bundle after the profile or emergency contacts change.
+    Only the last known hospitals are kept, as a fallback for the rebuild.
+    """
+    cached = _bundle_cache.get(user_id)
+    if cached:
+        _bundle_cache[user_id] = {
+            **cached,
+            "bundle": {"hospitals": cached["bundle"]["hospitals"]},
+            "fingerprint": _INVALIDATED,
+        }
+
+
+async def _profile_fingerprint(user_id: UUID):
+    async with AsyncSessionLocal() as db:
+        return await user_service.get_profile_fingerprint_async(db, user_id)
+
+
+def _location_key(lat: Optional[float], lng: Optional[float], location: Optional[str]):
+    if lat is not None and lng is not None:
+        return (round(lat, LOCATION_KEY_PRECISION), round(lng, LOCATION_KEY_PRECISION))
+    if location:
+        return " ".join(location.lower().split())
+    return None
+
+
+def _format_phone(country_code: Optional[str], number) -> Optional[str]:
+    if number is None:
+        return None
+    return f"{country_code} {int(number)}" if country_code else str(int(number))
+
+
+# Each DB fetch uses its own session so they can run in parallel threads.
+
+def _load_profile(user_id: UUID) -> Optional[dict]:
+    db = SessionLocal()
+    try:
+        profile = user_service.get_user_profile(db, user_id)
+        if not profile:
+            return None
+        return {
+            "name": profile.name,
+            "blood_group": profile.blood_group,
+            "date_of_birth": profile.date_of_birth,
+            "allergies": list(profile.allergies or []),
+        }
+    finally:
+        db.close()
+
+
+def _load_contacts(user_id: UUID) -> List[dict]:
+    db = SessionLocal()
+    try:
+        return [
+            {
+                "name": c.name,
+                "relation": c.relation,
+                "phone": _format_phone(c.phone_country_code, c.phone_number),
+            }
+            for c in user_service.get_emergency_contacts(db, user_id)
+        ]
+    finally:
+        db.close()
+
+
+async def _find_hospitals(
+    lat: Optional[float], lng: Optional[float], location: Optional[str]
+) -> Tuple[List[dict], bool]:
+    if lat is None or lng is None:
+        lat, lng = await hospital_service.geocode_location(location)
+    result = await hospital_service.search_hospitals_adaptive(lat, lng, limit=BUNDLE_HOSPITAL_LIMIT)
+    return result["hospitals"], result["stale"]
+
+
+async def get_emergency_bundle(
+    user_id: UUID,
+    fallback_name: str,
+    lat: Optional[float] = None,
+    lng: Optional[float] = None,
+    location: Optional[str] = None,
+    refresh: bool = False
+) -> dict:
+    """
+    Profile essentials, emergency contacts and nearest hospitals in one payload.
+    The three lookups run concurrently; a hospital discovery failure never
+    fails the bundle (contacts matter more), it falls back to the last
+    known hospitals instead.
+    """
+    location_key = _location_key(lat, lng, location)
+    cached = _cached_entry(user_id)
+    # Read before the profile and contacts, so an edit racing the rebuild
+    # leaves an older fingerprint behind and the next request rebuilds again
+    fingerprint_task = asyncio.ensure_future(_profile_fingerprint(user_id))
+    if (
+        cached and not refresh
+        and time.monotonic() - cached["created_at"] < BUNDLE_CACHE_TTL_SECONDS
+        and cached["fallback_name"] == fallback_name
+        and location_key in (None, cached["location_key"])
+        and cached["fingerprint"] == await fingerprint_task
+    ):
+        return {**cached["bundle"], "cached": True}
+
+    # Discovery overlaps the fingerprint query when it was not needed above
+    hospitals_task = (
+        asyncio.ensure_future(_find_hospitals(lat, lng, location)) if location_key is not None else None
+    )
+    try:
+        fingerprint = await fingerprint_task
+    except BaseException:
+        if hospitals_task is not None:
+            hospitals_task.cancel()
+        raise
+    profile, contacts, hospitals_result = await asyncio.gather(
+        run_in_threadpool(_load_profile, user_id),
+        run_in_threadpool(_load_contacts, user_id),
+        hospitals_task if hospitals_task is not None else asyncio.sleep(0, result=None),
+        return_exceptions=True
+    )
+    # DB failures are real errors; only hospital discovery is best-effort.
+    for result in (profile, contacts):
+        if isinstance(result, BaseException):
+            raise result
+
+    discovery_failed = False
+    if isinstance(hospitals_result, BaseException):
+        if not isinstance(hospitals_result, HTTPException):
+            raise hospitals_result
+        logger.warning("Emergency bundle: hospital discovery failed (%s)", hospitals_result.detail)
+        hospitals = cached["bundle"]["hospitals"] if cached else []
+        hospitals_stale = True
+        discovery_failed = True
+    elif hospitals_result is None:
+        # No location given: keep the last known hospitals, if any.
+        hospitals = cached["bundle"]["hospitals"] if cached else []
+        hospitals_stale = bool(cached)
+        location_key = cached["location_key"] if cached else None
+    else:
+        hospitals, hospitals_stale = hospitals_result
+
+    profile = profile or {"name": fallback_name, "blood_group": None, "date_of_birth": None, "allergies": []}
+    bundle = {
+        "user_id": user_id,
+        **profile,
+        "emergency_contacts": contacts,
+        "hospitals": hospitals,
+        "hospitals_stale": hospitals_stale,
+        "cached": False,
+        "generated_at": datetime.now(timezone.utc),
+    }
+    if discovery_failed:
+        # The fallback hospitals belong to the previous location and age, so
+        # the next request (with a location) tries discovery again
+        if cached:
+            _remember(user_id, {**cached, "bundle": bundle, "fingerprint": fingerprint, "fallback_name": fallback_name})
+        return bundle
+    _remember(user_id, {
+        "bundle": bundle,
+        "location_key": location_key,
+        "fingerprint": fingerprint,
+        "fallback_name": fallback_name,
+        "created_at": time.monotonic(),
+    })
+    return bundle
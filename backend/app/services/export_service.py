@@ -0,0 +1,203 @@
+import asyncio
+import json
+import logging
+import os
+import re
+import zipfile
+from datetime import datetime, timezone
+from typing import AsyncIterator, Dict, List, Optional
+from uuid import UUID
+
+import httpx
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core import metrics
+from app.core.config import settings
+from app.models.medical_record import MedicalRecord
+from app.services import storage_service, user_service
+
+logger = logging.getLogger(__name__)
+
+EXPORT_BYTES = metrics.counter("records_export_bytes_total", "Bytes of record archives streamed to clients")
+EXPORT_FETCH_ERRORS = metrics.counter(
+    "records_export_fetch_errors_total", "Record files that could not be fetched from storage during an export"
+)
+
+CHUNK_SIZE = 64 * 1024
+# Chunks buffered per object ahead of the archive writer. With
+# EXPORT_FETCH_CONCURRENCY objects in flight this bounds memory per export
+# to concurrency * PREFETCH_CHUNKS * CHUNK_SIZE (4 MiB by default).
+PREFETCH_CHUNKS = 16
+FETCH_TIMEOUT = httpx.Timeout(30.0, connect=10.0)
+
+_DONE = object()
+
+
+class _Sink:
+    """
+    Write-only, unseekable file object for ZipFile: collects what it
+    writes until the response generator drains it. ZipFile notices that
+    it cannot seek and writes data descriptors after each entry instead of
+    patching local headers, so nothing is ever held back.
+    """
+
+    def __init__(self):
+        self._parts: List[bytes] = []
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def drain(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+class _ObjectFetch:
+    """
+    One record file streamed from storage into a bounded queue of chunks.
+    """
+
+    def __init__(self, record: MedicalRecord):
+        self.record = record
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=PREFETCH_CHUNKS)
+        self.error: Optional[str] = None
+        self.size = 0
+
+    async def run(self, client: httpx.AsyncClient, slots: asyncio.Semaphore):
+        try:
+            async with slots:
+                url = await asyncio.to_thread(storage_service.get_signed_url, self.record.file_path, 600)
+                async with client.stream("GET", url) as response:
+                    response.raise_for_status()
+                    async for chunk in response.aiter_bytes(CHUNK_SIZE):
+                        await self.queue.put(chunk)
+        except asyncio.CancelledError:
+            # The export was abandoned; nobody reads the queue any more
+            raise
+        except httpx.HTTPStatusError as e:
+            # The message would include the signed URL and its token
+            self._failed(f"storage returned HTTP {e.response.status_code}")
+        except Exception as e:
+            self._failed(getattr(e, "detail", None) or type(e).__name__)
+        await self.queue.put(_DONE)
+
+    def _failed(self, error: str):
+        self.error = error
+        EXPORT_FETCH_ERRORS.inc()
+        logger.warning("Export could not fetch record file: %s", error, extra={"record_id": str(self.record.id)})
+
+    async def chunks(self) -> AsyncIterator[bytes]:
+        while True:
+            chunk = await self.queue.get()
+            if chunk is _DONE:
+                return
+            yield chunk
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9]+", "-", text).strip("-")[:60] or "record"
+
+
+def _archive_name(record: MedicalRecord) -> str:
+    ext = os.path.splitext(record.file_path)[1].lower()
+    day = record.created_at.strftime("%Y-%m-%d") if record.created_at else "undated"
+    return f"records/{day}_{_slug(record.title)}_{str(record.id)[:8]}{ext}"
+
+
+def _profile_dict(profile) -> Optional[Dict]:
+    if profile is None:
+        return None
+    return {
+        column.name: getattr(profile, column.name)
+        for column in profile.__table__.columns
+        if column.name not in ("id", "user_id")
+    }
+
+
+async def load_export(db: AsyncSession, user_id: UUID):
+    """
+    Everything the archive needs from the database, loaded before the
+    response starts so the stream itself holds no session.
+    """
+    result = await db.execute(
+        select(MedicalRecord).where(MedicalRecord.user_id == user_id).order_by(MedicalRecord.created_at)
+    )
+    records = result.scalars().all()
+    profile = await user_service.get_user_profile_async(db, user_id)
+    return records, _profile_dict(profile)
+
+
+async def stream_export(records: List[MedicalRecord], profile: Optional[Dict]) -> AsyncIterator[bytes]:
+    """
+    ZIP of every record file plus manifest.json, produced while it is sent.
+    Files are fetched EXPORT_FETCH_CONCURRENCY at a time and written in
+    record order; each fetch buffers at most PREFETCH_CHUNKS chunks, so
+    memory stays constant whatever the size of the history.
+    """
+    sink = _Sink()
+    archive = zipfile.ZipFile(sink, "w", allowZip64=True)
+    fetches = [_ObjectFetch(record) for record in records]
+    slots = asyncio.Semaphore(settings.EXPORT_FETCH_CONCURRENCY)
+    sent = 0
+
+    async with httpx.AsyncClient(timeout=FETCH_TIMEOUT, follow_redirects=True) as client:
+        tasks = [asyncio.create_task(fetch.run(client, slots)) for fetch in fetches]
+        try:
+            manifest_records = []
+            for fetch in fetches:
+                record = fetch.record
+                name = _archive_name(record)
+                entry = None
+                async for chunk in fetch.chunks():
+                    if entry is None:
+                        info = zipfile.ZipInfo(name, date_time=(record.created_at or datetime.now(timezone.utc)).timetuple()[:6])
+                        # PDFs and images are already compressed
+                        info.compress_type = zipfile.ZIP_STORED
+                        entry = archive.open(info, "w", force_zip64=True)
+                    entry.write(chunk)
+                    fetch.size += len(chunk)
+                    data = sink.drain()
+                    if data:
+                        sent += len(data)
+                        yield data
+                if entry is not None:
+                    entry.close()
+
+                manifest_records.append({
+                    "id": str(record.id),
+                    "title": record.title,
+                    "record_type": record.record_type,
+                    "created_at": record.created_at.isoformat() if record.created_at else None,
+                    "ai_insight": record.ai_insight,
+                    # Set with an error when the download broke off part-way
+                    "file": name if entry is not None else None,
+                    "size": fetch.size,
+                    "error": fetch.error,
+                })
+
+            manifest = {
+                "exported_at": datetime.now(timezone.utc).isoformat(),
+                "profile": profile,
+                "records": manifest_records,
+            }
+            archive.writestr(
+                "manifest.json",
+                json.dumps(manifest, indent=2, default=str, ensure_ascii=False),
+                compress_type=zipfile.ZIP_DEFLATED,
+            )
+            archive.close()
+            data = sink.drain()
+            sent += len(data)
+            yield data
+        finally:
+            # Client went away or a write failed: stop the remaining fetches
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            EXPORT_BYTES.inc(sent)
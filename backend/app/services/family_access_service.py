@@ -1,12 +1,147 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from sqlalchemy import and_
+from sqlalchemy import and_, func, select, update
 from fastapi import HTTPException, status
+from typing import FrozenSet, Optional, Tuple
 from uuid import UUID
 from datetime import datetime, timezone
 
-from app.models.family_access import FamilyAccessRequest, FamilyMedicalAccess
+from app.core.config import settings
+from app.models.family_access import AccessControlVersion, FamilyAccessRequest, FamilyMedicalAccess
 from app.schemas.family_access import AccessRequestCreate, AccessRequestResponse
 
+logger = logging.getLogger(__name__)
+
+# --- Access check cache ---
+
+ACL_CACHE_MAX_OWNERS = 10000
+
+
+class ViewerSetCache:
+    """
+    owner_id -> frozenset of viewer ids allowed to see the owner's records.
+
+    Entries are dropped explicitly when access changes in this process, by
+    the TTL as a safety net, and whenever the shared access_control_version
+    row (bumped by every grant/revoke, in any worker) is seen to move. That
+    row is read at most once per `version_check_seconds`, so a family member
+    browsing a parent's records costs no access query per request.
+    """
+
+    def __init__(self, ttl_seconds: float, version_check_seconds: float, max_owners: int = ACL_CACHE_MAX_OWNERS):
+        self.ttl_seconds = ttl_seconds
+        self.version_check_seconds = version_check_seconds
+        self.max_owners = max_owners
+        self._lock = threading.Lock()
+        self._entries: "OrderedDict[UUID, Tuple[float, FrozenSet[UUID]]]" = OrderedDict()
+        # Bumped by every invalidation; a load that started before one is
+        # not stored, so a slow reader cannot put back a revoked viewer.
+        self._generation = 0
+        self._version: Optional[int] = None
+        self._version_checked_at = float("-inf")
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def version_check_due(self) -> bool:
+        return time.monotonic() - self._version_checked_at >= self.version_check_seconds
+
+    def observe_version(self, version: Optional[int]):
+        with self._lock:
+            self._version_checked_at = time.monotonic()
+            if version != self._version:
+                if self._version is not None:
+                    self._clear()
+                self._version = version
+
+    def get(self, owner_id: UUID) -> Optional[FrozenSet[UUID]]:
+        with self._lock:
+            entry = self._entries.get(owner_id)
+            if entry is None:
+                return None
+            if time.monotonic() - entry[0] >= self.ttl_seconds:
+                del self._entries[owner_id]
+                return None
+            self._entries.move_to_end(owner_id)
+            return entry[1]
+
+    def put(self, owner_id: UUID, viewers: FrozenSet[UUID], generation: int):
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._entries[owner_id] = (time.monotonic(), viewers)
+            self._entries.move_to_end(owner_id)
+            while len(self._entries) > self.max_owners:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, owner_id: Optional[UUID] = None):
+        """
+        Drop one owner's entry, or everything when `owner_id` is None.
+        """
+        with self._lock:
+            if owner_id is None:
+                self._clear()
+            else:
+                self._generation += 1
+                self._entries.pop(owner_id, None)
+
+    def _clear(self):
+        self._generation += 1
+        self._entries.clear()
+
+
+_viewer_cache = ViewerSetCache(settings.ACL_CACHE_TTL_SECONDS, settings.ACL_VERSION_CHECK_SECONDS)
+
+
+def _viewers_query(owner_id: UUID):
+    return select(FamilyMedicalAccess.viewer_user_id).where(FamilyMedicalAccess.owner_user_id == owner_id)
+
+
+_version_query = select(AccessControlVersion.version).where(AccessControlVersion.id == 1)
+
+
+def bump_access_version(db: Session):
+    """
+    Call in the transaction that changes family_medical_access, before the
+    commit, so other workers drop their cached viewer sets.
+    """
+    db.execute(
+        update(AccessControlVersion)
+        .where(AccessControlVersion.id == 1)
+        .values(version=AccessControlVersion.version + 1)
+    )
+
+
+def invalidate_access_cache(owner_id: Optional[UUID] = None):
+    _viewer_cache.invalidate(owner_id)
+
+
+def _viewers_for_owner(db: Session, owner_id: UUID) -> FrozenSet[UUID]:
+    if _viewer_cache.version_check_due():
+        _viewer_cache.observe_version(db.execute(_version_query).scalar())
+    viewers = _viewer_cache.get(owner_id)
+    if viewers is None:
+        generation = _viewer_cache.generation
+        viewers = frozenset(db.execute(_viewers_query(owner_id)).scalars())
+        _viewer_cache.put(owner_id, viewers, generation)
+    return viewers
+
+
+async def _viewers_for_owner_async(db: AsyncSession, owner_id: UUID) -> FrozenSet[UUID]:
+    if _viewer_cache.version_check_due():
+        _viewer_cache.observe_version((await db.execute(_version_query)).scalar())
+    viewers = _viewer_cache.get(owner_id)
+    if viewers is None:
+        generation = _viewer_cache.generation
+        viewers = frozenset((await db.execute(_viewers_query(owner_id))).scalars())
+        _viewer_cache.put(owner_id, viewers, generation)
+    return viewers
+
 # --- Access Request Management ---
 
 from app.models.user import AuthUser, UserProfile
@@ -72,8 +207,11 @@ def respond_to_access_request(db: Session, request_id: UUID, owner_id: UUID, acc
         if not access:
             access = FamilyMedicalAccess(owner_user_id=owner_id, viewer_user_id=request.requester_user_id)
             db.add(access)
+            bump_access_version(db)
     
     db.commit()
+    if accept:
+        invalidate_access_cache(owner_id)
     db.refresh(request)
     return _map_request(db, request)
 
@@ -95,6 +233,29 @@ def get_active_access_for_viewer(db: Session, viewer_id: UUID):
         a.owner_email = u.email if u else "N/A"
     return access_list
 
+def _access_fingerprint(db: Session, side, other_side, user_id: UUID):
+    # The listings show the other party's profile name and email, so their
+    # edits count too
+    row = db.execute(
+        select(
+            func.count(FamilyMedicalAccess.id),
+            func.max(FamilyMedicalAccess.created_at),
+            func.max(UserProfile.updated_at),
+            func.max(AuthUser.updated_at),
+        )
+        .select_from(FamilyMedicalAccess)
+        .outerjoin(UserProfile, UserProfile.user_id == other_side)
+        .outerjoin(AuthUser, AuthUser.id == other_side)
+        .where(side == user_id)
+    ).one()
+    return tuple(row)
+
+def get_active_access_fingerprint_for_owner(db: Session, owner_id: UUID):
+    return _access_fingerprint(db, FamilyMedicalAccess.owner_user_id, FamilyMedicalAccess.viewer_user_id, owner_id)
+
+def get_active_access_fingerprint_for_viewer(db: Session, viewer_id: UUID):
+    return _access_fingerprint(db, FamilyMedicalAccess.viewer_user_id, FamilyMedicalAccess.owner_user_id, viewer_id)
+
 def revoke_access(db: Session, owner_id: UUID, viewer_id: UUID):
     access = db.query(FamilyMedicalAccess).filter(
         and_(FamilyMedicalAccess.owner_user_id == owner_id, FamilyMedicalAccess.viewer_user_id == viewer_id)
@@ -102,20 +263,27 @@ def revoke_access(db: Session, owner_id: UUID, viewer_id: UUID):
     if not access:
         raise HTTPException(status_code=404, detail="Access not found")
     db.delete(access)
+    bump_access_version(db)
     db.commit()
+    invalidate_access_cache(owner_id)
     return {"message": "Access revoked"}
 
 def check_medical_record_access(db: Session, viewer_id: UUID, owner_id: UUID) -> bool:
     if viewer_id == owner_id: return True
-    access = db.query(FamilyMedicalAccess).filter(
-        and_(FamilyMedicalAccess.owner_user_id == owner_id, FamilyMedicalAccess.viewer_user_id == viewer_id)
-    ).first()
-    return access is not None
+    return viewer_id in _viewers_for_owner(db, owner_id)
 
 def enforce_medical_record_access(db: Session, viewer_id: UUID, owner_id: UUID):
     if not check_medical_record_access(db, viewer_id, owner_id):
         raise HTTPException(status_code=403, detail="Access denied")
 
+async def check_medical_record_access_async(db: AsyncSession, viewer_id: UUID, owner_id: UUID) -> bool:
+    if viewer_id == owner_id: return True
+    return viewer_id in await _viewers_for_owner_async(db, owner_id)
+
+async def enforce_medical_record_access_async(db: AsyncSession, viewer_id: UUID, owner_id: UUID):
+    if not await check_medical_record_access_async(db, viewer_id, owner_id):
+        raise HTTPException(status_code=403, detail="Access denied")
+
 def generate_invite_token(db: Session, owner_id: UUID, expires_in_hours: int = 24):
     import secrets
     from datetime import timedelta
@@ -146,10 +314,10 @@ def validate_and_redeem_invite_token(db: Session, invite_token: str, requester_i
     token_record = db.query(FamilyInviteToken).filter(FamilyInviteToken.invite_token == invite_token).first()
     
     if not token_record:
-        print(f"[WARNING] Redeem failed: Token '{invite_token[:8]}...' not found in DB")
+        logger.warning("Redeem failed: invite token not found")
         raise HTTPException(status_code=400, detail="Invalid QR code or invite token.")
     
-    print(f"[DEBUG] Found token for owner: {token_record.owner_user_id}, used status: {token_record.is_used}")
+    logger.debug("Found invite token", extra={"owner_user_id": str(token_record.owner_user_id), "is_used": token_record.is_used})
         
     if token_record.expires_at < datetime.now(timezone.utc):
         raise HTTPException(status_code=400, detail="This invite has expired.")
@@ -180,12 +348,12 @@ def validate_and_redeem_invite_token(db: Session, invite_token: str, requester_i
     
     try:
         req = send_access_request(db, requester_id, token_record.owner_user_id)
-        print(f"[SUCCESS] Redeemed invite: Request {req.id} created")
+        logger.info("Redeemed invite", extra={"access_request_id": str(req.id)})
         return _map_request(db, req)
     except HTTPException as e:
         if "already" in str(e.detail).lower() or "pending" in str(e.detail).lower():
             # If it's just that they already have it, treat as 200 OK
-            print(f"[INFO] Invite redemption skip: {e.detail}")
+            logger.info("Invite redemption skipped: %s", e.detail)
             return {
                 "id": requester_id, 
                 "requester_user_id": requester_id,
@@ -0,0 +1,101 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, List, Optional
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.db_pool import pool_stats
+from app.core.singleflight import SingleFlight
+from app.database import async_engine
+
+
+class _CheckResult:
+    def __init__(self, ok: bool, detail: Optional[str], duration_ms: float):
+        self.ok = ok
+        self.detail = detail
+        self.duration_ms = duration_ms
+        self.checked_at = time.monotonic()
+
+    def to_dict(self) -> dict:
+        entry = {"status": "ok" if self.ok else "fail", "duration_ms": round(self.duration_ms, 1)}
+        if self.detail:
+            entry["detail"] = self.detail
+        return entry
+
+
+class HealthCheck:
+    """
+    One readiness dependency. Results are cached for `cache_seconds` so
+    frequent probes (and several replicas' load balancers) cost at most one
+    real check per interval; concurrent probes share the same run.
+    """
+
+    def __init__(self, name: str, check: Callable[[], Awaitable[Optional[str]]],
+                 timeout: float, cache_seconds: float):
+        self.name = name
+        self._check = check
+        self.timeout = timeout
+        self.cache_seconds = cache_seconds
+        self._last: Optional[_CheckResult] = None
+        self._flights = SingleFlight()
+
+    async def result(self) -> _CheckResult:
+        last = self._last
+        if last is not None and time.monotonic() - last.checked_at < self.cache_seconds:
+            return last
+        return await self._flights.do(self.name, self._run)
+
+    async def _run(self) -> _CheckResult:
+        start = time.perf_counter()
+        try:
+            detail = await asyncio.wait_for(self._check(), self.timeout)
+            result = _CheckResult(True, detail, (time.perf_counter() - start) * 1000)
+        except asyncio.TimeoutError:
+            result = _CheckResult(False, f"timed out after {self.timeout}s", (time.perf_counter() - start) * 1000)
+        except Exception as e:
+            result = _CheckResult(False, f"{type(e).__name__}: {e}"[:200], (time.perf_counter() - start) * 1000)
+        self._last = result
+        return result
+
+
+async def _check_database() -> Optional[str]:
+    # Goes through the (async) pool, so an exhausted pool fails the check too
+    async with async_engine.connect() as conn:
+        await conn.execute(text("SELECT 1"))
+    utilization = pool_stats().get("async", {}).get("utilization")
+    return f"pool utilization {utilization}" if utilization is not None else None
+
+
+async def _check_model() -> Optional[str]:
+    from app.ML.ml_model import is_ml_model_loaded
+    if not is_ml_model_loaded():
+        raise RuntimeError("ML model is not loaded yet")
+    return None
+
+
+async def _check_storage() -> Optional[str]:
+    from app.services import storage_service
+    # The Supabase client is synchronous; a hung call only ties up one
+    # worker thread because results are cached and single-flighted.
+    await run_in_threadpool(storage_service.ping)
+    return None
+
+
+CHECKS: List[HealthCheck] = [
+    HealthCheck("database", _check_database, settings.HEALTH_CHECK_TIMEOUT_SECONDS, settings.HEALTH_CHECK_CACHE_SECONDS),
+    HealthCheck("ml_model", _check_model, settings.HEALTH_CHECK_TIMEOUT_SECONDS, settings.HEALTH_CHECK_CACHE_SECONDS),
+    HealthCheck("storage", _check_storage, settings.HEALTH_CHECK_TIMEOUT_SECONDS, settings.HEALTH_CHECK_CACHE_SECONDS),
+]
+
+
+async def readiness() -> Dict:
+    """
+    Runs every check concurrently: {"ready": bool, "checks": {name: {...}}}
+    """
+    results = await asyncio.gather(*(check.result() for check in CHECKS))
+    return {
+        "ready": all(result.ok for result in results),
+        "checks": {check.name: result.to_dict() for check, result in zip(CHECKS, results)},
+    }
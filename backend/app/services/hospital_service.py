@@ -1,16 +1,162 @@
+import asyncio
+import base64
+import heapq
+import logging
+import math
+import time
 import httpx
-from typing import List, Optional, Tuple
+from collections import OrderedDict
+from typing import Dict, List, Optional, Tuple
 from fastapi import HTTPException, status
+from app.core.circuit_breaker import CircuitBreaker, CircuitOpenError
+from app.core import metrics
+from app.core.config import settings
 from app.core.geo_utils import calculate_haversine_distance
+from app.core.json_stream import JsonArrayStream
+from app.core.singleflight import SingleFlight
+
+logger = logging.getLogger(__name__)
 
 # External API Constants
-NOMINATIM_URL = "https://nominatim.openstreetmap.org/search"
-OVERPASS_URL = "https://overpass-api.de/api/interpreter"
+NOMINATIM_URL = settings.NOMINATIM_URL
+OVERPASS_URL = settings.OVERPASS_URL
 USER_AGENT = "ChikitsaCloud_HealthApp/1.0 (contact: admin@chikitsacloud.com)"
 
+# Request coalescing: identical lookups that arrive while one is already
+# in flight share its result instead of hitting the upstream again.
+# Waiters give up slightly after the upstream timeouts below.
+COALESCE_WAIT_TIMEOUT = 20.0
+
+_geocode_flights = SingleFlight()
+_hospital_flights = SingleFlight()
+
+
+def _is_upstream_failure(exc: Exception) -> bool:
+    """
+    Client-side outcomes (e.g. 404 unknown place) do not count against an upstream.
+    """
+    if isinstance(exc, HTTPException):
+        return exc.status_code >= 500
+    return True
+
+
+def _is_degraded(exc: Exception) -> bool:
+    return isinstance(exc, CircuitOpenError) or _is_upstream_failure(exc)
+
+
+# Circuit breakers: once an upstream keeps failing, calls fail fast for a
+# while (serving stale data where we have it) instead of each request
+# waiting for the full upstream timeout. After the recovery window a single
+# probe request decides whether to close the circuit again.
+_nominatim_breaker = CircuitBreaker(
+    "nominatim",
+    failure_threshold=settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.UPSTREAM_BREAKER_RECOVERY_SECONDS,
+    is_failure=_is_upstream_failure
+)
+_overpass_breaker = CircuitBreaker(
+    "overpass",
+    failure_threshold=settings.UPSTREAM_BREAKER_FAILURE_THRESHOLD,
+    recovery_timeout=settings.UPSTREAM_BREAKER_RECOVERY_SECONDS,
+    is_failure=_is_upstream_failure
+)
+
+
+def _service_unavailable(exc: CircuitOpenError, detail: str) -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail=detail,
+        headers={"Retry-After": str(max(math.ceil(exc.retry_after), 1))}
+    )
+
+
+def _normalize_location_key(location_text: str) -> str:
+    return " ".join(location_text.lower().split())
+
+
+UPSTREAM_LATENCY = metrics.histogram(
+    "upstream_request_duration_seconds",
+    "Latency of calls to external services (one per coalesced flight)",
+    ("upstream", "outcome"),
+)
+UPSTREAM_REJECTED = metrics.counter(
+    "upstream_circuit_open_total", "Calls rejected because the upstream's circuit was open", ("upstream",)
+)
+
+
+async def _timed_upstream_call(upstream: str, fn):
+    start = time.perf_counter()
+    outcome = "error"
+    try:
+        result = await fn()
+        outcome = "ok"
+        return result
+    finally:
+        UPSTREAM_LATENCY.labels(upstream=upstream, outcome=outcome).observe(time.perf_counter() - start)
+
+
+async def _coalesced(flights: SingleFlight, key, fn, timeout_detail: str, breaker: CircuitBreaker):
+    try:
+        return await flights.do(
+            key,
+            lambda: breaker.call(lambda: _timed_upstream_call(breaker.name, fn)),
+            timeout=COALESCE_WAIT_TIMEOUT
+        )
+    except CircuitOpenError:
+        UPSTREAM_REJECTED.labels(upstream=breaker.name).inc()
+        raise
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail=timeout_detail
+        )
+
+
+# Geocodes of a place name practically never change: serve them from memory
+# for a day, and for up to a week when Nominatim is down.
+GEOCODE_CACHE_TTL_SECONDS = 24 * 3600
+GEOCODE_STALE_MAX_AGE_SECONDS = 7 * 24 * 3600
+GEOCODE_CACHE_MAX_ENTRIES = 1024
+
+_geocode_cache: "OrderedDict[str, Tuple[float, Tuple[float, float]]]" = OrderedDict()
+
+
 async def geocode_location(location_text: str) -> Tuple[float, float]:
     """
     Service: Convert manual text input to coordinates.
+    Concurrent lookups for the same (normalized) text share one upstream call.
+    """
+    key = _normalize_location_key(location_text)
+    cached = _geocode_cache.get(key)
+    age = time.monotonic() - cached[0] if cached else None
+    if cached and age < GEOCODE_CACHE_TTL_SECONDS:
+        return cached[1]
+
+    try:
+        coords = await _coalesced(
+            _geocode_flights,
+            key,
+            lambda: _fetch_geocode(location_text),
+            "Timeout reaching geocoding service",
+            _nominatim_breaker
+        )
+    except (CircuitOpenError, HTTPException) as e:
+        if cached and _is_degraded(e) and age < GEOCODE_STALE_MAX_AGE_SECONDS:
+            logger.warning("Geocoding degraded, serving cached result")
+            return cached[1]
+        if isinstance(e, CircuitOpenError):
+            raise _service_unavailable(e, "Geocoding service temporarily unavailable")
+        raise
+
+    _geocode_cache[key] = (time.monotonic(), coords)
+    _geocode_cache.move_to_end(key)
+    while len(_geocode_cache) > GEOCODE_CACHE_MAX_ENTRIES:
+        _geocode_cache.popitem(last=False)
+    return coords
+
+
+async def _fetch_geocode(location_text: str) -> Tuple[float, float]:
+    """
     Uses Nominatim API.
     """
     params = {
@@ -51,76 +197,318 @@ async def geocode_location(location_text: str) -> Tuple[float, float]:
             detail=f"Internal error during geocoding: {str(e)}"
         )
 
-async def search_nearby_hospitals(lat: float, lon: float, radius_km: int = 5) -> List[dict]:
+# --- Adaptive search ---
+#
+# Searches start with a small radius and only grow while fewer than `limit`
+# hospitals are known. Results are cached per area; growing the radius only
+# asks Overpass for the new ring (outer circle minus what is already known),
+# and cursor pages are served from the same cache.
+
+RADIUS_STEPS_KM = (2, 5, 10, 20, 50)
+AREA_KEY_PRECISION = 3   # ~110 m; rings are fetched around this grid so nearby users share an area
+AREA_CACHE_TTL_SECONDS = 600
+AREA_CACHE_MAX_ENTRIES = 256
+# Ways match `around` if ANY part is inside the circle, while distances use
+# their center. Re-fetching a thin overlap band avoids missing large campuses.
+RING_OVERLAP_KM = 0.5
+# Upper bound on hospitals kept from one ring. If a ring is denser than this,
+# only the nearest part of it counts as searched and the next step continues
+# from there.
+RING_RESULT_CAP = 200
+DISTANCE_RESOLUTION_KM = 0.01  # calculate_haversine_distance rounds to 2 decimals
+
+# When Overpass is failing, expired area results are still served (marked
+# stale) for up to a day rather than returning an error.
+STALE_MAX_AGE_SECONDS = 24 * 3600
+
+class _AreaResults:
+    def __init__(self, center: Tuple[float, float]):
+        self.center = center
+        self.hospitals: Dict[str, dict] = {}
+        self.complete_km = 0.0  # every hospital within complete_km of the center is known
+        self.created_at = time.monotonic()
+
+    def age(self) -> float:
+        return time.monotonic() - self.created_at
+
+    def is_expired(self) -> bool:
+        return self.age() > AREA_CACHE_TTL_SECONDS
+
+    def known_km(self, lat: float, lon: float) -> float:
+        # Radius around (lat, lon) that lies inside the searched circle
+        return max(self.complete_km - calculate_haversine_distance(lat, lon, *self.center), 0.0)
+
+    def page(self, lat: float, lon: float, after: Tuple[float, str], count: int) -> List[dict]:
+        # Distances and order are relative to the caller, not the snapped center
+        known_km = self.known_km(lat, lon)
+        known = []
+        for h in self.hospitals.values():
+            distance_km = calculate_haversine_distance(lat, lon, h["lat"], h["lon"])
+            if distance_km <= known_km and (distance_km, h["osm_id"]) > after:
+                known.append({**h, "distance_km": distance_km})
+        known.sort(key=lambda h: (h["distance_km"], h["osm_id"]))
+        return known[:count]
+
+_area_cache: "OrderedDict[Tuple[float, float], _AreaResults]" = OrderedDict()
+_stale_areas: "OrderedDict[Tuple[float, float], _AreaResults]" = OrderedDict()
+
+
+def _remember(cache: OrderedDict, key, value):
+    cache[key] = value
+    cache.move_to_end(key)
+    while len(cache) > AREA_CACHE_MAX_ENTRIES:
+        cache.popitem(last=False)
+
+
+def _get_area(key: Tuple[float, float]) -> _AreaResults:
+    area = _area_cache.get(key)
+    if area is None or area.is_expired():
+        if area is not None and area.hospitals:
+            _remember(_stale_areas, key, area)
+        area = _AreaResults(key)
+    _remember(_area_cache, key, area)
+    return area
+
+
+def _get_fallback_area(key: Tuple[float, float], area: _AreaResults) -> Optional[_AreaResults]:
     """
-    Service: Search for hospitals within a fixed radius.
-    Uses Overpass API.
+    Best results we can serve while Overpass is unavailable: whatever the
+    current search already found, or the last expired search of this area.
     """
-    radius_meters = radius_km * 1000
-    
-    # Overpass QL Query: Search for nodes/ways tagged as hospital
-    query = f"""
+    candidates = [area] if area.hospitals else []
+    stale = _stale_areas.get(key)
+    if stale is not None and stale.age() < STALE_MAX_AGE_SECONDS:
+        candidates.append(stale)
+    if not candidates:
+        return None
+    return max(candidates, key=lambda a: a.complete_km)
+
+
+def encode_cursor(hospital: dict) -> str:
+    raw = f"{hospital['distance_km']}|{hospital['osm_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[float, str]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        distance, osm_id = base64.urlsafe_b64decode(padded).decode().split("|", 1)
+        return float(distance), osm_id
+    except Exception:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid cursor")
+
+
+def _page_result(area: _AreaResults, lat: float, lon: float, after: Tuple[float, str],
+                 limit: int, stale: bool) -> dict:
+    # One extra result tells us whether a next page exists.
+    results = area.page(lat, lon, after, limit + 1)
+    next_cursor = encode_cursor(results[limit - 1]) if len(results) > limit else None
+    return {
+        "hospitals": results[:limit],
+        "next_cursor": next_cursor,
+        "radius_km": round(area.known_km(lat, lon), 2),
+        "stale": stale
+    }
+
+
+async def search_hospitals_adaptive(
+    lat: float,
+    lon: float,
+    limit: int = 10,
+    cursor: Optional[str] = None
+) -> dict:
+    """
+    Service: Nearest-first hospital discovery with adaptive radius.
+    Returns one page of hospitals, the cursor for the next page (if any),
+    the radius that was searched and whether the data is stale (served
+    from cache because Overpass is unavailable).
+    """
+    after = decode_cursor(cursor) if cursor else (-1.0, "")
+    key = (round(lat, AREA_KEY_PRECISION), round(lon, AREA_KEY_PRECISION))
+    area = _get_area(key)
+    center_lat, center_lon = key
+
+    try:
+        while len(area.page(lat, lon, after, limit + 1)) <= limit:
+            radius_km = next(
+                (r for r in RADIUS_STEPS_KM if r > area.complete_km and r >= after[0]),
+                None
+            )
+            if radius_km is None:
+                break
+
+            inner_km = max(area.complete_km - RING_OVERLAP_KM, 0)
+            ring_key = ("ring", key, inner_km, radius_km)
+            ring, truncated = await _coalesced(
+                _hospital_flights,
+                ring_key,
+                lambda: _fetch_hospitals_in_ring(
+                    center_lat, center_lon, inner_km, radius_km, max_results=RING_RESULT_CAP
+                ),
+                "Timeout reaching hospital data service",
+                _overpass_breaker
+            )
+            for hospital in ring:
+                area.hospitals[hospital["osm_id"]] = hospital
+
+            previous_km = area.complete_km
+            if truncated:
+                # Everything strictly closer than the farthest kept hospital is known.
+                farthest_km = ring[-1]["distance_km"] - DISTANCE_RESOLUTION_KM
+                area.complete_km = max(previous_km, farthest_km)
+            else:
+                area.complete_km = max(previous_km, radius_km)
+            if area.complete_km <= previous_km:
+                break
+
+    except (CircuitOpenError, HTTPException) as e:
+        if not _is_degraded(e):
+            raise
+        fallback = _get_fallback_area(key, area)
+        if fallback is None:
+            if isinstance(e, CircuitOpenError):
+                raise _service_unavailable(e, "Hospital discovery service temporarily unavailable")
+            raise
+        logger.warning("Hospital discovery degraded, serving stale results", extra={"area": key})
+        return _page_result(fallback, lat, lon, after, limit, stale=True)
+
+    return _page_result(area, lat, lon, after, limit, stale=False)
+
+
+# --- Overpass access ---
+
+def _build_overpass_query(lat: float, lon: float, inner_km: float, outer_km: float) -> str:
+    """
+    Overpass QL: hospitals (nodes and ways) within outer_km, minus those
+    within inner_km when expanding an already searched area.
+    """
+    def around(radius_km: float) -> str:
+        radius_meters = int(radius_km * 1000)
+        return f"""(
+        node["amenity"="hospital"](around:{radius_meters},{lat},{lon});
+        way["amenity"="hospital"](around:{radius_meters},{lat},{lon});
+      );"""
+
+    if inner_km <= 0:
+        selection = around(outer_km)
+    else:
+        selection = f"""(
+      {around(outer_km)}
+      -
+      {around(inner_km)}
+    );"""
+
+    return f"""
     [out:json];
-    (
-      node["amenity"="hospital"](around:{radius_meters},{lat},{lon});
-      way["amenity"="hospital"](around:{radius_meters},{lat},{lon});
-    );
+    {selection}
     out center;
     """
+
+
+def _parse_hospital(element: dict, lat: float, lon: float) -> Optional[dict]:
+    tags = element.get("tags", {})
+    
+    # Extraction
+    name = tags.get("name", "Unnamed Hospital")
+    phone = tags.get("phone") or tags.get("contact:phone") or tags.get("phone:reception")
     
+    # Address Formatting
+    addr_parts = [
+        tags.get("addr:housenumber"),
+        tags.get("addr:street"),
+        tags.get("addr:suburb") or tags.get("addr:neighbourhood"),
+        tags.get("addr:city")
+    ]
+    address = ", ".join([p for p in addr_parts if p]) or None
+    
+    # Coordinate fallback for ways
+    h_lat = element.get("lat") or element.get("center", {}).get("lat")
+    h_lon = element.get("lon") or element.get("center", {}).get("lon")
+    
+    if h_lat is None or h_lon is None:
+        return None
+
+    return {
+        "osm_id": f"{element.get('type', 'node')}/{element.get('id')}",
+        "name": name,
+        "address": address,
+        "phone": phone,
+        "lat": float(h_lat),
+        "lon": float(h_lon),
+        "distance_km": calculate_haversine_distance(lat, lon, float(h_lat), float(h_lon))
+    }
+
+
+class _NearestHospitals:
+    """
+    Bounded top-k collector: keeps only the `max_results` nearest hospitals
+    seen so far (max-heap on distance), so memory does not grow with the
+    size of the upstream response.
+    """
+
+    def __init__(self, max_results: Optional[int] = None):
+        self.max_results = max_results
+        self.truncated = False
+        self._heap: List[Tuple[float, int, dict]] = []
+        self._seq = 0
+
+    def add(self, hospital: dict):
+        self._seq += 1
+        entry = (-hospital["distance_km"], self._seq, hospital)
+        if self.max_results is None or len(self._heap) < self.max_results:
+            heapq.heappush(self._heap, entry)
+            return
+        self.truncated = True
+        if entry[0] > self._heap[0][0]:
+            heapq.heapreplace(self._heap, entry)
+
+    def sorted(self) -> List[dict]:
+        # Nearest first
+        return [h for _, _, h in sorted(self._heap, key=lambda e: (-e[0], e[1]))]
+
+
+async def _fetch_hospitals_in_ring(
+    lat: float,
+    lon: float,
+    inner_km: float,
+    outer_km: float,
+    max_results: Optional[int] = None
+) -> Tuple[List[dict], bool]:
+    """
+    Streams the Overpass response and returns (nearest hospitals, truncated).
+    Elements are parsed as they arrive instead of loading the whole body.
+    """
+    query = _build_overpass_query(lat, lon, inner_km, outer_km)
     headers = {"User-Agent": USER_AGENT}
-    print(f"[DEBUG] Searching hospitals near {lat}, {lon} with radius {radius_km}km")
+    logger.debug("Searching hospitals between %skm and %skm", inner_km, outer_km)
     
     try:
         async with httpx.AsyncClient() as client:
-            response = await client.post(OVERPASS_URL, data={"data": query}, headers=headers, timeout=15.0)
-            
-            if response.status_code != 200:
-                print(f"[ERROR] Overpass API failed with status {response.status_code}: {response.text}")
-                raise HTTPException(
-                    status_code=status.HTTP_502_BAD_GATEWAY, 
-                    detail=f"Hospital discovery service temporarily unavailable (Code: {response.status_code})"
-                )
-            
-            data = response.json()
-            elements = data.get("elements", [])
-            print(f"[DEBUG] Found {len(elements)} raw elements from Overpass")
-            
-            hospitals = []
-            for element in elements:
-                tags = element.get("tags", {})
-                
-                # Extraction
-                name = tags.get("name", "Unnamed Hospital")
-                phone = tags.get("phone") or tags.get("contact:phone") or tags.get("phone:reception")
-                
-                # Address Formatting
-                addr_parts = [
-                    tags.get("addr:housenumber"),
-                    tags.get("addr:street"),
-                    tags.get("addr:suburb") or tags.get("addr:neighbourhood"),
-                    tags.get("addr:city")
-                ]
-                address = ", ".join([p for p in addr_parts if p]) or None
-                
-                # Coordinate fallback for ways
-                h_lat = element.get("lat") or element.get("center", {}).get("lat")
-                h_lon = element.get("lon") or element.get("center", {}).get("lon")
-                
-                if h_lat is not None and h_lon is not None:
-                    dist = calculate_haversine_distance(lat, lon, float(h_lat), float(h_lon))
-                    hospitals.append({
-                        "name": name,
-                        "address": address,
-                        "phone": phone,
-                        "distance_km": dist
-                    })
-            
-            # Sort by nearest first
-            hospitals.sort(key=lambda x: x["distance_km"])
-            
-            # Return max 10
-            return hospitals[:10]
+            async with client.stream(
+                "POST", OVERPASS_URL, data={"data": query}, headers=headers, timeout=15.0
+            ) as response:
+                if response.status_code != 200:
+                    logger.error("Overpass API failed", extra={"upstream_status": response.status_code})
+                    raise HTTPException(
+                        status_code=status.HTTP_502_BAD_GATEWAY, 
+                        detail=f"Hospital discovery service temporarily unavailable (Code: {response.status_code})"
+                    )
+
+                parser = JsonArrayStream("elements")
+                nearest = _NearestHospitals(max_results)
+                element_count = 0
+                async for chunk in response.aiter_bytes():
+                    for element in parser.feed(chunk):
+                        element_count += 1
+                        hospital = _parse_hospital(element, lat, lon)
+                        if hospital is not None:
+                            nearest.add(hospital)
+                    if parser.finished:
+                        break
+                parser.close()
+
+            logger.debug("Found %d raw elements from Overpass", element_count)
+            return nearest.sorted(), nearest.truncated
             
     except (httpx.RequestError, httpx.TimeoutException):
         raise HTTPException(
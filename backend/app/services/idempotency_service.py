@@ -0,0 +1,286 @@
+import asyncio
+import hashlib
+import logging
+import re
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Callable, Optional, Tuple
+from uuid import UUID
+
+from fastapi import HTTPException, Request, Response, status
+from sqlalchemy import delete, select, tuple_
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.orm import Session
+from starlette.datastructures import UploadFile
+
+from app.core import metrics
+from app.core.config import settings
+from app.core.serialization import ResponseSerializer
+from app.core.singleflight import SingleFlight
+from app.database import SessionLocal
+from app.models.idempotency import IdempotencyKey
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENT_REQUESTS = metrics.counter(
+    "idempotent_requests_total",
+    "Requests sent with an Idempotency-Key by outcome (executed, replayed, conflict)",
+    ("outcome",),
+)
+
+REPLAYED_HEADER = "Idempotent-Replayed"
+_KEY_PATTERN = re.compile(r"[\x21-\x7e]{1,255}")
+_POLL_SECONDS = 0.2
+_DIGEST_CHUNK_BYTES = 1024 * 1024
+_PURGE_INTERVAL_SECONDS = 3600.0
+_PURGE_BATCH_SIZE = 1000
+
+_CLAIMED, _DONE, _PENDING = range(3)
+
+# Duplicates arriving at this worker while the first is running share its result
+_flights = SingleFlight()
+
+Work = Callable[[Session], Any]
+
+
+def purge_expired_keys() -> int:
+    """
+    Deletes keys older than IDEMPOTENCY_TTL_HOURS in batches of
+    _PURGE_BATCH_SIZE, one short transaction each. Rows locked by a
+    request taking over an expired key are left for the next run.
+    """
+    cutoff = datetime.now(timezone.utc) - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+    batch = (
+        select(IdempotencyKey.user_id, IdempotencyKey.key)
+        .where(IdempotencyKey.created_at < cutoff)
+        .limit(_PURGE_BATCH_SIZE)
+        .with_for_update(skip_locked=True)
+    )
+    purged = 0
+    db = SessionLocal()
+    try:
+        while True:
+            result = db.execute(
+                delete(IdempotencyKey).where(tuple_(IdempotencyKey.user_id, IdempotencyKey.key).in_(batch))
+            )
+            db.commit()
+            purged += result.rowcount
+            if result.rowcount < _PURGE_BATCH_SIZE:
+                break
+    finally:
+        db.close()
+    if purged:
+        logger.info("Purged %d expired idempotency keys", purged)
+    return purged
+
+
+async def purge_expired_keys_periodically():
+    # Started from the app lifespan, so no request pays for the purge
+    while True:
+        try:
+            await asyncio.to_thread(purge_expired_keys)
+        except Exception:
+            logger.exception("Purging expired idempotency keys failed")
+        await asyncio.sleep(_PURGE_INTERVAL_SECONDS)
+
+
+def _claim(user_id: UUID, key: str, fingerprint: str) -> Tuple[int, Optional[Tuple[int, bytes]]]:
+    """
+    (_CLAIMED, None) when this request should run, (_DONE, (status, body))
+    to replay, (_PENDING, None) while another worker runs it.
+    """
+    db = SessionLocal()
+    try:
+        now = datetime.now(timezone.utc)
+        inserted = db.execute(
+            pg_insert(IdempotencyKey)
+            .values(user_id=user_id, key=key, fingerprint=fingerprint, created_at=now)
+            .on_conflict_do_nothing()
+            .returning(IdempotencyKey.key)
+        ).first()
+        if inserted:
+            db.commit()
+            return _CLAIMED, None
+
+        row = db.execute(
+            select(IdempotencyKey)
+            .where(IdempotencyKey.user_id == user_id, IdempotencyKey.key == key)
+            .with_for_update()
+        ).scalar_one_or_none()
+        if row is None:
+            # Released by a failed first attempt in the meantime
+            db.rollback()
+            return _PENDING, None
+
+        expired = row.created_at < now - timedelta(hours=settings.IDEMPOTENCY_TTL_HOURS)
+        abandoned = row.status_code is None and (
+            row.created_at < now - timedelta(seconds=settings.IDEMPOTENCY_PENDING_TIMEOUT_SECONDS)
+        )
+        if expired or abandoned:
+            row.fingerprint = fingerprint
+            row.status_code = None
+            row.response_body = None
+            row.created_at = now
+            row.completed_at = None
+            db.commit()
+            return _CLAIMED, None
+
+        db.rollback()
+        if row.fingerprint != fingerprint:
+            raise HTTPException(
+                status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+                detail="Idempotency-Key was already used for a different request",
+            )
+        if row.status_code is None:
+            return _PENDING, None
+        return _DONE, (row.status_code, row.response_body)
+    finally:
+        db.close()
+
+
+def _release(user_id: UUID, key: str):
+    # Failed requests are not stored; a retry runs them again
+    db = SessionLocal()
+    try:
+        db.execute(delete(IdempotencyKey).where(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == key,
+            IdempotencyKey.status_code.is_(None),
+        ))
+        db.commit()
+    finally:
+        db.close()
+
+
+def _execute(work: Work, serializer: ResponseSerializer) -> bytes:
+    # Own session, so the result can be serialized before it is closed and
+    # coalesced duplicates never depend on the first request's session
+    db = SessionLocal()
+    try:
+        return serializer.dump(work(db))
+    finally:
+        db.close()
+
+
+def _execute_and_store(user_id: UUID, key: str, work: Work, serializer: ResponseSerializer, status_code: int) -> bytes:
+    body = _execute(work, serializer)
+    db = SessionLocal()
+    try:
+        row = db.get(IdempotencyKey, (user_id, key))
+        if row is not None:
+            row.status_code = status_code
+            row.response_body = body
+            row.completed_at = datetime.now(timezone.utc)
+            db.commit()
+    finally:
+        db.close()
+    return body
+
+
+async def _body_digest(request: Request) -> str:
+    """
+    Hash of the request body. Form bodies are hashed field by field, file
+    fields by filename and content, since multipart boundaries differ
+    between otherwise identical retries.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+
+    def update(data: bytes):
+        digest.update(b"%d:" % len(data))
+        digest.update(data)
+
+    content_type = request.headers.get("content-type", "")
+    if not content_type.startswith(("multipart/form-data", "application/x-www-form-urlencoded")):
+        update(await request.body())
+        return digest.hexdigest()
+
+    # Already parsed (and cached on the request) for the route's Form/File params
+    form = await request.form()
+    for name, value in sorted(form.multi_items(), key=lambda item: item[0]):
+        update(name.encode())
+        if isinstance(value, UploadFile):
+            update((value.filename or "").encode())
+            file_digest = hashlib.blake2b(digest_size=16)
+            while chunk := await value.read(_DIGEST_CHUNK_BYTES):
+                file_digest.update(chunk)
+            await value.seek(0)
+            update(file_digest.digest())
+        else:
+            update(value.encode())
+    return digest.hexdigest()
+
+
+async def _run_once(user_id: UUID, key: str, fingerprint: str, work: Work,
+                    serializer: ResponseSerializer, status_code: int) -> Tuple[int, bytes, bool]:
+    deadline = time.monotonic() + settings.IDEMPOTENCY_WAIT_SECONDS
+    while True:
+        state, stored = await asyncio.to_thread(_claim, user_id, key, fingerprint)
+        if state == _CLAIMED:
+            break
+        if state == _DONE:
+            IDEMPOTENT_REQUESTS.labels(outcome="replayed").inc()
+            return stored[0], stored[1], True
+        if time.monotonic() >= deadline:
+            IDEMPOTENT_REQUESTS.labels(outcome="conflict").inc()
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail="A request with this Idempotency-Key is still in progress",
+                headers={"Retry-After": "1"},
+            )
+        await asyncio.sleep(_POLL_SECONDS)
+
+    try:
+        body = await asyncio.to_thread(_execute_and_store, user_id, key, work, serializer, status_code)
+    except BaseException:
+        await asyncio.to_thread(_release, user_id, key)
+        raise
+    IDEMPOTENT_REQUESTS.labels(outcome="executed").inc()
+    return status_code, body, False
+
+
+async def run(
+    request: Request,
+    user_id: UUID,
+    key: Optional[str],
+    serializer: ResponseSerializer,
+    work: Work,
+    status_code: int = 200,
+) -> Response:
+    """
+    Runs `work(db)` (in a thread, with its own session) and returns its
+    result as JSON. With an Idempotency-Key the first successful response
+    is stored per user and key and replayed, with Idempotent-Replayed:
+    true, for retries within IDEMPOTENCY_TTL_HOURS:
+
+    - duplicates arriving at the same worker meanwhile wait for the first
+      request and share its response (also marked Idempotent-Replayed);
+    - duplicates arriving at another worker poll the stored row for up to
+      IDEMPOTENCY_WAIT_SECONDS, then get 409 with Retry-After;
+    - errors are not stored, so the client can retry with the same key;
+    - reusing a key for another endpoint, path parameter or body is a 422.
+
+    The work commits before its response is stored; if the worker dies in
+    between, a retry after IDEMPOTENCY_PENDING_TIMEOUT_SECONDS runs it again.
+    """
+    if key is None:
+        body = await asyncio.to_thread(_execute, work, serializer)
+        return Response(body, status_code=status_code, media_type="application/json")
+    if not _KEY_PATTERN.fullmatch(key):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Idempotency-Key must be 1-255 visible ASCII characters",
+        )
+
+    fingerprint = f"{request.method} {request.url.path} {await _body_digest(request)}"
+    # Only the caller that starts the flight (and then actually runs the
+    # work) answers without Idempotent-Replayed
+    started = False
+
+    def start():
+        nonlocal started
+        started = True
+        return _run_once(user_id, key, fingerprint, work, serializer, status_code)
+
+    code, body, replayed = await _flights.do((user_id, key, fingerprint), start)
+    headers = {REPLAYED_HEADER: "true"} if replayed or not started else None
+    return Response(body, status_code=code, headers=headers, media_type="application/json")
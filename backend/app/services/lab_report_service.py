@@ -0,0 +1,230 @@
+import io
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple
+from uuid import UUID
+
+from app.core import metrics
+from app.core.config import settings
+from app.database import SessionLocal
+from app.models.medical_record import MedicalRecord
+from app.services import analysis_service, user_service
+from app.services.chikitsa.engine import run_chikitsa_engine
+
+logger = logging.getLogger(__name__)
+
+LAB_REPORT_EXTRACTIONS = metrics.counter(
+    "lab_report_extractions_total",
+    "Background lab report extractions by outcome",
+    ("outcome",),
+)
+LAB_REPORT_DURATION = metrics.histogram(
+    "lab_report_extraction_duration_seconds",
+    "Time to extract, analyze and store one lab report",
+)
+
+# --- Text -> values ---
+
+_NUMBER = r"(\d{1,4}(?:\.\d+)?)"
+_UNIT = r"\s*(mg\s*/\s*dl|mmol\s*/\s*l|g\s*/\s*dl|g\s*/\s*l|[uµμ]mol\s*/\s*l|mm\s*hg|%)?"
+# Words between a parameter name and its value ("(Fasting) :", "Result")
+_FILLER = r"[^\d\n]{0,40}?"
+
+
+class _Parameter:
+    def __init__(self, key: str, names: str, unit: str, plausible: Tuple[float, float],
+                 conversions: Optional[Dict[str, float]] = None):
+        self.key = key
+        self.unit = unit
+        self.plausible = plausible
+        # unit found in the report -> factor to `unit`
+        self.conversions = conversions or {}
+        self.pattern = re.compile(rf"(?:{names}){_FILLER}{_NUMBER}{_UNIT}", re.IGNORECASE)
+
+    def convert(self, value: float, unit: Optional[str]) -> Optional[float]:
+        if unit:
+            unit = re.sub(r"\s+", "", unit).lower().replace("µ", "u").replace("μ", "u")
+            value *= self.conversions.get(unit, 1.0)
+        low, high = self.plausible
+        return round(value, 2) if low <= value <= high else None
+
+
+# Keys are the MedicalInput / engine field names; values are converted to
+# the engine's units. Implausible values (page numbers, reference ranges
+# picked up by mistake) are dropped.
+PARAMETERS: List[_Parameter] = [
+    _Parameter("bp_systolic", r"\bsystolic(?:\s+b\.?p\.?|\s+blood\s+pressure)?", "mmHg", (50, 300)),
+    _Parameter("bp_diastolic", r"\bdiastolic(?:\s+b\.?p\.?|\s+blood\s+pressure)?", "mmHg", (30, 200)),
+    _Parameter("spo2", r"\bsp\s?o2\b|\bsp02\b|oxygen\s+saturation|\bo2\s+sat(?:uration)?", "%", (50, 100)),
+    _Parameter(
+        "hemoglobin", r"\bha?emoglobin\b|\bhgb\b|\bhb\b(?!\s*a1c)", "g/dL", (2, 25),
+        {"g/l": 0.1, "mmol/l": 1.611},
+    ),
+    _Parameter(
+        "creatinine", r"\b(?:serum\s+)?creatinine\b(?!\s*(?:clearance|kinase))", "mg/dL", (0.1, 20),
+        {"umol/l": 1 / 88.42},
+    ),
+    _Parameter(
+        "blood_sugar",
+        r"\bfasting\s+(?:blood|plasma)\s+(?:sugar|glucose)\b|\bblood\s+(?:sugar|glucose)\b|\bglucose\b|\bfbs\b",
+        "mg/dL", (20, 1000),
+        {"mmol/l": 18.016},
+    ),
+    _Parameter(
+        "cholesterol", r"\b(?:total\s+)?cholesterol\b(?![^\d\n]{0,12}\b(?:hdl|ldl|vldl)\b)", "mg/dL", (50, 800),
+        {"mmol/l": 38.67},
+    ),
+]
+
+# "Blood Pressure: 120/80 mmHg"
+_BLOOD_PRESSURE = re.compile(
+    rf"(?:blood\s+pressure|\bb\.?p\.?\b){_FILLER}(\d{{2,3}})\s*/\s*(\d{{2,3}})", re.IGNORECASE
+)
+
+
+def parse_lab_values(text: str) -> Dict[str, float]:
+    """
+    The first plausible value of each known parameter in the report text,
+    converted to the engine's units.
+    """
+    values: Dict[str, float] = {}
+    for line in text.splitlines():
+        # HDL/LDL lines carry their own "cholesterol" value
+        if re.search(r"\b(?:hdl|ldl|vldl)\b", line, re.IGNORECASE) and "cholesterol" in line.lower():
+            line = re.sub(r"(?i)\bcholesterol\b", "", line)
+
+        match = _BLOOD_PRESSURE.search(line)
+        if match:
+            values.setdefault("bp_systolic", float(match.group(1)))
+            values.setdefault("bp_diastolic", float(match.group(2)))
+
+        for parameter in PARAMETERS:
+            if parameter.key in values:
+                continue
+            for match in parameter.pattern.finditer(line):
+                value = parameter.convert(float(match.group(1)), match.group(2))
+                if value is not None:
+                    values[parameter.key] = value
+                    break
+    return values
+
+
+def extract_pdf_text(content: bytes, max_pages: Optional[int] = None) -> str:
+    """
+    Text layer of a PDF. Scanned reports without one come back empty.
+    """
+    # Imported on first use to keep app startup fast (devtools/check_import_time.py)
+    from pypdf import PdfReader
+
+    max_pages = max_pages or settings.LAB_REPORT_MAX_PAGES
+    reader = PdfReader(io.BytesIO(content))
+    return "\n".join(page.extract_text() or "" for page in reader.pages[:max_pages])
+
+
+def format_insight(values: Dict[str, float], result: dict) -> str:
+    """
+    Short plain-text summary shown under the record in the app.
+    """
+    flagged = [
+        f"{item['parameter']} {item['value']:g} {item['unit']} ({item['deviation']})"
+        for item in result.get("flagged_parameters", [])
+    ]
+    found = ", ".join(analysis_service.TREND_PARAMETERS[key][0] for key in values)
+    insight = f"{result.get('overall_health_risk', 'Unknown')}. Read from this report: {found}."
+    if flagged:
+        insight += " Flagged: " + "; ".join(flagged) + "."
+    else:
+        insight += " All values within your healthy range."
+    return insight
+
+
+def analyze_lab_report(content: bytes, profile=None) -> Tuple[Dict[str, float], Optional[dict], Optional[dict]]:
+    """
+    (extracted values, engine input, engine result) for a PDF; the last two
+    are None when no known parameter was found.
+    """
+    values = parse_lab_values(extract_pdf_text(content))
+    if not values:
+        return values, None, None
+    patient_data = analysis_service.build_patient_data(profile, **values)
+    return values, patient_data, run_chikitsa_engine(patient_data)
+
+
+# --- Background stage ---
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+# Queued + running jobs; uploads beyond this are stored without an insight
+_slots = threading.BoundedSemaphore(settings.LAB_REPORT_MAX_PENDING)
+
+
+def _get_executor() -> ThreadPoolExecutor:
+    global _executor
+    if _executor is None:
+        with _executor_lock:
+            if _executor is None:
+                _executor = ThreadPoolExecutor(
+                    max_workers=settings.LAB_REPORT_WORKERS, thread_name_prefix="lab-report"
+                )
+    return _executor
+
+
+def _process(record_id: UUID, user_id: UUID, content: bytes):
+    outcome = "error"
+    db = SessionLocal()
+    try:
+        with LAB_REPORT_DURATION.time():
+            profile = user_service.get_user_profile(db, user_id)
+            values, patient_data, result = analyze_lab_report(content, profile)
+            if result is None:
+                outcome = "no_values"
+                return
+            record = db.get(MedicalRecord, record_id)
+            if record is None:
+                # Deleted while queued
+                outcome = "deleted"
+                return
+            record.ai_insight = format_insight(values, result)
+            # Commits the insight together with the run and trend updates
+            analysis_service.record_analysis_run(db, user_id, patient_data, result)
+            outcome = "analyzed"
+    except Exception:
+        db.rollback()
+        logger.exception("Lab report extraction failed", extra={"record_id": str(record_id)})
+    finally:
+        db.close()
+        LAB_REPORT_EXTRACTIONS.labels(outcome=outcome).inc()
+        logger.info("Lab report extraction %s", outcome, extra={"record_id": str(record_id)})
+
+
+def submit_lab_report(record_id: UUID, user_id: UUID, content: bytes) -> bool:
+    """
+    Queues extraction of an uploaded PDF lab report; never blocks the
+    upload. Returns False when the pool is saturated and the job was dropped.
+    """
+    if not _slots.acquire(blocking=False):
+        LAB_REPORT_EXTRACTIONS.labels(outcome="rejected").inc()
+        logger.warning("Lab report queue full, skipping extraction", extra={"record_id": str(record_id)})
+        return False
+    try:
+        future = _get_executor().submit(_process, record_id, user_id, content)
+    except RuntimeError:
+        # Pool already shut down
+        _slots.release()
+        return False
+    # Also runs for jobs cancelled at shutdown
+    future.add_done_callback(lambda _: _slots.release())
+    return True
+
+
+def shutdown_lab_report_pool():
+    """
+    Drops queued jobs and waits for the running ones to commit.
+    """
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True, cancel_futures=True)
@@ -1,12 +1,16 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from fastapi import HTTPException, status, UploadFile
 from uuid import UUID
 from typing import List, Optional
+from datetime import date, datetime, time, timedelta, timezone
 import os
+import re
 from pathlib import Path
 
 from app.models.medical_record import MedicalRecord
-from app.services import storage_service, family_access_service
+from app.services import storage_service, family_access_service, lab_report_service
 
 def create_medical_record(db: Session, user_id: UUID, title: str, record_type: str, file: UploadFile):
     # 1. Validate record_type
@@ -14,6 +18,12 @@ def create_medical_record(db: Session, user_id: UUID, title: str, record_type: s
     if record_type not in allowed_types:
         raise HTTPException(status_code=400, detail=f"Invalid record_type. Allowed: {allowed_types}")
     
+    # Lab report PDFs are analyzed in the background once stored
+    content = None
+    if record_type == "lab_report" and file.content_type == "application/pdf":
+        content = file.file.read()
+        file.file.seek(0)
+
     # 2. Save file
     file_path = storage_service.save_medical_record_file(file, user_id)
     
@@ -28,6 +38,9 @@ def create_medical_record(db: Session, user_id: UUID, title: str, record_type: s
     db.add(new_record)
     db.commit()
     db.refresh(new_record)
+
+    if content is not None:
+        lab_report_service.submit_lab_report(new_record.id, user_id, content)
     return new_record
 
 def list_user_records(db: Session, requester_id: UUID, owner_id: Optional[UUID] = None):
@@ -41,6 +54,100 @@ def list_user_records(db: Session, requester_id: UUID, owner_id: Optional[UUID]
         MedicalRecord.user_id == target_id
     ).order_by(MedicalRecord.created_at.desc()).all()
 
+async def list_user_records_async(db: AsyncSession, requester_id: UUID, owner_id: Optional[UUID] = None):
+    target_id = owner_id if owner_id else requester_id
+    
+    # Check family access if viewing someone else's records
+    if target_id != requester_id:
+        await family_access_service.enforce_medical_record_access_async(db, requester_id, target_id)
+    
+    result = await db.execute(
+        select(MedicalRecord).where(
+            MedicalRecord.user_id == target_id
+        ).order_by(MedicalRecord.created_at.desc())
+    )
+    return result.scalars().all()
+
+async def get_records_fingerprint_async(db: AsyncSession, requester_id: UUID, owner_id: Optional[UUID] = None):
+    """
+    (owner, count, latest created_at, latest updated_at) of the records
+    list_user_records_async would return, in one aggregate query. Access is
+    enforced the same way, so a revoked viewer gets 403, never a 304.
+    """
+    target_id = owner_id if owner_id else requester_id
+    if target_id != requester_id:
+        await family_access_service.enforce_medical_record_access_async(db, requester_id, target_id)
+
+    result = await db.execute(
+        select(
+            func.count(MedicalRecord.id),
+            func.max(MedicalRecord.created_at),
+            func.max(MedicalRecord.updated_at),
+        ).where(MedicalRecord.user_id == target_id)
+    )
+    return (target_id, *result.one())
+
+def _prefix_tsquery(text: str) -> Optional[str]:
+    # Every word must match, each as a prefix ("presc" finds "Prescription").
+    # Only word characters are kept, so user input cannot break to_tsquery.
+    words = re.findall(r"\w+", text)
+    return " & ".join(f"{word}:*" for word in words[:16]) or None
+
+async def search_records_async(
+    db: AsyncSession,
+    requester_id: UUID,
+    q: Optional[str] = None,
+    record_types: Optional[List[str]] = None,
+    date_from: Optional[date] = None,
+    date_to: Optional[date] = None,
+    owner_id: Optional[UUID] = None,
+    limit: int = 50,
+    offset: int = 0,
+):
+    target_id = owner_id if owner_id else requester_id
+
+    # Check family access if searching someone else's records
+    if target_id != requester_id:
+        await family_access_service.enforce_medical_record_access_async(db, requester_id, target_id)
+
+    conditions = [MedicalRecord.user_id == target_id]
+    if date_from:
+        conditions.append(MedicalRecord.created_at >= datetime.combine(date_from, time.min, timezone.utc))
+    if date_to:
+        conditions.append(MedicalRecord.created_at < datetime.combine(date_to + timedelta(days=1), time.min, timezone.utc))
+
+    order_by = [MedicalRecord.created_at.desc()]
+    tsquery = _prefix_tsquery(q) if q else None
+    if tsquery:
+        query = func.to_tsquery("english", tsquery)
+        conditions.append(MedicalRecord.search_vector.op("@@")(query))
+        order_by.insert(0, func.ts_rank_cd(MedicalRecord.search_vector, query).desc())
+    elif q:
+        # Only punctuation: nothing can match
+        return {"total": 0, "items": [], "facets": {}}
+
+    # Facets cover every type so the app can show "Prescriptions (3)" next
+    # to the active filter; the total follows from them without a COUNT(*).
+    facet_rows = await db.execute(
+        select(MedicalRecord.record_type, func.count())
+        .where(*conditions)
+        .group_by(MedicalRecord.record_type)
+    )
+    facets = dict(facet_rows.all())
+    if record_types:
+        conditions.append(MedicalRecord.record_type.in_(record_types))
+        total = sum(facets.get(t, 0) for t in set(record_types))
+    else:
+        total = sum(facets.values())
+
+    items = []
+    if total > offset:
+        result = await db.execute(
+            select(MedicalRecord).where(*conditions).order_by(*order_by).limit(limit).offset(offset)
+        )
+        items = result.scalars().all()
+    return {"total": total, "items": items, "facets": facets}
+
 def delete_record(db: Session, user_id: UUID, record_id: UUID):
     record = db.query(MedicalRecord).filter(
         MedicalRecord.id == record_id,
@@ -1,11 +1,41 @@
+import logging
+import threading
 import uuid
 from typing import Optional
 from fastapi import UploadFile, HTTPException, status
-from supabase import create_client, Client
+from app.core import metrics
 from app.core.config import settings
 
-# Initialize Supabase client
-supabase: Client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+logger = logging.getLogger(__name__)
+
+STORAGE_LATENCY = metrics.histogram(
+    "storage_request_duration_seconds",
+    "Supabase storage round trips (one per bucket variant tried)",
+    ("operation",),
+)
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_supabase_client():
+    """
+    Shared Supabase client, created on first use (importing supabase and
+    building the client is deferred out of app import / worker boot).
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                from supabase import create_client
+                _client = create_client(settings.SUPABASE_URL, settings.SUPABASE_KEY)
+    return _client
+
+
+def close_supabase_client():
+    global _client
+    with _client_lock:
+        _client = None
 
 ALLOWED_TYPES = {
     "application/pdf",
@@ -43,13 +73,14 @@ def save_medical_record_file(file: UploadFile, user_id: uuid.UUID) -> str:
 
         for bucket in bucket_variants:
             try:
-                print(f"[DEBUG] Attempting upload to bucket: '{bucket}'")
-                supabase.storage.from_(bucket).upload(
-                    file_path,
-                    file_content,
-                    {"content-type": file.content_type}
-                )
-                print(f"[SUCCESS] Uploaded to bucket: '{bucket}'")
+                logger.debug("Attempting upload to bucket %r", bucket)
+                with STORAGE_LATENCY.labels(operation="upload").time():
+                    get_supabase_client().storage.from_(bucket).upload(
+                        file_path,
+                        file_content,
+                        {"content-type": file.content_type}
+                    )
+                logger.info("Uploaded to bucket %r", bucket)
                 return file_path
             except Exception as e:
                 last_error = e
@@ -57,12 +88,12 @@ def save_medical_record_file(file: UploadFile, user_id: uuid.UUID) -> str:
                     continue
                 raise e
 
-        print(f"[CRITICAL] All bucket variants failed for upload. Last error: {last_error}")
+        logger.error("All bucket variants failed for upload. Last error: %s", last_error)
         file.file.seek(0)
         raise HTTPException(status_code=500, detail=f"Target Supabase bucket not found. Tried: {bucket_variants}")
 
     except Exception as e:
-        print(f"Supabase Upload Error: {e}")
+        logger.error("Supabase upload error: %s", e)
         if isinstance(e, HTTPException): raise e
         raise HTTPException(status_code=500, detail=str(e))
     finally:
@@ -72,32 +103,44 @@ def delete_physical_file(relative_path: str):
     bucket_variants = _get_bucket_variants()
     for bucket in bucket_variants:
         try:
-            supabase.storage.from_(bucket).remove([relative_path])
+            with STORAGE_LATENCY.labels(operation="remove").time():
+                get_supabase_client().storage.from_(bucket).remove([relative_path])
             return
         except Exception as e:
             if "not found" in str(e).lower():
                 continue
-            print(f"Failed to delete file {relative_path} from {bucket}: {e}")
+            logger.warning("Failed to delete file from bucket %r: %s", bucket, e)
 
 def delete_user_storage(user_id: uuid.UUID):
     bucket_variants = _get_bucket_variants()
     for bucket in bucket_variants:
         try:
-            files = supabase.storage.from_(bucket).list(f"{user_id}")
+            with STORAGE_LATENCY.labels(operation="list").time():
+                files = get_supabase_client().storage.from_(bucket).list(f"{user_id}")
             if files:
                 paths_to_delete = [f"{user_id}/{f['name']}" for f in files]
-                supabase.storage.from_(bucket).remove(paths_to_delete)
+                with STORAGE_LATENCY.labels(operation="remove").time():
+                    get_supabase_client().storage.from_(bucket).remove(paths_to_delete)
         except Exception as e:
             continue
 
+def ping():
+    """
+    Cheapest authenticated round trip to the configured bucket; raises if
+    storage is unreachable or misconfigured.
+    """
+    with STORAGE_LATENCY.labels(operation="ping").time():
+        get_supabase_client().storage.from_(settings.SUPABASE_BUCKET).list(options={"limit": 1})
+
 def get_signed_url(file_path: str, expires_in: int = 3600) -> str:
     bucket_variants = _get_bucket_variants()
     for bucket in bucket_variants:
         try:
-            print(f"[DEBUG] Attempting signed URL from bucket: '{bucket}'")
-            response = supabase.storage.from_(bucket).create_signed_url(
-                file_path, expires_in
-            )
+            logger.debug("Attempting signed URL from bucket %r", bucket)
+            with STORAGE_LATENCY.labels(operation="signed_url").time():
+                response = get_supabase_client().storage.from_(bucket).create_signed_url(
+                    file_path, expires_in
+                )
             
             signed_url = None
             if isinstance(response, str):
@@ -108,12 +151,12 @@ def get_signed_url(file_path: str, expires_in: int = 3600) -> str:
                 signed_url = response.signed_url
             
             if signed_url:
-                print(f"[SUCCESS] Generated signed URL from bucket: '{bucket}'")
+                logger.debug("Generated signed URL from bucket %r", bucket)
                 return signed_url
                 
         except Exception as e:
             if "not found" in str(e).lower():
                 continue
-            print(f"[WARNING] Error with bucket '{bucket}': {e}")
+            logger.warning("Error with bucket %r: %s", bucket, e)
 
     raise HTTPException(status_code=404, detail="Medical record file not found in any storage bucket.")
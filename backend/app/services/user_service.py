@@ -1,3 +1,5 @@
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from app.models.user import UserProfile
 from app.models.emergency_contact import EmergencyContact
@@ -9,6 +11,24 @@ from fastapi import HTTPException, status
 def get_user_profile(db: Session, user_id: UUID):
     return db.query(UserProfile).filter(UserProfile.user_id == user_id).first()
 
+async def get_user_profile_async(db: AsyncSession, user_id: UUID):
+    result = await db.execute(select(UserProfile).where(UserProfile.user_id == user_id))
+    return result.scalars().first()
+
+async def get_profile_fingerprint_async(db: AsyncSession, user_id: UUID):
+    """
+    (profile updated_at, contact count, latest contact updated_at) in one
+    aggregate query, or None when the user has no profile yet.
+    """
+    result = await db.execute(
+        select(UserProfile.updated_at, func.count(EmergencyContact.id), func.max(EmergencyContact.updated_at))
+        .outerjoin(EmergencyContact, EmergencyContact.user_id == UserProfile.user_id)
+        .where(UserProfile.user_id == user_id)
+        .group_by(UserProfile.id)
+    )
+    row = result.first()
+    return tuple(row) if row else None
+
 def create_user_profile(db: Session, user_id: UUID, profile_data: UserProfileCreate):
     existing_profile = get_user_profile(db, user_id)
     if existing_profile:
@@ -23,6 +43,20 @@ def create_user_profile(db: Session, user_id: UUID, profile_data: UserProfileCre
     db.refresh(new_profile)
     return new_profile
 
+async def create_user_profile_async(db: AsyncSession, user_id: UUID, profile_data: UserProfileCreate):
+    existing_profile = await get_user_profile_async(db, user_id)
+    if existing_profile:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, 
+            detail="Profile already exists"
+        )
+    
+    new_profile = UserProfile(user_id=user_id, **profile_data.model_dump())
+    db.add(new_profile)
+    await db.commit()
+    await db.refresh(new_profile)
+    return new_profile
+
 def update_user_profile(db: Session, user_id: UUID, profile_data: UserProfileUpdate):
     profile = get_user_profile(db, user_id)
     if not profile:
@@ -45,6 +79,10 @@ def update_user_profile(db: Session, user_id: UUID, profile_data: UserProfileUpd
 def get_emergency_contacts(db: Session, user_id: UUID):
     return db.query(EmergencyContact).filter(EmergencyContact.user_id == user_id).all()
 
+async def get_emergency_contacts_async(db: AsyncSession, user_id: UUID):
+    result = await db.execute(select(EmergencyContact).where(EmergencyContact.user_id == user_id))
+    return result.scalars().all()
+
 def create_emergency_contact(db: Session, user_id: UUID, contact_data: EmergencyContactCreate):
     new_contact = EmergencyContact(user_id=user_id, **contact_data.model_dump())
     db.add(new_contact)
@@ -0,0 +1,122 @@
+"""
+Prints the Postgres plan of every hot-path query and fails if any of them
+still needs a sequential scan.
+
+    python check_query_plans.py            # summary, exit code 1 on Seq Scan
+    python check_query_plans.py --verbose  # full EXPLAIN output per query
+
+Plans are taken with enable_seqscan = off: on small (dev) tables the planner
+prefers a Seq Scan even when a usable index exists, so a Seq Scan that
+survives this setting means there is no index the query can use.
+"""
+import sys
+import uuid
+from datetime import datetime, timezone
+
+from sqlalchemy import and_, func, literal_column, select, text
+
+from app.database import engine
+from app.models.user import AuthUser, UserProfile
+from app.models.emergency_contact import EmergencyContact
+from app.models.medical_record import MedicalRecord
+from app.models.family_access import AccessControlVersion, FamilyAccessRequest, FamilyMedicalAccess, FamilyInviteToken
+from app.models.idempotency import IdempotencyKey
+
+
+def hot_queries():
+    user_id = uuid.uuid4()
+    other_id = uuid.uuid4()
+    now = datetime.now(timezone.utc)
+    return {
+        "login: user by email": select(AuthUser).where(AuthUser.email == "someone@example.com"),
+        "profile by user": select(UserProfile).where(UserProfile.user_id == user_id),
+        "emergency contacts": select(EmergencyContact).where(EmergencyContact.user_id == user_id),
+        "records list": select(MedicalRecord)
+            .where(MedicalRecord.user_id == user_id)
+            .order_by(MedicalRecord.created_at.desc()),
+        "records etag": select(func.count(MedicalRecord.id), func.max(MedicalRecord.updated_at))
+            .where(MedicalRecord.user_id == user_id),
+        "profile etag": select(UserProfile.updated_at, func.count(EmergencyContact.id))
+            .outerjoin(EmergencyContact, EmergencyContact.user_id == UserProfile.user_id)
+            .where(UserProfile.user_id == user_id)
+            .group_by(UserProfile.id),
+        "records search": select(MedicalRecord).where(
+            MedicalRecord.user_id == user_id,
+            MedicalRecord.search_vector.op("@@")(func.to_tsquery(literal_column("'english'"), "presc:*")),
+        ),
+        "access version": select(AccessControlVersion.version).where(AccessControlVersion.id == 1),
+        "access check": select(FamilyMedicalAccess).where(and_(
+            FamilyMedicalAccess.owner_user_id == user_id,
+            FamilyMedicalAccess.viewer_user_id == other_id,
+        )),
+        "active access (owner)": select(FamilyMedicalAccess).where(FamilyMedicalAccess.owner_user_id == user_id),
+        "active access etag": select(func.count(FamilyMedicalAccess.id), func.max(UserProfile.updated_at))
+            .select_from(FamilyMedicalAccess)
+            .outerjoin(UserProfile, UserProfile.user_id == FamilyMedicalAccess.viewer_user_id)
+            .where(FamilyMedicalAccess.owner_user_id == user_id),
+        "shared with me (viewer)": select(FamilyMedicalAccess).where(FamilyMedicalAccess.viewer_user_id == user_id),
+        "pending requests": select(FamilyAccessRequest).where(and_(
+            FamilyAccessRequest.owner_user_id == user_id,
+            FamilyAccessRequest.status == "pending",
+        )),
+        "duplicate request check": select(FamilyAccessRequest).where(and_(
+            FamilyAccessRequest.requester_user_id == other_id,
+            FamilyAccessRequest.owner_user_id == user_id,
+            FamilyAccessRequest.status == "pending",
+        )),
+        "reusable invite token": select(FamilyInviteToken).where(and_(
+            FamilyInviteToken.owner_user_id == user_id,
+            FamilyInviteToken.is_used == False,
+            FamilyInviteToken.expires_at > now,
+        )).order_by(FamilyInviteToken.created_at.desc()).limit(1),
+        "idempotency key": select(IdempotencyKey).where(and_(
+            IdempotencyKey.user_id == user_id,
+            IdempotencyKey.key == "retry-1",
+        )),
+        "expired idempotency keys": select(IdempotencyKey.user_id, IdempotencyKey.key)
+            .where(IdempotencyKey.created_at < now).limit(1000),
+        "redeem invite token": select(FamilyInviteToken).where(FamilyInviteToken.invite_token == "x" * 32),
+    }
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+def check(verbose: bool = False) -> int:
+    if engine.dialect.name != "postgresql":
+        print(f"Query plan check needs PostgreSQL, not {engine.dialect.name}")
+        return 2
+
+    failures = []
+    with engine.connect() as conn:
+        conn.execute(text("SET enable_seqscan = off"))
+        for name, stmt in hot_queries().items():
+            sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+            plan = conn.execute(text("EXPLAIN (FORMAT JSON) " + sql)).scalar()[0]["Plan"]
+            nodes = list(_plan_nodes(plan))
+            seq_scans = [n["Relation Name"] for n in nodes if n["Node Type"] == "Seq Scan"]
+            scans = ", ".join(
+                f'{n["Node Type"]} on {n.get("Index Name") or n.get("Relation Name")}'
+                for n in nodes if "Relation Name" in n or "Index Name" in n
+            )
+            status = "SEQ SCAN" if seq_scans else "ok"
+            print(f"[{status:>8}] {name}: {scans}")
+            if verbose:
+                for line in conn.execute(text("EXPLAIN " + sql)).scalars():
+                    print(f"           {line}")
+            if seq_scans:
+                failures.append(name)
+        conn.rollback()
+
+    if failures:
+        print(f"\n{len(failures)} hot quer{'y' if len(failures) == 1 else 'ies'} without a usable index: {', '.join(failures)}")
+        return 1
+    print("\nAll hot queries use an index.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(check(verbose="--verbose" in sys.argv))
@@ -0,0 +1,188 @@
+"""
+Serialization cost of the hottest responses, and its share of request time.
+
+For each response, the time to turn the handler's return value into JSON
+bytes three ways:
+
+- jsonable_encoder: JSONResponse(jsonable_encoder(...)), what a route
+  without response_model pays (/medical/analyze before it had one);
+- response_model: FastAPI's own path for the route's response_model;
+- precompiled: the app/core/serialization.py serializer, where one exists.
+
+Payloads are synthetic ORM-like rows (no database needed); the analyze
+payload is a real engine result, so the ML model must be loadable. With
+--report (the JSON written by devtools.benchmark) the p50 latency of the
+matching scenario is used to print the serialization share of request time;
+pass the benchmark's --records-per-user as --rows for comparable payloads.
+
+    cd backend
+    python -m devtools.bench_serialization --rows 5 --report bench.json
+
+Needs the same environment variables as the app (Settings is loaded on
+import).
+"""
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+from typing import Callable, Dict, Optional
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, BACKEND_DIR)
+
+# route -> devtools.benchmark scenario it dominates
+SCENARIO_FOR_ROUTE = {
+    "GET /records": "records",
+    "GET /family-access/active-access": "family_access",
+    "GET /family-access/shared-with-me": "family_access",
+    "GET /family-access/pending-requests": "family_access",
+    "POST /medical/analyze": "analyze",
+}
+
+
+def _best_us(fn: Callable, number: int, repeat: int = 5) -> float:
+    fn()
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _ in range(number):
+            fn()
+        best = min(best, (time.perf_counter() - start) / number)
+    return best * 1e6
+
+
+def _payloads(rows: int) -> Dict[str, object]:
+    from app.services.chikitsa.engine import run_chikitsa_engine
+
+    now = datetime.now(timezone.utc)
+    owner, viewer = uuid.uuid4(), uuid.uuid4()
+
+    records = [
+        SimpleNamespace(
+            id=uuid.uuid4(), user_id=owner, title=f"Blood test report {i}", record_type="lab_report",
+            file_path=f"{owner}/{uuid.uuid4()}_report.pdf",
+            ai_insight="Moderate Risk. Read from this report: Hemoglobin, Blood sugar. Flagged: Hemoglobin 11.2 g/dL (Low).",
+            created_at=now - timedelta(days=i),
+        )
+        for i in range(rows)
+    ]
+    grants = [
+        SimpleNamespace(
+            id=uuid.uuid4(), owner_user_id=owner, viewer_user_id=uuid.uuid4(), can_view_medical_records=True,
+            created_at=now, owner_name="Asha Rao", owner_email="asha@example.com",
+            viewer_name=f"Viewer {i}", viewer_email=f"viewer{i}@example.com",
+        )
+        for i in range(rows)
+    ]
+    requests = [
+        SimpleNamespace(
+            id=uuid.uuid4(), requester_user_id=uuid.uuid4(), owner_user_id=owner, status="pending",
+            created_at=now, responded_at=None, requester_name=f"Requester {i}",
+            requester_email=f"requester{i}@example.com", owner_name="Asha Rao", owner_email="asha@example.com",
+        )
+        for i in range(rows)
+    ]
+    profile = SimpleNamespace(
+        id=uuid.uuid4(), user_id=viewer, name="Asha Rao", date_of_birth=None, gender="Female",
+        blood_group="B+", phone_country_code="+91", phone_number=9876543210, height=162.0, weight=58.5,
+        country="India", allergies=["penicillin", "peanuts"],
+    )
+    contacts = [
+        SimpleNamespace(id=uuid.uuid4(), user_id=viewer, name=f"Contact {i}", relation="Sibling",
+                        phone_country_code="+91", phone_number=9000000000 + i)
+        for i in range(2)
+    ]
+    analysis = run_chikitsa_engine({
+        "name": "Bench", "age": 45, "gender": "Male", "height": 172, "weight": 84,
+        "bp_systolic": 148, "bp_diastolic": 94, "spo2": 95, "hemoglobin": 11.4,
+        "creatinine": 1.3, "blood_sugar": 132, "cholesterol": 246,
+    })
+    return {
+        "GET /records": records,
+        "GET /family-access/active-access": grants,
+        "GET /family-access/shared-with-me": grants,
+        "GET /family-access/pending-requests": requests,
+        "GET /users/profile": {"personal_details": profile, "emergency_contacts": contacts,
+                               "allergies": profile.allergies},
+        "POST /medical/analyze": analysis,
+    }
+
+
+def measure(rows: int, number: int) -> Dict[str, Dict[str, Optional[float]]]:
+    import warnings
+
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from fastapi.routing import serialize_response
+
+    from app.api import family_access, medical, medical_records, users
+    from app.core import serialization
+
+    precompiled = {
+        "GET /records": serialization.MEDICAL_RECORDS,
+        "GET /family-access/active-access": serialization.FAMILY_ACCESS,
+        "GET /family-access/shared-with-me": serialization.FAMILY_ACCESS,
+        "GET /family-access/pending-requests": serialization.ACCESS_REQUESTS,
+        "GET /users/profile": serialization.CONSOLIDATED_PROFILE,
+    }
+    routes = {
+        f"{method} {route.path}": route
+        for router in (medical_records.router, family_access.router, users.router, medical.router)
+        for route in router.routes
+        for method in route.methods
+    }
+    loop = asyncio.new_event_loop()
+    results = {}
+    for name, content in _payloads(rows).items():
+        field = routes[name].response_field
+        # ORM rows need from_attributes validation before jsonable_encoder
+        plain = precompiled[name].adapter.validate_python(content, from_attributes=True) if name in precompiled else content
+
+        def fastapi_path():
+            return loop.run_until_complete(serialize_response(field=field, response_content=content, dump_json=True))
+
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            results[name] = {
+                "jsonable_encoder_us": round(_best_us(lambda: JSONResponse(jsonable_encoder(plain)), number), 1),
+                "response_model_us": round(_best_us(fastapi_path, number), 1),
+                "precompiled_us": (
+                    round(_best_us(lambda: precompiled[name].response(content), number), 1)
+                    if name in precompiled else None
+                ),
+            }
+    loop.close()
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5, help="items per list response")
+    parser.add_argument("--number", type=int, default=200, help="calls per timing")
+    parser.add_argument("--report", help="devtools.benchmark JSON output, for the share of request time")
+    args = parser.parse_args()
+
+    results = measure(args.rows, args.number)
+
+    if args.report:
+        with open(args.report) as f:
+            scenarios = json.load(f)["scenarios"]
+        for name, timings in results.items():
+            scenario = scenarios.get(SCENARIO_FOR_ROUTE.get(name, ""))
+            if not scenario:
+                continue
+            p50_us = scenario["latency_ms"]["p50"] * 1000
+            served = timings["precompiled_us"] or timings["response_model_us"]
+            timings["request_p50_us"] = p50_us
+            timings["share_of_p50"] = round(served / p50_us, 4) if p50_us else None
+
+    print(json.dumps({"rows": args.rows, "routes": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,403 @@
+"""
+Reproducible load benchmark for the API, run in-process.
+
+The app is driven through httpx's ASGI transport (no network, one event
+loop: roughly one uvicorn worker). Supabase storage is replaced by an
+in-memory fake and Nominatim/Overpass by devtools.fake_upstream on a local
+port, so the numbers only depend on this code and the database.
+
+The schema needs PostgreSQL (UUID and ARRAY columns), so point it at a
+local/disposable database; migrations are applied first:
+
+    cd backend
+    DATABASE_URL=postgresql+psycopg2://postgres@127.0.0.1:5432/chikitsa_bench \\
+        python -m devtools.benchmark --concurrency 20 --duration 10 --output bench.json
+
+Results are JSON (throughput and latency percentiles per scenario, plus
+the git commit) so runs can be diffed across commits. `--base-url` runs the
+same traffic against an already running server instead (e.g. one uvicorn
+worker), in which case that server's storage/upstream config is used;
+start it with RATE_LIMIT_ENABLED=false, or logins and signups from the one
+benchmark client get 429s.
+"""
+import argparse
+import asyncio
+import contextlib
+import json
+import math
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from datetime import datetime, timezone
+from typing import Awaitable, Callable, Dict, List
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = ("login", "analyze", "records", "family_access", "hospitals")
+PASSWORD = "bench-password-123"
+# A small valid PDF, used as the uploaded record file
+PDF_BYTES = b"%PDF-1.4\n1 0 obj<<>>endobj\ntrailer<<>>\n%%EOF\n"
+HOSPITAL_CENTER = (18.5204, 73.8567)
+
+
+# --- Fakes ---
+
+class _FakeBucket:
+    def __init__(self, storage: "FakeStorage", bucket: str):
+        self._storage = storage
+        self._bucket = bucket
+
+    def upload(self, path, content, options=None):
+        self._storage.delay()
+        self._storage.objects[(self._bucket, path)] = bytes(content)
+        return {"Key": path}
+
+    def list(self, path=None, options=None):
+        self._storage.delay()
+        prefix = f"{path}/" if path else ""
+        return [
+            {"name": key[len(prefix):]}
+            for bucket, key in list(self._storage.objects)
+            if bucket == self._bucket and key.startswith(prefix)
+        ]
+
+    def remove(self, paths):
+        self._storage.delay()
+        for path in paths:
+            self._storage.objects.pop((self._bucket, path), None)
+        return []
+
+    def create_signed_url(self, path, expires_in):
+        self._storage.delay()
+        if (self._bucket, path) not in self._storage.objects:
+            raise Exception("Object not found")
+        return {"signedURL": f"http://fake-storage.local/{self._bucket}/{path}?token=bench"}
+
+
+class FakeStorage:
+    """
+    In-memory stand-in for the parts of the Supabase storage client we use,
+    with a fixed per-call latency (the real client is blocking, so is this).
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency_ms = latency_ms
+        self.objects: Dict[tuple, bytes] = {}
+
+    def delay(self):
+        if self.latency_ms:
+            time.sleep(self.latency_ms / 1000)
+
+    def from_(self, bucket: str) -> _FakeBucket:
+        return _FakeBucket(self, bucket)
+
+
+class FakeSupabase:
+    def __init__(self, latency_ms: float = 0.0):
+        self.storage = FakeStorage(latency_ms)
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _start_fake_upstream(latency_ms: int) -> int:
+    import uvicorn
+    from devtools import fake_upstream
+
+    fake_upstream.state.update(latency_ms=latency_ms, error_rate=0.0)
+    port = _free_port()
+    server = uvicorn.Server(uvicorn.Config(fake_upstream.app, host="127.0.0.1", port=port, log_level="warning"))
+    threading.Thread(target=server.run, daemon=True).start()
+    deadline = time.monotonic() + 10
+    while not server.started:
+        if time.monotonic() > deadline:
+            raise RuntimeError("fake upstream did not start")
+        time.sleep(0.05)
+    return port
+
+
+# --- Measurement ---
+
+def _percentile(sorted_values: List[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    # nearest-rank
+    rank = math.ceil(pct / 100 * len(sorted_values))
+    return sorted_values[min(max(rank, 1), len(sorted_values)) - 1]
+
+
+def _summarize(latencies: List[float], statuses: Dict[str, int], errors: int, elapsed: float) -> dict:
+    values = sorted(latencies)
+    total = len(values)
+    return {
+        "requests": total,
+        "errors": errors,
+        "status_counts": dict(sorted(statuses.items())),
+        "duration_s": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 2) if elapsed else 0.0,
+        "latency_ms": {
+            "mean": round(sum(values) / total * 1000, 2) if total else 0.0,
+            "p50": round(_percentile(values, 50) * 1000, 2),
+            "p90": round(_percentile(values, 90) * 1000, 2),
+            "p99": round(_percentile(values, 99) * 1000, 2),
+            "max": round(values[-1] * 1000, 2) if total else 0.0,
+        },
+    }
+
+
+async def _run_load(request: Callable[[random.Random], Awaitable], concurrency: int,
+                    duration: float, warmup: float, seed: int) -> dict:
+    latencies: List[float] = []
+    statuses: Dict[str, int] = {}
+    errors = 0
+    start = time.perf_counter()
+    measure_from = start + warmup
+    stop_at = measure_from + duration
+
+    async def worker(worker_id: int):
+        nonlocal errors
+        rng = random.Random(seed * 1000 + worker_id)
+        while True:
+            begun = time.perf_counter()
+            if begun >= stop_at:
+                return
+            try:
+                response = await request(rng)
+                status = str(response.status_code)
+                failed = response.status_code >= 400
+            except Exception as e:
+                status = type(e).__name__
+                failed = True
+            finished = time.perf_counter()
+            if begun >= measure_from:
+                latencies.append(finished - begun)
+                statuses[status] = statuses.get(status, 0) + 1
+                errors += failed
+
+    await asyncio.gather(*(worker(i) for i in range(concurrency)))
+    return _summarize(latencies, statuses, errors, time.perf_counter() - measure_from)
+
+
+# --- Scenarios ---
+
+class BenchContext:
+    def __init__(self, client, run_id: str):
+        self.client = client
+        self.run_id = run_id
+        self.users: List[dict] = []
+
+    def user(self, rng: random.Random) -> dict:
+        return self.users[rng.randrange(len(self.users))]
+
+
+async def _setup(ctx: BenchContext, user_count: int, records_per_user: int):
+    client = ctx.client
+
+    async def signup(i: int):
+        email = f"bench-{ctx.run_id}-{i}@example.com"
+        r = await client.post("/auth/signup", json={"email": email, "password": PASSWORD})
+        r.raise_for_status()
+        body = r.json()
+        return {"email": email, "id": body["user_id"], "headers": {"Authorization": f"Bearer {body['access_token']}"}}
+
+    ctx.users = list(await asyncio.gather(*(signup(i) for i in range(user_count))))
+
+    async def upload(user: dict, n: int):
+        r = await client.post(
+            "/records",
+            data={"title": f"Report {n}", "record_type": "lab_report"},
+            files={"file": (f"report-{n}.pdf", PDF_BYTES, "application/pdf")},
+            headers=user["headers"],
+        )
+        r.raise_for_status()
+
+    await asyncio.gather(*(upload(u, n) for u in ctx.users for n in range(records_per_user)))
+
+    # Each user can view the next user's records and has one pending request
+    for i, owner in enumerate(ctx.users):
+        viewer = ctx.users[(i + 1) % len(ctx.users)]
+        owner["viewer_of"] = ctx.users[(i - 1) % len(ctx.users)]["id"]
+        r = await client.post("/family-access/request", json={"owner_user_id": owner["id"]}, headers=viewer["headers"])
+        r.raise_for_status()
+        r = await client.post(f"/family-access/respond/{r.json()['id']}", json={"accept": True}, headers=owner["headers"])
+        r.raise_for_status()
+        if len(ctx.users) > 2:
+            requester = ctx.users[(i + 2) % len(ctx.users)]
+            await client.post("/family-access/request", json={"owner_user_id": owner["id"]}, headers=requester["headers"])
+
+
+async def _teardown(ctx: BenchContext):
+    await asyncio.gather(*(ctx.client.delete("/auth/account", headers=u["headers"]) for u in ctx.users))
+
+
+def _scenarios(ctx: BenchContext, hospital_points: int, seed: int) -> Dict[str, Callable]:
+    client = ctx.client
+    points_rng = random.Random(seed)
+    points = [
+        (HOSPITAL_CENTER[0] + points_rng.uniform(-0.2, 0.2), HOSPITAL_CENTER[1] + points_rng.uniform(-0.2, 0.2))
+        for _ in range(hospital_points)
+    ]
+
+    async def login(rng):
+        user = ctx.user(rng)
+        return await client.post("/auth/login", json={"email": user["email"], "password": PASSWORD})
+
+    async def analyze(rng):
+        user = ctx.user(rng)
+        return await client.post("/medical/analyze", headers=user["headers"], json={
+            "user_id": user["id"],
+            "bp_systolic": rng.randint(95, 180),
+            "bp_diastolic": rng.randint(60, 115),
+            "spo2": rng.randint(88, 100),
+            "hemoglobin": round(rng.uniform(8, 17), 1),
+            "creatinine": round(rng.uniform(0.5, 2.5), 2),
+            "blood_sugar": rng.randint(70, 250),
+            "cholesterol": rng.randint(140, 300),
+        })
+
+    async def records(rng):
+        user = ctx.user(rng)
+        if rng.random() < 0.5:
+            return await client.get("/records", headers=user["headers"])
+        return await client.get("/records", params={"owner_id": user["viewer_of"]}, headers=user["headers"])
+
+    family_calls = (
+        lambda user: client.get("/family-access/active-access", headers=user["headers"]),
+        lambda user: client.get("/family-access/shared-with-me", headers=user["headers"]),
+        lambda user: client.get("/family-access/pending-requests", headers=user["headers"]),
+        lambda user: client.get(f"/family-access/can-view/{user['viewer_of']}", headers=user["headers"]),
+    )
+
+    async def family_access(rng):
+        return await rng.choice(family_calls)(ctx.user(rng))
+
+    async def hospitals(rng):
+        lat, lng = rng.choice(points)
+        return await client.get("/hospitals/nearby", params={"lat": lat, "lng": lng})
+
+    return {
+        "login": login,
+        "analyze": analyze,
+        "records": records,
+        "family_access": family_access,
+        "hospitals": hospitals,
+    }
+
+
+def _git_revision() -> dict:
+    def git(*args):
+        return subprocess.run(["git", *args], cwd=BACKEND_DIR, capture_output=True, text=True).stdout.strip()
+    try:
+        return {"commit": git("rev-parse", "--short", "HEAD") or None, "dirty": bool(git("status", "--porcelain"))}
+    except OSError:
+        return {"commit": None, "dirty": None}
+
+
+async def run(args) -> dict:
+    import httpx
+
+    if args.base_url:
+        transport = None
+        base_url = args.base_url
+        target = args.base_url
+    else:
+        from app.main import _warm_up, app
+        from app.services import storage_service
+
+        storage_service._client = FakeSupabase(args.storage_latency_ms)
+        # ASGITransport does not run the lifespan; load the model up front so
+        # the first requests do not measure it
+        await asyncio.to_thread(_warm_up)
+        transport = httpx.ASGITransport(app=app)
+        base_url = "http://bench"
+        target = "in-process"
+
+    async with httpx.AsyncClient(transport=transport, base_url=base_url, timeout=60.0) as client:
+        ctx = BenchContext(client, uuid.uuid4().hex[:8])
+        await _setup(ctx, args.users, args.records_per_user)
+        scenarios = _scenarios(ctx, args.hospital_points, args.seed)
+        results = {}
+        try:
+            for name in args.scenarios:
+                print(f"running {name} ...", file=sys.stderr)
+                results[name] = await _run_load(scenarios[name], args.concurrency, args.duration, args.warmup, args.seed)
+        finally:
+            if not args.keep_data:
+                await _teardown(ctx)
+
+    return {
+        "meta": {
+            **_git_revision(),
+            "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "target": target,
+            "python": platform.python_version(),
+            "concurrency": args.concurrency,
+            "duration_s": args.duration,
+            "warmup_s": args.warmup,
+            "users": args.users,
+            "records_per_user": args.records_per_user,
+            "storage_latency_ms": args.storage_latency_ms,
+            "upstream_latency_ms": args.upstream_latency_ms,
+            "seed": args.seed,
+        },
+        "scenarios": results,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS), help=f"comma separated, from: {', '.join(SCENARIOS)}")
+    parser.add_argument("--concurrency", type=int, default=10)
+    parser.add_argument("--duration", type=float, default=10.0, help="measured seconds per scenario")
+    parser.add_argument("--warmup", type=float, default=1.0, help="unmeasured seconds before each scenario")
+    parser.add_argument("--users", type=int, default=10)
+    parser.add_argument("--records-per-user", type=int, default=5)
+    parser.add_argument("--hospital-points", type=int, default=20, help="distinct locations searched")
+    parser.add_argument("--storage-latency-ms", type=float, default=20.0)
+    parser.add_argument("--upstream-latency-ms", type=int, default=50)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--base-url", help="benchmark a running server instead of the in-process app")
+    parser.add_argument("--keep-data", action="store_true", help="do not delete the benchmark users afterwards")
+    parser.add_argument("--output", help="write the JSON report here (default: stdout)")
+    args = parser.parse_args()
+
+    args.scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    unknown = set(args.scenarios) - set(SCENARIOS)
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    if not args.base_url:
+        # Must be in place before app.core.config is imported
+        port = _start_fake_upstream(args.upstream_latency_ms)
+        os.environ["NOMINATIM_URL"] = f"http://127.0.0.1:{port}/search"
+        os.environ["OVERPASS_URL"] = f"http://127.0.0.1:{port}/api/interpreter"
+        os.environ.setdefault("LOG_LEVEL", "WARNING")
+        # All simulated users share one client address
+        os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+        sys.path.insert(0, BACKEND_DIR)
+        from migrate_db import migrate
+        # migrate() reports on stdout, which carries the JSON report
+        with contextlib.redirect_stdout(sys.stderr):
+            migrate()
+
+    report = asyncio.run(run(args))
+    output = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+        print(f"wrote {args.output}", file=sys.stderr)
+    else:
+        print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Import-time budget for the API: fails when `import app.main` (what every
+worker pays on cold start) takes longer than the budget.
+
+    python -m devtools.check_import_time              # default budget
+    python -m devtools.check_import_time --budget-ms 600 --top 15
+
+Measured with `python -X importtime` in a fresh interpreter, best of
+--runs attempts to smooth out disk-cache noise. Needs the same environment
+variables as the app (Settings is loaded on import). Exit code 1 over
+budget, so it can gate CI.
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DEFAULT_BUDGET_MS = 800
+
+
+def measure(module: str):
+    """
+    -> (total_us, [(cumulative_us, self_us, name), ...]) for one fresh import.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-2000:]}")
+
+    entries = []
+    total_us = None
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        entries.append((int(cumulative_us), int(self_us), name.rstrip()))
+        if name.strip() == module:
+            total_us = int(cumulative_us)
+    if total_us is None:
+        raise RuntimeError(f"{module} not found in -X importtime output")
+    return total_us, entries
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.main")
+    parser.add_argument("--budget-ms", type=float, default=DEFAULT_BUDGET_MS)
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--top", type=int, default=10, help="slowest imports to list")
+    args = parser.parse_args()
+
+    best_us, best_entries = min((measure(args.module) for _ in range(args.runs)), key=lambda r: r[0])
+    total_ms = best_us / 1000
+
+    print(f"import {args.module}: {total_ms:.0f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    print("slowest imports (cumulative ms, self ms):")
+    for cumulative_us, self_us, name in sorted(best_entries, reverse=True)[1:args.top + 1]:
+        print(f"  {cumulative_us / 1000:8.1f} {self_us / 1000:8.1f}  {name.strip()}")
+
+    if total_ms > args.budget_ms:
+        print(f"FAIL: over budget by {total_ms - args.budget_ms:.0f} ms")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
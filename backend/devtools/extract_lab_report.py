@@ -0,0 +1,51 @@
+"""
+Runs the lab report extraction stage on local PDFs and prints what was
+read and the resulting insight. Nothing is written to the database or
+storage, but the usual .env settings must be present:
+
+    python -m devtools.extract_lab_report report.pdf [more.pdf ...] [--json]
+
+Useful for checking the pattern table in app/services/lab_report_service.py
+against sample reports before and after changing it.
+"""
+import argparse
+import json
+import os
+import sys
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("pdfs", nargs="+", help="PDF files with a text layer")
+    parser.add_argument("--text", action="store_true", help="also print the extracted text")
+    parser.add_argument("--json", action="store_true", help="print the full engine result as JSON")
+    args = parser.parse_args()
+
+    sys.path.insert(0, BACKEND_DIR)
+    from app.services import lab_report_service
+
+    failed = False
+    for path in args.pdfs:
+        with open(path, "rb") as f:
+            content = f.read()
+        print(f"== {path}")
+        if args.text:
+            print(lab_report_service.extract_pdf_text(content))
+            print("--")
+        values, _, result = lab_report_service.analyze_lab_report(content)
+        if result is None:
+            print("no known parameters found")
+            failed = True
+            continue
+        for key, value in values.items():
+            print(f"  {key:<14} {value:g}")
+        print(lab_report_service.format_insight(values, result))
+        if args.json:
+            print(json.dumps(result, indent=2, ensure_ascii=False))
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,158 @@
+"""
+Local stand-in for the Nominatim and Overpass APIs, with injectable
+latency and errors. Used to exercise hospital discovery (circuit breaker,
+stale fallback, load tests) without touching the real services.
+
+Usage (from backend/):
+    python -m devtools.fake_upstream --port 8099 --latency-ms 50 --error-rate 0.0
+
+Then point the API at it:
+    NOMINATIM_URL=http://127.0.0.1:8099/search
+    OVERPASS_URL=http://127.0.0.1:8099/api/interpreter
+
+Behaviour can be changed while running, e.g. to simulate an outage:
+    curl -X POST localhost:8099/_control -H 'Content-Type: application/json' \\
+         -d '{"latency_ms": 12000, "error_rate": 1.0}'
+"""
+import argparse
+import asyncio
+import hashlib
+import json
+import math
+import random
+import re
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, Response
+
+MAX_RADIUS_KM = 50
+
+app = FastAPI(title="Fake OSM upstream")
+
+state = {
+    "latency_ms": 0,
+    "error_rate": 0.0,
+    "error_status": 503,
+    "density_per_km2": 0.3,
+    "requests": 0,
+}
+
+_AROUND = re.compile(r"around:(\d+),(-?[\d.]+),(-?[\d.]+)")
+
+
+def _distance_km(lat1, lon1, lat2, lon2):
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = math.sin(d_phi / 2) ** 2 + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    return 6371.0 * 2 * math.atan2(math.sqrt(a), math.sqrt(1 - a))
+
+
+def _hospitals_around(lat: float, lon: float):
+    """
+    Deterministic hospitals scattered around a point (same input, same output).
+    """
+    seed = int(hashlib.sha1(f"{lat:.3f},{lon:.3f}".encode()).hexdigest()[:8], 16)
+    rng = random.Random(seed)
+    count = int(math.pi * MAX_RADIUS_KM ** 2 * state["density_per_km2"])
+    for i in range(count):
+        # Uniform over the disc
+        r = MAX_RADIUS_KM * math.sqrt(rng.random())
+        theta = rng.random() * 2 * math.pi
+        h_lat = lat + (r * math.cos(theta)) / 111.0
+        h_lon = lon + (r * math.sin(theta)) / (111.0 * max(math.cos(math.radians(lat)), 0.01))
+        element = {
+            "type": "node" if i % 3 else "way",
+            "id": seed + i,
+            "tags": {
+                "amenity": "hospital",
+                "name": f"Fake Hospital {i}",
+                "addr:street": f"Street {i % 97}",
+                "addr:city": "Testville",
+                "phone": f"+91 {9000000000 + i}",
+            },
+        }
+        if element["type"] == "node":
+            element.update({"lat": h_lat, "lon": h_lon})
+        else:
+            element["center"] = {"lat": h_lat, "lon": h_lon}
+        yield element, h_lat, h_lon
+
+
+async def _inject_faults():
+    state["requests"] += 1
+    if state["latency_ms"]:
+        await asyncio.sleep(state["latency_ms"] / 1000)
+    if random.random() < state["error_rate"]:
+        return Response(status_code=state["error_status"], content="injected failure")
+    return None
+
+
+@app.post("/_control")
+async def control(request: Request):
+    updates = await request.json()
+    state.update({k: v for k, v in updates.items() if k in state})
+    return state
+
+
+@app.get("/_control")
+async def get_control():
+    return state
+
+
+@app.get("/search")
+async def nominatim_search(q: str):
+    failure = await _inject_faults()
+    if failure is not None:
+        return failure
+    if "nowhere" in q.lower():
+        return []
+    digest = hashlib.sha1(q.strip().lower().encode()).digest()
+    lat = 8 + digest[0] / 255 * 27      # roughly India
+    lon = 68 + digest[1] / 255 * 29
+    return [{"lat": f"{lat:.6f}", "lon": f"{lon:.6f}", "display_name": q}]
+
+
+@app.post("/api/interpreter")
+async def overpass_interpreter(request: Request):
+    failure = await _inject_faults()
+    if failure is not None:
+        return failure
+
+    form = await request.form()
+    circles = [(int(m), float(a), float(b)) for m, a, b in _AROUND.findall(form.get("data", ""))]
+    if not circles:
+        return JSONResponse({"elements": []})
+
+    outer_m, lat, lon = circles[0]
+    # Ring queries list the outer circle (node + way) and then the inner one.
+    inner_m = circles[-1][0] if len(circles) == 4 else 0
+
+    elements = []
+    for element, h_lat, h_lon in _hospitals_around(lat, lon):
+        distance_m = _distance_km(lat, lon, h_lat, h_lon) * 1000
+        if distance_m <= outer_m and not (inner_m and distance_m <= inner_m):
+            elements.append(element)
+
+    body = {
+        "version": 0.6,
+        "generator": "Fake Overpass",
+        "osm3s": {"timestamp_osm_base": "1970-01-01T00:00:00Z"},
+        "elements": elements,
+    }
+    return Response(content=json.dumps(body), media_type="application/json")
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8099)
+    parser.add_argument("--latency-ms", type=int, default=0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--density", type=float, default=0.3, help="hospitals per km²")
+    args = parser.parse_args()
+
+    state.update(latency_ms=args.latency_ms, error_rate=args.error_rate, density_per_km2=args.density)
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")